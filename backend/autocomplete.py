@@ -0,0 +1,176 @@
+"""
+Autocomplete do formulário de partida: índice de prefixos em memória.
+
+Valores distintos de times, campeonatos, árbitros e estádios já cadastrados,
+em arrays ordenados pela forma sem acentos/maiúsculas: a busca por prefixo é
+uma bisseção. Carregado na inicialização (agregação em db.partidas) e
+ajustado a cada gravação pela contagem de partidas de cada valor, que também
+ordena as sugestões (a grafia mais usada aparece primeiro): um heap escolhe
+as mais usadas entre todos os valores com o prefixo, e empates ficam em
+ordem alfabética. Cada processo do servidor tem o seu índice: gravações
+feitas por outro processo só aparecem depois de reiniciar.
+"""
+
+import bisect
+import heapq
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+
+CAMPOS_AUTOCOMPLETE: Dict[str, Tuple[str, ...]] = {
+    "time": ("time_casa", "time_visitante"),
+    "campeonato": ("campeonato",),
+    "arbitro": ("arbitro",),
+    "local_estadio": ("local_estadio",),
+}
+# Maior caractere Unicode: (prefixo + FIM_PREFIXO,) fica depois de toda chave com o prefixo
+FIM_PREFIXO = "\U0010ffff"
+
+
+class SugestaoAutocomplete(BaseModel):
+    """Valor já cadastrado para um campo do formulário"""
+    valor: str
+    partidas: int
+    media_cartoes_arbitro: Optional[float] = None  # só para árbitros: a da partida mais recente
+
+
+def dobrar_texto(texto: str) -> str:
+    """Forma de comparação: sem acentos, sem maiúsculas e com espaços simples"""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+    return " ".join(sem_acentos.casefold().split())
+
+
+class IndicePrefixos:
+    """Valores distintos de um campo, ordenados pela forma dobrada, com a contagem de partidas"""
+
+    def __init__(self, contagens: Optional[Dict[str, int]] = None):
+        self._contagens: Dict[str, int] = {valor: n for valor, n in (contagens or {}).items() if n > 0}
+        self._ordenados: List[Tuple[str, str]] = sorted((dobrar_texto(valor), valor) for valor in self._contagens)
+
+    def __len__(self) -> int:
+        return len(self._contagens)
+
+    def ajustar(self, valor: str, delta: int) -> None:
+        anterior = self._contagens.get(valor, 0)
+        atual = anterior + delta
+        item = (dobrar_texto(valor), valor)
+        if atual <= 0:
+            self._contagens.pop(valor, None)
+            if anterior > 0:
+                indice = bisect.bisect_left(self._ordenados, item)
+                if indice < len(self._ordenados) and self._ordenados[indice] == item:
+                    del self._ordenados[indice]
+            return
+        if anterior <= 0:
+            bisect.insort(self._ordenados, item)
+        self._contagens[valor] = atual
+
+    def buscar(self, prefixo: str, limite: int) -> List[Tuple[str, int]]:
+        """Valores que começam com o prefixo (sem acento/caixa), os mais usados primeiro"""
+        dobrado = dobrar_texto(prefixo)
+        inicio = bisect.bisect_left(self._ordenados, (dobrado,))
+        fim = bisect.bisect_left(self._ordenados, (dobrado + FIM_PREFIXO,), inicio)
+        # nlargest é estável: com a mesma contagem, mantém a ordem alfabética
+        mais_usados = heapq.nlargest(
+            limite, (valor for _, valor in self._ordenados[inicio:fim]), key=self._contagens.__getitem__
+        )
+        return [(valor, self._contagens[valor]) for valor in mais_usados]
+
+
+class IndiceAutocomplete:
+    """Índices de prefixos por campo + última média de cartões de cada árbitro"""
+
+    def __init__(self):
+        self.indices: Dict[str, IndicePrefixos] = {campo: IndicePrefixos() for campo in CAMPOS_AUTOCOMPLETE}
+        self.cartoes_arbitro: Dict[str, Tuple[Any, float]] = {}  # árbitro -> (criado_em, média)
+
+    @staticmethod
+    def _valores(partida_doc: Optional[Dict[str, Any]], campos_doc: Tuple[str, ...]) -> List[str]:
+        if not partida_doc:
+            return []
+        return [partida_doc[campo] for campo in campos_doc if isinstance(partida_doc.get(campo), str) and partida_doc[campo].strip()]
+
+    def aplicar(self, antes: Optional[Dict[str, Any]], depois: Optional[Dict[str, Any]]) -> None:
+        """Ajusta as contagens pela diferença entre o documento anterior e o novo"""
+        for campo, campos_doc in CAMPOS_AUTOCOMPLETE.items():
+            diferenca: Dict[str, int] = {}
+            for valor in self._valores(antes, campos_doc):
+                diferenca[valor] = diferenca.get(valor, 0) - 1
+            for valor in self._valores(depois, campos_doc):
+                diferenca[valor] = diferenca.get(valor, 0) + 1
+            for valor, delta in diferenca.items():
+                if delta:
+                    self.indices[campo].ajustar(valor, delta)
+
+        if depois and depois.get("arbitro") and depois.get("media_cartoes_arbitro") is not None:
+            registrado_em = self.cartoes_arbitro.get(depois["arbitro"], (None,))[0]
+            criado_em = depois.get("criado_em")
+            comparaveis = type(criado_em) is type(registrado_em) and criado_em is not None
+            if not comparaveis or criado_em >= registrado_em:
+                self.cartoes_arbitro[depois["arbitro"]] = (criado_em, depois["media_cartoes_arbitro"])
+
+    def sugerir(self, campo: str, prefixo: str, limite: int) -> List[Dict[str, Any]]:
+        sugestoes = []
+        for valor, partidas in self.indices[campo].buscar(prefixo, limite):
+            sugestao: Dict[str, Any] = {"valor": valor, "partidas": partidas}
+            if campo == "arbitro" and valor in self.cartoes_arbitro:
+                sugestao["media_cartoes_arbitro"] = self.cartoes_arbitro[valor][1]
+            sugestoes.append(sugestao)
+        return sugestoes
+
+    async def carregar(self, partidas) -> None:
+        """Monta todos os índices a partir da coleção de partidas (agregações, sem trazer os documentos)"""
+        indices = {}
+        for campo, campos_doc in CAMPOS_AUTOCOMPLETE.items():
+            contagens: Dict[str, int] = {}
+            for campo_doc in campos_doc:
+                async for grupo in partidas.aggregate([
+                    {"$match": {campo_doc: {"$type": "string", "$ne": ""}}},
+                    {"$group": {"_id": f"${campo_doc}", "partidas": {"$sum": 1}}},
+                ]):
+                    if grupo["_id"].strip():
+                        contagens[grupo["_id"]] = contagens.get(grupo["_id"], 0) + grupo["partidas"]
+            indices[campo] = IndicePrefixos(contagens)
+
+        cartoes = {}
+        async for grupo in partidas.aggregate([
+            {"$match": {"arbitro": {"$type": "string", "$ne": ""}, "media_cartoes_arbitro": {"$ne": None}}},
+            {"$sort": {"criado_em": -1}},
+            {"$group": {
+                "_id": "$arbitro",
+                "criado_em": {"$first": "$criado_em"},
+                "media": {"$first": "$media_cartoes_arbitro"},
+            }},
+        ]):
+            cartoes[grupo["_id"]] = (grupo["criado_em"], grupo["media"])
+
+        self.indices, self.cartoes_arbitro = indices, cartoes
+
+
+indice_autocomplete = IndiceAutocomplete()
+
+
+roteador = APIRouter(prefix="/api")
+
+
+@roteador.get("/autocomplete/{campo}", response_model=List[SugestaoAutocomplete])
+async def autocompletar(
+    campo: str,
+    prefixo: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Sugestões para o formulário de partida a partir dos valores já cadastrados
+    - campo: time, campeonato, arbitro ou local_estadio
+    - Prefixo sem diferença de acentos e maiúsculas; mais usados primeiro
+    - Árbitros trazem a última media_cartoes_arbitro informada
+    """
+    if campo not in CAMPOS_AUTOCOMPLETE:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Campo sem autocomplete: {campo} (válidos: {', '.join(CAMPOS_AUTOCOMPLETE)})"
+        )
+    return indice_autocomplete.sugerir(campo, prefixo, limit)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Backtest do modelo 1X2 (V2) sobre partidas com resultado_final.
+
+Reprocessa o histórico com o motor vetorizado (idêntico a
+calcular_scores_independentes) e mede:
+- Brier score e log-loss das probabilidades Casa/Empate/Fora
+- Taxa de acerto (resultado mais provável) por faixa de confiança
+- ROI com aposta fixa de 1 unidade em todo mercado com EV > 0
+
+O histórico é dividido em fatias processadas em paralelo (ProcessPoolExecutor);
+cada fatia devolve somas parciais que são combinadas no final.
+
+Exemplos:
+    python backtest.py
+    python backtest.py --campeonato "Série A" --processos 8
+    python backtest.py --entrada historico.ndjson --json resultado.json
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import server
+
+
+INDICE_RESULTADO = {resultado: i for i, resultado in enumerate(server.RESULTADOS_FINAIS)}
+MERCADOS = ("casa", "empate", "fora")
+EPSILON = 1e-15
+
+
+def avaliar_fatia(partida_docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Somas parciais das métricas de uma fatia do histórico (executa no processo filho)"""
+    partidas = [server.Partida(**partida_doc) for partida_doc in partida_docs]
+    resultado = server.analisar_1x2_lote(partidas)
+    linhas = np.arange(len(partidas))
+
+    reais = np.array([INDICE_RESULTADO[partida.resultado_final] for partida in partidas])
+    ocorrido = np.zeros((len(partidas), 3))
+    ocorrido[linhas, reais] = 1
+
+    probabilidades = np.column_stack([resultado[f"probabilidade_{m}"] for m in MERCADOS]) / 100
+    acertos = probabilidades.argmax(axis=1) == reais
+
+    por_confianca = {}
+    for faixa in np.unique(resultado["confianca"]):
+        na_faixa = resultado["confianca"] == faixa
+        por_confianca[str(faixa)] = {"partidas": int(na_faixa.sum()), "acertos": int(acertos[na_faixa].sum())}
+
+    evs = np.column_stack([resultado[f"ev_{m}"] for m in MERCADOS])
+    odds = np.array([[partida.odd_casa, partida.odd_empate, partida.odd_fora] for partida in partidas])
+    apostas = evs > 0
+    vencedoras = apostas & (ocorrido == 1)
+
+    return {
+        "partidas": len(partidas),
+        "brier": float(((probabilidades - ocorrido) ** 2).sum()),
+        "log_loss": float(-np.log(np.clip(probabilidades[linhas, reais], EPSILON, 1.0)).sum()),
+        "acertos": int(acertos.sum()),
+        "por_confianca": por_confianca,
+        "apostas": {
+            mercado: {
+                "apostas": int(apostas[:, i].sum()),
+                "vencedoras": int(vencedoras[:, i].sum()),
+                "retorno": float((odds[:, i] * vencedoras[:, i]).sum()),
+            }
+            for i, mercado in enumerate(MERCADOS)
+        },
+    }
+
+
+def combinar(parciais: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Soma as métricas parciais das fatias"""
+    total: Dict[str, Any] = {
+        "partidas": 0, "brier": 0.0, "log_loss": 0.0, "acertos": 0,
+        "por_confianca": {},
+        "apostas": {mercado: {"apostas": 0, "vencedoras": 0, "retorno": 0.0} for mercado in MERCADOS},
+    }
+    for parcial in parciais:
+        for campo in ("partidas", "brier", "log_loss", "acertos"):
+            total[campo] += parcial[campo]
+        for faixa, contagem in parcial["por_confianca"].items():
+            acumulado = total["por_confianca"].setdefault(faixa, {"partidas": 0, "acertos": 0})
+            acumulado["partidas"] += contagem["partidas"]
+            acumulado["acertos"] += contagem["acertos"]
+        for mercado, contagem in parcial["apostas"].items():
+            for campo, valor in contagem.items():
+                total["apostas"][mercado][campo] += valor
+    return total
+
+
+def _roi(apostas: int, retorno: float) -> Optional[float]:
+    return round((retorno - apostas) / apostas, 4) if apostas else None
+
+
+def resumir(total: Dict[str, Any]) -> Dict[str, Any]:
+    """Médias e taxas finais a partir das somas"""
+    n = total["partidas"]
+    apostas = sum(m["apostas"] for m in total["apostas"].values())
+    retorno = sum(m["retorno"] for m in total["apostas"].values())
+
+    return {
+        "versao_modelo": server.VERSAO_MODELO,
+        "partidas": n,
+        "brier": round(total["brier"] / n, 4),
+        "log_loss": round(total["log_loss"] / n, 4),
+        "taxa_acerto": round(total["acertos"] / n, 4),
+        "acerto_por_confianca": {
+            faixa: {**contagem, "taxa_acerto": round(contagem["acertos"] / contagem["partidas"], 4)}
+            for faixa, contagem in sorted(total["por_confianca"].items())
+        },
+        "roi_ev_positivo": {
+            "apostas": apostas,
+            "retorno": round(retorno, 2),
+            "roi": _roi(apostas, retorno),
+            "por_mercado": {
+                mercado: {**contagem, "retorno": round(contagem["retorno"], 2),
+                          "roi": _roi(contagem["apostas"], contagem["retorno"])}
+                for mercado, contagem in total["apostas"].items()
+            },
+        },
+    }
+
+
+def executar_backtest(partida_docs: List[Dict[str, Any]], processos: int) -> Dict[str, Any]:
+    """Divide o histórico em fatias, avalia em paralelo e combina"""
+    fatias_por_processo = 4  # fatias menores equilibram a carga entre os processos
+    quantidade = max(1, processos * fatias_por_processo)
+    tamanho = max(1, -(-len(partida_docs) // quantidade))
+    fatias = [partida_docs[i:i + tamanho] for i in range(0, len(partida_docs), tamanho)]
+
+    if processos <= 1:
+        parciais = [avaliar_fatia(fatia) for fatia in fatias]
+    else:
+        # spawn: com fork o filho herdaria o cliente Motor (e suas threads) já criado em server
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+            parciais = list(executor.map(avaliar_fatia, fatias))
+
+    return resumir(combinar(parciais))
+
+
+async def carregar_do_banco(campeonato: Optional[str]) -> List[Dict[str, Any]]:
+    filtro: Dict[str, Any] = {"resultado_final": {"$in": list(server.RESULTADOS_FINAIS)}}
+    if campeonato:
+        filtro["campeonato"] = campeonato
+    return await server.db.partidas.find(filtro, {"_id": 0}).to_list(None)
+
+
+def carregar_ndjson(caminho: str, campeonato: Optional[str]) -> List[Dict[str, Any]]:
+    """Partidas com resultado de um arquivo NDJSON (ex.: GET /api/partidas/stream)"""
+    partida_docs = []
+    with open(caminho, encoding="utf-8") as arquivo:
+        for linha in arquivo:
+            if not linha.strip():
+                continue
+            partida_doc = json.loads(linha)
+            if partida_doc.get("resultado_final") not in INDICE_RESULTADO:
+                continue
+            if campeonato and partida_doc.get("campeonato") != campeonato:
+                continue
+            partida_docs.append(partida_doc)
+    return partida_docs
+
+
+def imprimir(resumo: Dict[str, Any], duracao: float) -> None:
+    print(f"📊 Backtest do modelo {resumo['versao_modelo']}: {resumo['partidas']} partidas em {duracao:.2f}s")
+    print(f"   Brier score:  {resumo['brier']:.4f}")
+    print(f"   Log-loss:     {resumo['log_loss']:.4f}")
+    print(f"   Taxa acerto:  {resumo['taxa_acerto']:.1%}")
+
+    print("\n   Acerto por confiança:")
+    for faixa, contagem in resumo["acerto_por_confianca"].items():
+        print(f"     {faixa:<25} {contagem['taxa_acerto']:>6.1%}  ({contagem['acertos']}/{contagem['partidas']})")
+
+    roi = resumo["roi_ev_positivo"]
+    print("\n   ROI (1 unidade por aposta com EV > 0):")
+    for mercado, contagem in roi["por_mercado"].items():
+        taxa = f"{contagem['roi']:+.1%}" if contagem["roi"] is not None else "-"
+        print(f"     {mercado:<8} {taxa:>8}  ({contagem['apostas']} apostas, {contagem['vencedoras']} vencedoras)")
+    taxa_total = f"{roi['roi']:+.1%}" if roi["roi"] is not None else "-"
+    print(f"     {'total':<8} {taxa_total:>8}  ({roi['apostas']} apostas)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backtest do modelo 1X2 (V2)")
+    parser.add_argument("--entrada", help="Arquivo NDJSON de partidas (padrão: lê do MongoDB)")
+    parser.add_argument("--campeonato")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--json", dest="saida_json", help="Grava o resumo neste arquivo JSON")
+    args = parser.parse_args()
+
+    if args.entrada:
+        partida_docs = carregar_ndjson(args.entrada, args.campeonato)
+    else:
+        partida_docs = asyncio.run(carregar_do_banco(args.campeonato))
+
+    if not partida_docs:
+        print("❌ Nenhuma partida com resultado_final encontrada")
+        return 1
+
+    inicio = time.perf_counter()
+    resumo = executar_backtest(partida_docs, args.processos)
+    imprimir(resumo, time.perf_counter() - inicio)
+
+    if args.saida_json:
+        with open(args.saida_json, "w", encoding="utf-8") as arquivo:
+            json.dump(resumo, arquivo, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Benchmarks do backend (sem MongoDB: usa partidas sintéticas).
+
+Serialização: compara o caminho padrão do FastAPI (validação pelo
+response_model + jsonable_encoder + json.dumps) com a resposta rápida
+(RESPOSTA_RAPIDA=1: listagens validadas e serializadas em bytes pelo
+pydantic-core; análise salva codificada direto em bytes).
+
+Suíte: mede as funções quentes do cálculo (scores, observações, justificativa,
+análise 1X2, análise completa legada, motor em lote e serialização) com 1, 1k
+e 100k partidas. Os resultados podem ser salvos como baseline e comparados
+depois: a comparação falha (código de saída 1) se alguma medição ficar mais
+lenta que o limite tolerado.
+
+Exemplos:
+    python benchmark.py serializacao --partidas 1000
+    python benchmark.py suite --salvar baseline.json
+    python benchmark.py suite --comparar baseline.json --limite 0.25
+    python benchmark.py suite --tamanhos 1,1000 --comparar baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+import numpy as np  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+import server  # noqa: E402
+
+
+TIMES = ["Flamengo", "Palmeiras", "Grêmio", "Internacional", "São Paulo", "Corinthians",
+         "Atlético-MG", "Fluminense", "Botafogo", "Bahia", "Fortaleza", "Cruzeiro"]
+ARBITROS = ["Anderson Daronco", "Raphael Claus", "Wilton Pereira Sampaio", "Bruno Arleu"]
+LESOES = [None, "Nenhuma", "1 reserva", "2 titulares", "Lesão grave do zagueiro", "3 desfalques"]
+NOTICIAS = [None, "Time confiante e motivado", "Pressão após derrotas", "Briga pelo título",
+            "Risco de rebaixamento", "Jogo decisivo pela classificação"]
+CONDICOES = ["Tempo bom", "Chuva forte", "Gramado pesado", "Boas condições", "Calor"]
+
+
+def gerar_partidas_sinteticas(quantidade: int, semente: int = 42) -> List[Dict[str, Any]]:
+    """Documentos de partida realistas e reprodutíveis (mesma semente = mesmos dados)"""
+    rng = random.Random(semente)
+    criado_base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def forma() -> str:
+        return "-".join(rng.choice("VVEDD") for _ in range(5))
+
+    partidas = []
+    for i in range(quantidade):
+        casa, visitante = rng.sample(TIMES, 2)
+        vitorias, empates, derrotas = rng.randint(0, 4), rng.randint(0, 3), rng.randint(0, 4)
+        partida = server.Partida(
+            id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            criado_em=criado_base + timedelta(minutes=i),
+            campeonato=rng.choice(["Brasileirão Série A", "Copa do Brasil", "Libertadores"]),
+            rodada=rng.randint(1, 38),
+            data_hora=f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(16, 21)}:00:00",
+            local_estadio=f"Estádio {casa}",
+            time_casa=casa,
+            forma_casa=forma(),
+            media_gols_marcados_casa=round(rng.uniform(0.5, 3.0), 2),
+            media_gols_sofridos_casa=round(rng.uniform(0.4, 2.5), 2),
+            lesoes_suspensoes_casa=rng.choice(LESOES),
+            artilheiro_disponivel_casa=rng.random() > 0.2,
+            time_visitante=visitante,
+            forma_fora=forma(),
+            media_gols_marcados_fora=round(rng.uniform(0.3, 2.5), 2),
+            media_gols_sofridos_fora=round(rng.uniform(0.5, 3.0), 2),
+            lesoes_suspensoes_fora=rng.choice(LESOES),
+            artilheiro_disponivel_fora=rng.random() > 0.2,
+            historico_h2h=f"{vitorias}V {empates}E {derrotas}D",
+            arbitro=rng.choice(ARBITROS),
+            media_cartoes_arbitro=round(rng.uniform(2.0, 7.0), 1),
+            condicoes_externas=rng.choice(CONDICOES),
+            noticia_1=rng.choice(NOTICIAS),
+            noticia_1_impacto=rng.randint(-5, 5),
+            noticia_2=rng.choice(NOTICIAS),
+            noticia_2_impacto=rng.randint(-5, 5),
+            observacoes_contextuais=[{"texto": "Clássico regional", "impacto": 2}] if i % 7 == 0 else None,
+            odd_casa=round(rng.uniform(1.3, 5.0), 2),
+            odd_empate=round(rng.uniform(2.8, 4.5), 2),
+            odd_fora=round(rng.uniform(1.5, 8.0), 2),
+        )
+        doc = partida.model_dump()
+        partidas.append(doc)
+
+    return partidas
+
+
+def medir_cpu(funcao: Callable[[], Any], repeticoes: int) -> float:
+    """Tempo de CPU médio (ms) por chamada"""
+    funcao()  # aquecimento
+    inicio = time.process_time()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.process_time() - inicio) / repeticoes * 1000
+
+
+def medir_adaptativo(funcao: Callable[[], Any], tempo_minimo: float, rodadas: int = 3) -> Tuple[float, int]:
+    """
+    Tempo de CPU (ms) por chamada: melhor de `rodadas` rodadas de ~tempo_minimo
+    segundos cada (o mínimo é o menos afetado por ruído da máquina).
+    Chamadas longas (ex.: 100k partidas) são medidas uma vez só, sem aquecimento.
+    """
+    inicio = time.process_time()
+    funcao()
+    primeira = time.process_time() - inicio
+    if primeira >= tempo_minimo:
+        return primeira * 1000, 1
+
+    repeticoes = max(1, int(tempo_minimo / max(primeira, 1e-6)))
+    melhor = float("inf")
+    for _ in range(rodadas):
+        inicio = time.process_time()
+        for _ in range(repeticoes):
+            funcao()
+        melhor = min(melhor, (time.process_time() - inicio) / repeticoes)
+    return melhor * 1000, repeticoes
+
+
+def _rota(caminho: str) -> APIRoute:
+    for rota in server.app.routes:
+        if isinstance(rota, APIRoute) and rota.path == caminho and "GET" in rota.methods:
+            return rota
+    raise LookupError(caminho)
+
+
+def _caminho_padrao(rota: APIRoute, conteudo: Any) -> Callable[[], bytes]:
+    """O que o FastAPI faz com o retorno de uma rota com response_model"""
+    def executar() -> bytes:
+        serializado = asyncio.run(serialize_response(field=rota.response_field, response_content=conteudo))
+        return JSONResponse(serializado).body
+    return executar
+
+
+def benchmark_serializacao(quantidade: int, repeticoes: int) -> None:
+    docs = gerar_partidas_sinteticas(quantidade)
+    analises = [analise for _, analise in server.calcular_analises(docs[:1])]
+    analise_doc = server.montar_documento_analise(docs[0], analises[0])["analise"]
+
+    casos = [
+        (f"GET /partidas ({quantidade} partidas)", _rota("/api/partidas"), docs,
+         lambda: server.resposta_documentos(server.ADAPTADOR_PARTIDAS, docs).body),
+        ("GET /partidas/{id}/analise-v2", _rota("/api/partidas/{partida_id}/analise-v2"), analise_doc,
+         lambda: server.codificar_json(analise_doc)),
+    ]
+
+    print(f"{'Resposta':<40} {'Padrão (ms)':>12} {'Rápida (ms)':>12} {'Economia':>10}")
+    for nome, rota, conteudo, caminho_rapido in casos:
+        padrao = medir_cpu(_caminho_padrao(rota, conteudo), repeticoes)
+        rapida = medir_cpu(caminho_rapido, repeticoes)
+        economia = (1 - rapida / padrao) * 100 if padrao else 0.0
+        print(f"{nome:<40} {padrao:>12.3f} {rapida:>12.3f} {economia:>9.1f}%")
+
+    print(f"\nEncoder: {'orjson' if server.orjson is not None else 'json (stdlib)'}")
+
+
+def casos_suite(docs: List[Dict[str, Any]]) -> List[Tuple[str, Callable[[], Any]]]:
+    """Funções medidas pela suíte, cada uma aplicada a todas as partidas de docs"""
+    partidas = [server.Partida(**doc) for doc in docs]
+    scores = [server.calcular_scores_independentes(partida) for partida in partidas]
+    pares = list(zip(partidas, scores))
+    rota_partidas = _rota("/api/partidas")
+
+    return [
+        ("calcular_scores_independentes", lambda: [server.calcular_scores_independentes(p) for p in partidas]),
+        ("gerar_observacoes_contextuais", lambda: [server.gerar_observacoes_contextuais(p, s) for p, s in pares]),
+        ("gerar_justificativa_1x2", lambda: [server.gerar_justificativa_1x2(p, s) for p, s in pares]),
+        ("analisar_1x2_v2", lambda: [server.analisar_1x2_v2(p) for p in partidas]),
+        ("analisar_partida_completa", lambda: [server.analisar_partida_completa(p) for p in partidas]),
+        ("analisar_1x2_lote", lambda: server.analisar_1x2_lote(partidas)),
+        ("serializacao_padrao", _caminho_padrao(rota_partidas, docs)),
+        ("serializacao_rapida", lambda: server.resposta_documentos(server.ADAPTADOR_PARTIDAS, docs).body),
+    ]
+
+
+def executar_suite(tamanhos: List[int], tempo_minimo: float, semente: int) -> Dict[str, Any]:
+    resultados: Dict[str, Dict[str, float]] = {}
+    todos_docs = gerar_partidas_sinteticas(max(tamanhos), semente)
+
+    print(f"{'Função':<32} {'Partidas':>9} {'Total (ms)':>12} {'Por partida (µs)':>17} {'Rep.':>6}")
+    for tamanho in tamanhos:
+        for nome, funcao in casos_suite(todos_docs[:tamanho]):
+            ms, repeticoes = medir_adaptativo(funcao, tempo_minimo)
+            resultados[f"{nome}@{tamanho}"] = {"ms": round(ms, 4), "repeticoes": repeticoes}
+            print(f"{nome:<32} {tamanho:>9} {ms:>12.3f} {ms * 1000 / tamanho:>17.2f} {repeticoes:>6}")
+
+    return {
+        "gerado_em": datetime.now(timezone.utc).isoformat(),
+        "versao_modelo": server.VERSAO_MODELO,
+        "ambiente": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "encoder": "orjson" if server.orjson is not None else "json",
+            "maquina": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "semente": semente,
+        "resultados": resultados,
+    }
+
+
+def comparar_baseline(atual: Dict[str, Any], baseline: Dict[str, Any], limite: float) -> List[str]:
+    """Medições mais lentas que baseline * (1 + limite)"""
+    regressoes = []
+    print(f"\n{'Medição':<42} {'Baseline (ms)':>14} {'Atual (ms)':>12} {'Variação':>10}")
+    for chave, medicao in atual["resultados"].items():
+        anterior = baseline["resultados"].get(chave)
+        if anterior is None:
+            print(f"{chave:<42} {'-':>14} {medicao['ms']:>12.3f} {'nova':>10}")
+            continue
+        variacao = medicao["ms"] / anterior["ms"] - 1 if anterior["ms"] else 0.0
+        marcador = ""
+        if variacao > limite:
+            regressoes.append(chave)
+            marcador = "  ❌"
+        print(f"{chave:<42} {anterior['ms']:>14.3f} {medicao['ms']:>12.3f} {variacao:>+9.1%}{marcador}")
+    return regressoes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do backend")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    serializacao = sub.add_parser("serializacao", help="Caminho padrão x resposta rápida")
+    serializacao.add_argument("--partidas", type=int, default=1000)
+    serializacao.add_argument("--repeticoes", type=int, default=20)
+
+    suite = sub.add_parser("suite", help="Funções quentes com 1, 1k e 100k partidas")
+    suite.add_argument("--tamanhos", default="1,1000,100000", help="Quantidades de partidas, separadas por vírgula")
+    suite.add_argument("--tempo-minimo", type=float, default=0.5, help="Segundos de CPU mínimos por medição")
+    suite.add_argument("--semente", type=int, default=42)
+    suite.add_argument("--salvar", help="Grava os resultados neste arquivo (baseline)")
+    suite.add_argument("--comparar", help="Baseline para comparação")
+    suite.add_argument("--limite", type=float, default=0.25,
+                       help="Piora tolerada em relação à baseline (0.25 = 25%%)")
+
+    args = parser.parse_args()
+    if args.comando == "serializacao":
+        benchmark_serializacao(args.partidas, args.repeticoes)
+    elif args.comando == "suite":
+        return comando_suite(args)
+    return 0
+
+
+def comando_suite(args: argparse.Namespace) -> int:
+    baseline: Optional[Dict[str, Any]] = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            baseline = json.load(arquivo)
+
+    tamanhos = sorted({int(tamanho) for tamanho in args.tamanhos.split(",") if tamanho.strip()})
+    if not tamanhos or tamanhos[0] < 1:
+        print("❌ --tamanhos deve conter quantidades positivas")
+        return 1
+
+    atual = executar_suite(tamanhos, args.tempo_minimo, args.semente)
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump(atual, arquivo, ensure_ascii=False, indent=2)
+        print(f"\n💾 Baseline gravada em {args.salvar}")
+
+    if baseline is None:
+        return 0
+
+    regressoes = comparar_baseline(atual, baseline, args.limite)
+    if baseline.get("ambiente") != atual["ambiente"]:
+        print("\n⚠️  Ambiente diferente do da baseline: as comparações podem não ser confiáveis")
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} medição(ões) acima do limite de {args.limite:.0%}: {', '.join(regressoes)}")
+        return 1
+    print(f"\n✅ Nenhuma regressão acima de {args.limite:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
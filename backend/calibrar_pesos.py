@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Calibra os pesos dos 7 fatores do modelo 1X2 (V2) minimizando o log-loss
+sobre partidas com resultado_final.
+
+As notas dos fatores são calculadas uma única vez (motor vetorizado) em duas
+matrizes N x 7: a do resultado ocorrido e a soma Casa + Empate + Fora. Como a
+probabilidade é score / soma dos scores e os scores são lineares nos pesos,
+K vetores de pesos candidatos são avaliados com dois produtos de matrizes
+(N x 7) @ (7 x K). Os candidatos são sorteados no simplex (Dirichlet), cada
+rodada concentrada em torno do melhor até então, e avaliados em paralelo.
+
+O resultado é um arquivo JSON versionado; para usá-lo no servidor:
+    ARQUIVO_PESOS=pesos_cal-20241022.json uvicorn server:app
+
+Exemplos:
+    python calibrar_pesos.py
+    python calibrar_pesos.py --entrada historico.ndjson --rodadas 12 --candidatos 20000
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import server
+from backtest import INDICE_RESULTADO, carregar_do_banco, carregar_ndjson
+
+
+EPSILON = 1e-15
+MAX_ELEMENTOS_BLOCO = 20_000_000
+
+# Matrizes de fatores compartilhadas com os processos filhos (via initializer)
+_fatores_ocorrido: Optional[np.ndarray] = None
+_fatores_total: Optional[np.ndarray] = None
+
+
+def montar_matrizes_fatores(partida_docs: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Notas (0-10) dos fatores, colunas na ordem de FATORES_V2:
+    - ocorrido: notas do resultado que aconteceu (N x 7)
+    - total: notas de Casa + Empate + Fora somadas (N x 7)
+    Mesma composição dos scores de calcular_probabilidades_lote.
+    """
+    partidas = [server.Partida(**partida_doc) for partida_doc in partida_docs]
+    notas = server.calcular_notas_lote(server.extrair_colunas_lote(partidas))
+    casa, fora = notas["casa"], notas["fora"]
+
+    empate = {
+        "forma_recente": 10 - np.abs(casa["forma_recente"] - fora["forma_recente"]),
+        "forca_elenco": (casa["forca_elenco"] + fora["forca_elenco"]) / 2,
+        "desempenho_casa_fora": 10 - np.abs(casa["desempenho_casa_fora"] - fora["desempenho_casa_fora"]),
+        "historico_h2h": np.full(len(partidas), 5.0),
+        "motivacao_contexto": casa["motivacao_contexto"],
+        "notas_analista": casa["notas_analista"],
+        "contexto_externo": casa["contexto_externo"],
+    }
+
+    # (N, 3, 7): Casa, Empate, Fora
+    fatores = np.stack([
+        np.column_stack([lado[fator] for fator in server.FATORES_V2])
+        for lado in (casa, empate, fora)
+    ], axis=1)
+
+    reais = np.array([INDICE_RESULTADO[partida.resultado_final] for partida in partidas])
+    return fatores[np.arange(len(partidas)), reais], fatores.sum(axis=1)
+
+
+def log_loss_pesos(ocorrido: np.ndarray, total: np.ndarray, pesos: np.ndarray) -> np.ndarray:
+    """Log-loss médio de cada vetor de pesos (K x 7) -> (K,)"""
+    probabilidades = (ocorrido @ pesos.T) / np.maximum(total @ pesos.T, EPSILON)
+    return -np.log(np.clip(probabilidades, EPSILON, 1.0)).mean(axis=0)
+
+
+def _iniciar_processo(ocorrido: np.ndarray, total: np.ndarray) -> None:
+    global _fatores_ocorrido, _fatores_total
+    _fatores_ocorrido, _fatores_total = ocorrido, total
+
+
+def _avaliar_candidatos(pesos: np.ndarray) -> np.ndarray:
+    return log_loss_pesos(_fatores_ocorrido, _fatores_total, pesos)
+
+
+def sortear_candidatos(
+    rng: np.random.Generator,
+    centro: Optional[np.ndarray],
+    concentracao: float,
+    quantidade: int,
+    peso_minimo: float
+) -> np.ndarray:
+    """Pontos do simplex com todos os pesos >= peso_minimo (uniformes ou em torno do centro)"""
+    dimensao = len(server.FATORES_V2)
+    livre = 1 - peso_minimo * dimensao
+    if centro is None:
+        alfa = np.ones(dimensao)
+    else:
+        alfa = np.maximum((centro - peso_minimo) / livre, 1e-3) * concentracao
+    return peso_minimo + livre * rng.dirichlet(alfa, size=quantidade)
+
+
+def calibrar(
+    ocorrido: np.ndarray,
+    total: np.ndarray,
+    rodadas: int,
+    candidatos: int,
+    peso_minimo: float,
+    processos: int,
+    semente: int
+) -> Tuple[np.ndarray, float]:
+    """Busca aleatória no simplex, concentrando a cada rodada em torno do melhor vetor"""
+    rng = np.random.default_rng(semente)
+    pesos_padrao = np.array([server.PESOS_FATORES_V2[fator] / 100 for fator in server.FATORES_V2])
+
+    melhor = pesos_padrao
+    melhor_perda = float(log_loss_pesos(ocorrido, total, pesos_padrao[None, :])[0])
+    # Cada bloco gera duas matrizes N x bloco: limita a ~MAX_ELEMENTOS_BLOCO valores
+    tamanho_bloco = max(1, min(-(-candidatos // max(1, processos * 4)), MAX_ELEMENTOS_BLOCO // len(ocorrido)))
+
+    executor = None
+    if processos > 1:
+        # spawn, como no backtest: com fork o filho herdaria o cliente Motor de server
+        executor = ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo,
+                                       initargs=(ocorrido, total), mp_context=multiprocessing.get_context("spawn"))
+    else:
+        _iniciar_processo(ocorrido, total)
+
+    try:
+        for rodada in range(rodadas):
+            # Primeira rodada explora o simplex todo; as seguintes refinam
+            centro = None if rodada == 0 else melhor
+            concentracao = 20.0 * (2 ** rodada)
+            pesos = sortear_candidatos(rng, centro, concentracao, candidatos, peso_minimo)
+
+            blocos = [pesos[i:i + tamanho_bloco] for i in range(0, len(pesos), tamanho_bloco)]
+            mapa = executor.map(_avaliar_candidatos, blocos) if executor else map(_avaliar_candidatos, blocos)
+            perdas = np.concatenate(list(mapa))
+
+            indice = int(np.argmin(perdas))
+            if perdas[indice] < melhor_perda:
+                melhor, melhor_perda = pesos[indice], float(perdas[indice])
+            print(f"   rodada {rodada + 1}/{rodadas}: log-loss {melhor_perda:.5f}")
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return melhor, melhor_perda
+
+
+def arredondar_pesos(pesos: np.ndarray, casas: int = 6) -> Dict[str, float]:
+    """Pesos arredondados que ainda somam 1 (a sobra vai para o maior)"""
+    arredondados = np.round(pesos / pesos.sum(), casas)
+    arredondados[np.argmax(arredondados)] += round(1 - arredondados.sum(), casas)
+    return {fator: round(float(peso), casas) for fator, peso in zip(server.FATORES_V2, arredondados)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Calibra os pesos do modelo 1X2 (V2) por log-loss")
+    parser.add_argument("--entrada", help="Arquivo NDJSON de partidas (padrão: lê do MongoDB)")
+    parser.add_argument("--campeonato")
+    parser.add_argument("--rodadas", type=int, default=8)
+    parser.add_argument("--candidatos", type=int, default=10000, help="Vetores de pesos por rodada")
+    parser.add_argument("--peso-minimo", type=float, default=0.02, help="Peso mínimo de cada fator")
+    parser.add_argument("--validacao", type=float, default=0.2, help="Fração reservada para validação")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--versao", help="Versão gravada no arquivo (padrão: cal-<data e hora UTC>)")
+    parser.add_argument("--saida", help="Arquivo de destino (padrão: pesos_<versao>.json)")
+    args = parser.parse_args()
+
+    if not 0 <= args.peso_minimo * len(server.FATORES_V2) < 1:
+        print("❌ --peso-minimo deve ser >= 0 e menor que 1/7")
+        return 1
+
+    if args.entrada:
+        partida_docs = carregar_ndjson(args.entrada, args.campeonato)
+    else:
+        partida_docs = asyncio.run(carregar_do_banco(args.campeonato))
+    if len(partida_docs) < 10:
+        print("❌ São necessárias ao menos 10 partidas com resultado_final")
+        return 1
+
+    inicio = time.perf_counter()
+    ocorrido, total = montar_matrizes_fatores(partida_docs)
+
+    # Separação treino/validação reprodutível
+    ordem = np.random.default_rng(args.semente).permutation(len(partida_docs))
+    n_validacao = int(len(ordem) * args.validacao)
+    validacao, treino = ordem[:n_validacao], ordem[n_validacao:]
+
+    print(f"🔎 Calibrando com {len(treino)} partidas (validação: {len(validacao)})")
+    pesos, perda_treino = calibrar(
+        ocorrido[treino], total[treino],
+        args.rodadas, args.candidatos, args.peso_minimo, args.processos, args.semente
+    )
+
+    pesos_padrao = np.array([server.PESOS_FATORES_V2[fator] / 100 for fator in server.FATORES_V2])
+    comparados = np.stack([pesos_padrao, pesos])
+    padrao_treino = float(log_loss_pesos(ocorrido[treino], total[treino], pesos_padrao[None, :])[0])
+    padrao_validacao, calibrado_validacao = (
+        log_loss_pesos(ocorrido[validacao], total[validacao], comparados).tolist()
+        if n_validacao else (None, None)
+    )
+
+    versao = args.versao or f"cal-{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+    saida = args.saida or f"pesos_{versao}.json"
+    documento = {
+        "versao": versao,
+        "gerado_em": datetime.now(timezone.utc).isoformat(),
+        "versao_modelo_base": server.VERSAO_MODELO,
+        "pesos": arredondar_pesos(pesos),
+        "metricas": {
+            "partidas_treino": len(treino),
+            "partidas_validacao": n_validacao,
+            "log_loss_treino": round(perda_treino, 6),
+            "log_loss_treino_pesos_atuais": round(padrao_treino, 6),
+            "log_loss_validacao": round(calibrado_validacao, 6) if n_validacao else None,
+            "log_loss_validacao_pesos_atuais": round(padrao_validacao, 6) if n_validacao else None,
+        },
+        "busca": {
+            "rodadas": args.rodadas,
+            "candidatos_por_rodada": args.candidatos,
+            "peso_minimo": args.peso_minimo,
+            "semente": args.semente,
+        },
+    }
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(documento, arquivo, ensure_ascii=False, indent=2)
+
+    print(f"\n✅ {saida} ({time.perf_counter() - inicio:.2f}s)")
+    for fator, peso in documento["pesos"].items():
+        print(f"   {fator:<22} {server.PESOS_FATORES_V2[fator] / 100:.3f} -> {peso:.3f}")
+    metricas = documento["metricas"]
+    print(f"   log-loss treino:    {metricas['log_loss_treino_pesos_atuais']:.5f} -> {metricas['log_loss_treino']:.5f}")
+    if n_validacao:
+        print(f"   log-loss validação: {metricas['log_loss_validacao_pesos_atuais']:.5f} -> {metricas['log_loss_validacao']:.5f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Exportação de partidas + análise 1X2 em formato tabular (CSV ou Parquet).
+
+O cursor é lido em blocos e cada bloco passa uma única vez pelo motor
+vetorizado; cada bloco vira um trecho do CSV ou um row group do Parquet,
+então a memória não cresce com o total. Usado por GET /api/exportar e pelo
+script exportar.py.
+"""
+
+import csv
+import io
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List
+
+import server
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Exportação em Parquet é opcional
+    pa = pq = None
+
+
+TAMANHO_BLOCO_EXPORTACAO = int(os.environ.get('EXPORTACAO_TAMANHO_BLOCO', '5000'))
+
+COLUNAS_PARTIDA_EXPORTACAO = [
+    ("id", "str"),
+    ("campeonato", "str"),
+    ("rodada", "int"),
+    ("data_hora", "str"),
+    ("local_estadio", "str"),
+    ("time_casa", "str"),
+    ("time_visitante", "str"),
+    ("arbitro", "str"),
+    ("odd_casa", "float"),
+    ("odd_empate", "float"),
+    ("odd_fora", "float"),
+    ("criado_em", "str"),
+]
+
+COLUNAS_EXPORTACAO = COLUNAS_PARTIDA_EXPORTACAO + [
+    ("probabilidade_casa", "float"),
+    ("probabilidade_empate", "float"),
+    ("probabilidade_fora", "float"),
+    ("resultado_previsto", "str"),
+    ("confianca", "str"),
+    ("diferenca_probabilidade", "float"),
+    ("ev_casa", "float"),
+    ("ev_empate", "float"),
+    ("ev_fora", "float"),
+] + [
+    (f"{lado}_{fator}_{medida}", "float")
+    for lado in ("casa", "fora")
+    for fator in server.FATORES_V2
+    for medida in ("nota", "ponderado")
+]
+
+FORMATOS_EXPORTACAO = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def _valor_exportacao(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return valor
+
+
+def montar_bloco_exportacao(partida_docs: List[Dict[str, Any]]) -> Dict[str, list]:
+    """Colunas de exportação de um bloco de partidas (uma chamada ao motor em lote)"""
+    partidas = [server.Partida(**partida_doc) for partida_doc in partida_docs]
+    resultado = server.analisar_1x2_lote(partidas)
+
+    colunas: Dict[str, list] = {}
+    for nome, _ in COLUNAS_PARTIDA_EXPORTACAO:
+        colunas[nome] = [_valor_exportacao(partida_doc.get(nome)) for partida_doc in partida_docs]
+
+    for nome in [
+        "probabilidade_casa", "probabilidade_empate", "probabilidade_fora",
+        "resultado_previsto", "confianca", "diferenca_probabilidade",
+        "ev_casa", "ev_empate", "ev_fora",
+    ]:
+        colunas[nome] = resultado[nome].tolist()
+
+    for lado in ("casa", "fora"):
+        notas_lado = resultado[f"notas_{lado}"]
+        for fator in server.FATORES_V2:
+            nota = server.arredondar_lote(notas_lado[fator], 2)
+            ponderado = server.arredondar_lote((nota * server.PESOS_FATORES_V2[fator]) / 10, 2)
+            colunas[f"{lado}_{fator}_nota"] = nota.tolist()
+            colunas[f"{lado}_{fator}_ponderado"] = ponderado.tolist()
+
+    return colunas
+
+
+class _BufferDrenavel(io.RawIOBase):
+    """Destino de escrita cujo conteúdo é retirado (drenado) a cada bloco"""
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+        self._posicao = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def drenar(self) -> bytes:
+        dados = b"".join(self._partes)
+        self._partes = []
+        return dados
+
+
+def _esquema_parquet():
+    tipos = {"str": pa.string(), "int": pa.int64(), "float": pa.float64()}
+    return pa.schema([(nome, tipos[tipo]) for nome, tipo in COLUNAS_EXPORTACAO])
+
+
+async def gerar_exportacao(filtro: Dict[str, Any], formato: str, tamanho_bloco: int) -> AsyncIterator[bytes]:
+    """Gera o arquivo de exportação (CSV ou Parquet) em pedaços, de tamanho_bloco em tamanho_bloco partidas"""
+    nomes = [nome for nome, _ in COLUNAS_EXPORTACAO]
+    saida = _BufferDrenavel()
+
+    if formato == "parquet":
+        esquema = _esquema_parquet()
+        escritor = pq.ParquetWriter(saida, esquema, compression="snappy")
+    else:
+        texto = io.StringIO()
+        escritor_csv = csv.writer(texto)
+        escritor_csv.writerow(nomes)
+
+    async def escrever(bloco: List[Dict[str, Any]]) -> bytes:
+        # Motor em lote fora do loop; a escrita do CSV/Parquet fica aqui (mesmo escritor entre blocos)
+        colunas = await server.executor_calculos.executar(
+            montar_bloco_exportacao, bloco, tamanho=len(bloco), rejeitar_se_cheia=False
+        )
+        if formato == "parquet":
+            escritor.write_table(pa.Table.from_pydict(colunas, schema=esquema))
+            return saida.drenar()
+
+        escritor_csv.writerows(zip(*(colunas[nome] for nome in nomes)))
+        dados = texto.getvalue().encode("utf-8")
+        texto.seek(0)
+        texto.truncate()
+        return dados
+
+    cursor = server.db.partidas.find(filtro, {"_id": 0}) \
+        .sort(server.ORDEM_LISTAGEM) \
+        .batch_size(tamanho_bloco)
+
+    if formato == "csv":
+        # Cabeçalho sai imediatamente, antes do primeiro bloco
+        yield texto.getvalue().encode("utf-8")
+        texto.seek(0)
+        texto.truncate()
+
+    bloco: List[Dict[str, Any]] = []
+
+    async for partida_doc in cursor:
+        bloco.append(partida_doc)
+        if len(bloco) >= tamanho_bloco:
+            yield await escrever(bloco)
+            bloco = []
+
+    if bloco:
+        yield await escrever(bloco)
+
+    if formato == "parquet":
+        escritor.close()
+        yield saida.drenar()
+
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Exporta as partidas com a análise 1X2 para CSV ou Parquet.
+
+Usa a mesma geração em blocos do endpoint GET /api/exportar, lendo direto do
+MongoDB configurado em backend/.env (MONGO_URL / DB_NAME).
+
+Exemplos:
+    python exportar.py --formato parquet --saida partidas.parquet
+    python exportar.py --formato csv --saida serie_a.csv --campeonato "Série A"
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import exportacao
+import server
+
+
+async def exportar(args: argparse.Namespace) -> int:
+    filtro = server.montar_filtro_partidas(args.campeonato, args.rodada, args.time)
+
+    inicio = time.perf_counter()
+    total_bytes = 0
+    with open(args.saida, "wb") as arquivo:
+        async for pedaco in exportacao.gerar_exportacao(filtro, args.formato, args.tamanho_bloco):
+            arquivo.write(pedaco)
+            total_bytes += len(pedaco)
+
+    duracao = time.perf_counter() - inicio
+    print(f"✅ {args.saida}: {total_bytes / 1024:.1f} KB em {duracao:.2f}s")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Exporta partidas + análise 1X2 (CSV/Parquet)")
+    parser.add_argument("--formato", choices=sorted(exportacao.FORMATOS_EXPORTACAO), default="csv")
+    parser.add_argument("--saida", required=True, help="Arquivo de destino")
+    parser.add_argument("--campeonato")
+    parser.add_argument("--rodada", type=int)
+    parser.add_argument("--time", help="Time da casa ou visitante")
+    parser.add_argument("--tamanho-bloco", type=int, default=exportacao.TAMANHO_BLOCO_EXPORTACAO,
+                        help="Partidas por bloco (linhas por row group no Parquet)")
+    args = parser.parse_args()
+
+    if args.formato == "parquet" and exportacao.pq is None:
+        print("❌ Exportação Parquet requer o pacote pyarrow")
+        return 1
+
+    return asyncio.run(exportar(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
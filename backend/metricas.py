@@ -0,0 +1,211 @@
+"""
+Métricas no formato texto do Prometheus: latência por rota, operações no
+MongoDB por requisição, duração das etapas da análise e atraso do event loop.
+
+Desligadas por padrão (METRICAS_HABILITADAS=1 liga). Desligadas, não há
+middleware nem listener do MongoDB e medir_etapa não mede nada.
+"""
+
+import bisect
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from pymongo import monitoring
+
+METRICAS_HABILITADAS = os.environ.get('METRICAS_HABILITADAS', '0').lower() in ('1', 'true', 'sim')
+
+LIMITES_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_OPERACOES = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histograma:
+    """Histograma cumulativo no formato do Prometheus, uma série por combinação de rótulos"""
+
+    def __init__(self, nome: str, descricao: str, rotulos: Tuple[str, ...], limites: Tuple[float, ...]):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self.limites = limites
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # valores -> [contagens..., soma, total]
+        self._trava = threading.Lock()
+
+    def observar(self, valores: Tuple[str, ...], valor: float) -> None:
+        indice = bisect.bisect_left(self.limites, valor)
+        with self._trava:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [0] * (len(self.limites) + 2)
+            if indice < len(self.limites):
+                serie[indice] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exportar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} histogram"]
+        with self._trava:
+            series = sorted((valores, list(serie)) for valores, serie in self._series.items())
+        for valores, serie in series:
+            rotulos = ",".join(f'{rotulo}="{valor}"' for rotulo, valor in zip(self.rotulos, valores))
+            prefixo = f"{rotulos}," if rotulos else ""
+            acumulado = 0
+            for limite, contagem in zip(self.limites, serie):
+                acumulado += contagem
+                linhas.append(f'{self.nome}_bucket{{{prefixo}le="{limite}"}} {acumulado}')
+            linhas.append(f'{self.nome}_bucket{{{prefixo}le="+Inf"}} {serie[-1]}')
+            sufixo = f"{{{rotulos}}}" if rotulos else ""
+            linhas.append(f"{self.nome}_sum{sufixo} {serie[-2]}")
+            linhas.append(f"{self.nome}_count{sufixo} {serie[-1]}")
+        return linhas
+
+
+class Contador:
+    """Contador no formato do Prometheus, uma série por combinação de rótulos"""
+
+    def __init__(self, nome: str, descricao: str, rotulos: Tuple[str, ...]):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self._series: Dict[Tuple[str, ...], float] = {}
+        self._trava = threading.Lock()
+
+    def incrementar(self, valores: Tuple[str, ...], quantidade: float = 1) -> None:
+        with self._trava:
+            self._series[valores] = self._series.get(valores, 0) + quantidade
+
+    def exportar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} counter"]
+        with self._trava:
+            series = sorted(self._series.items())
+        for valores, total in series:
+            rotulos = ",".join(f'{rotulo}="{valor}"' for rotulo, valor in zip(self.rotulos, valores))
+            linhas.append(f"{self.nome}{{{rotulos}}} {total}")
+        return linhas
+
+
+metrica_duracao_http = Histograma(
+    "analisebet_http_duracao_segundos", "Latência das requisições HTTP por rota e status",
+    ("metodo", "rota", "status"), LIMITES_LATENCIA
+)
+metrica_operacoes_mongo_requisicao = Histograma(
+    "analisebet_http_operacoes_mongo", "Operações no MongoDB por requisição HTTP",
+    ("metodo", "rota"), LIMITES_OPERACOES
+)
+metrica_operacoes_mongo = Contador(
+    "analisebet_mongo_operacoes_total", "Comandos enviados ao MongoDB", ("comando",)
+)
+metrica_duracao_etapa = Histograma(
+    "analisebet_etapa_duracao_segundos", "Duração das etapas do caminho de análise",
+    ("etapa",), LIMITES_LATENCIA
+)
+metrica_atraso_event_loop = Histograma(
+    "analisebet_event_loop_atraso_segundos", "Atraso do event loop ao acordar de um sleep",
+    (), LIMITES_LATENCIA
+)
+METRICAS = (
+    metrica_duracao_http, metrica_operacoes_mongo_requisicao, metrica_operacoes_mongo,
+    metrica_duracao_etapa, metrica_atraso_event_loop
+)
+
+# Operações no MongoDB da requisição corrente (o Motor copia o contexto para as threads)
+_operacoes_mongo_requisicao: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "operacoes_mongo_requisicao", default=None
+)
+
+
+class _EtapaMedida:
+    __slots__ = ("etapa", "inicio")
+
+    def __init__(self, etapa: str):
+        self.etapa = etapa
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *exc):
+        metrica_duracao_etapa.observar((self.etapa,), time.perf_counter() - self.inicio)
+        return False
+
+
+_ETAPA_NAO_MEDIDA = contextlib.nullcontext()
+
+
+def medir_etapa(etapa: str):
+    """with medir_etapa("pontuacao"): ... (sem custo com as métricas desligadas)"""
+    return _EtapaMedida(etapa) if METRICAS_HABILITADAS else _ETAPA_NAO_MEDIDA
+
+
+class ContadorOperacoesMongo(monitoring.CommandListener):
+    """Conta os comandos enviados ao MongoDB, no total e por requisição"""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        metrica_operacoes_mongo.incrementar((event.command_name,))
+        operacoes = _operacoes_mongo_requisicao.get()
+        if operacoes is not None:
+            operacoes[0] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        pass
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: latência até o último byte da resposta e operações no MongoDB por requisição"""
+
+    def __init__(self, app):
+        self.app = app
+        self._rotas_por_endpoint: Optional[Dict[Any, str]] = None
+
+    def _rota(self, scope) -> str:
+        # Rótulo pelo molde da rota (/api/partidas/{partida_id}) para não explodir a cardinalidade
+        if self._rotas_por_endpoint is None:
+            self._rotas_por_endpoint = {
+                getattr(rota, "endpoint", None): rota.path for rota in scope["app"].routes if hasattr(rota, "path")
+            }
+        return self._rotas_por_endpoint.get(scope.get("endpoint"), "sem_rota")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+        operacoes = [0]
+        token = _operacoes_mongo_requisicao.set(operacoes)
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status[0] = mensagem["status"]
+            await send(mensagem)
+
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            _operacoes_mongo_requisicao.reset(token)
+            rota = self._rota(scope)
+            metrica_duracao_http.observar((scope["method"], rota, str(status[0])), duracao)
+            metrica_operacoes_mongo_requisicao.observar((scope["method"], rota), operacoes[0])
+
+
+def exportar_metricas() -> str:
+    return "\n".join(linha for metrica in METRICAS for linha in metrica.exportar()) + "\n"
+
+
+roteador = APIRouter()
+
+
+@roteador.get("/metrics", include_in_schema=False)
+async def metricas():
+    """Métricas no formato texto do Prometheus (METRICAS_HABILITADAS=1)"""
+    if not METRICAS_HABILITADAS:
+        raise HTTPException(status_code=404, detail="Métricas desabilitadas (METRICAS_HABILITADAS=1)")
+    return PlainTextResponse(exportar_metricas(), media_type="text/plain; version=0.0.4; charset=utf-8")
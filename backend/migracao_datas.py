@@ -0,0 +1,128 @@
+"""
+Migração de datas em texto para datas BSON.
+
+Partidas antigas guardam criado_em (ISO) e data_hora (texto livre) como
+string. A migração converte em datas BSON, em lotes ordenados por id, e
+grava um checkpoint em db.migracoes após cada lote: se for interrompida,
+a próxima execução continua do último id convertido. data_hora que não é
+ISO 8601 fica como está e é contada em "invalidas". Os derivados das
+partidas (análises salvas, autocomplete e db.times) são atualizados com o
+lote antes da gravação das partidas: se a migração parar entre as
+escritas, o lote continua em texto e é refeito (as atualizações são
+idempotentes para o mesmo par antes/depois).
+"""
+
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Tuple
+
+from pymongo import UpdateOne
+
+import server
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE_MIGRACAO = int(os.environ.get('MIGRACAO_TAMANHO_LOTE', '1000'))
+MIGRACAO_DATAS = "datas_nativas"
+
+jobs_migracao: Dict[str, Dict[str, Any]] = {}
+
+
+def converter_datas_documento(partida_doc: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+    """Campos convertidos para datas ($set) e quantidade de datas em texto não reconhecidas"""
+    alteracoes: Dict[str, Any] = {}
+    invalidas = 0
+    for campo, fuso in (("criado_em", timezone.utc), ("data_hora", server.FUSO_HORARIO_PADRAO)):
+        valor = partida_doc.get(campo)
+        if not isinstance(valor, str):
+            continue
+        try:
+            alteracoes[campo] = server.converter_data(valor, fuso)
+        except ValueError:
+            invalidas += 1
+    return alteracoes, invalidas
+
+
+async def executar_migracao_datas(job: Dict[str, Any], tamanho_lote: int = TAMANHO_LOTE_MIGRACAO) -> None:
+    """Converte criado_em/data_hora em texto para datas BSON, retomando do checkpoint"""
+    job["status"] = "executando"
+    try:
+        checkpoint = await server.db.migracoes.find_one({"_id": MIGRACAO_DATAS}) or {}
+        if checkpoint.get("status") == "concluida":
+            # Nova execução completa (ex.: entraram dados legados depois da última)
+            checkpoint = {}
+
+        ultimo_id = checkpoint.get("ultimo_id", "")
+        job["retomada_de"] = ultimo_id or None
+        job["convertidas"] = checkpoint.get("convertidas", 0)
+        job["invalidas"] = checkpoint.get("invalidas", 0)
+
+        filtro_texto = {"$or": [{"criado_em": {"$type": "string"}}, {"data_hora": {"$type": "string"}}]}
+        while True:
+            bloco = await server.db.partidas.find({"id": {"$gt": ultimo_id}, **filtro_texto}, {"_id": 0}) \
+                .sort("id", 1) \
+                .limit(tamanho_lote) \
+                .to_list(tamanho_lote)
+            if not bloco:
+                break
+
+            operacoes = []
+            convertidos = []
+            pares = []
+            for partida_doc in bloco:
+                alteracoes, invalidas = converter_datas_documento(partida_doc)
+                job["invalidas"] += invalidas
+                if alteracoes:
+                    operacoes.append(UpdateOne({"id": partida_doc["id"]}, {"$set": alteracoes}))
+                    convertido = {**partida_doc, **alteracoes}
+                    convertidos.append(convertido)
+                    pares.append((partida_doc, convertido))
+
+            if operacoes:
+                await server.salvar_analises(await server.calcular_analises_fora_do_loop(convertidos))
+                await server.propagar_gravacoes(pares)
+                await server.db.partidas.bulk_write(operacoes, ordered=False)
+                for partida_doc in convertidos:
+                    server.invalidar_analise(partida_doc["id"])
+
+            ultimo_id = bloco[-1]["id"]
+            job["convertidas"] += len(convertidos)
+            await server.db.migracoes.update_one(
+                {"_id": MIGRACAO_DATAS},
+                {"$set": {
+                    "status": "executando",
+                    "ultimo_id": ultimo_id,
+                    "convertidas": job["convertidas"],
+                    "invalidas": job["invalidas"],
+                    "atualizado_em": server.agora_utc(),
+                }},
+                upsert=True
+            )
+
+        await server.db.migracoes.update_one(
+            {"_id": MIGRACAO_DATAS},
+            {"$set": {"status": "concluida", "atualizado_em": server.agora_utc()}},
+            upsert=True
+        )
+        job["status"] = "concluido"
+    except Exception as e:
+        logger.exception("Falha na migração de datas")
+        job["status"] = "erro"
+        job["erro"] = str(e)
+    finally:
+        job["finalizado_em"] = datetime.now(timezone.utc).isoformat()
+
+
+def novo_job_migracao_datas() -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "status": "pendente",
+        "retomada_de": None,
+        "convertidas": 0,
+        "invalidas": 0,
+        "erro": None,
+        "iniciado_em": datetime.now(timezone.utc).isoformat(),
+        "finalizado_em": None,
+    }
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Converte criado_em/data_hora gravados como texto em datas BSON.
+
+Mesma migração do endpoint POST /api/migracoes/datas, lendo direto do MongoDB
+configurado em backend/.env (MONGO_URL / DB_NAME). Pode ser interrompida e
+executada de novo: continua a partir do checkpoint salvo em db.migracoes.
+
+Exemplo:
+    python migrar_datas.py --tamanho-lote 2000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import migracao_datas
+
+
+async def migrar(args: argparse.Namespace) -> int:
+    job = migracao_datas.novo_job_migracao_datas()
+
+    inicio = time.perf_counter()
+    await migracao_datas.executar_migracao_datas(job, args.tamanho_lote)
+    duracao = time.perf_counter() - inicio
+
+    if job["status"] != "concluido":
+        print(f"❌ Migração interrompida: {job['erro']}")
+        return 1
+
+    if job["retomada_de"]:
+        print(f"↻ Retomada a partir da partida {job['retomada_de']}")
+    print(f"✅ {job['convertidas']} partidas convertidas em {duracao:.2f}s")
+    if job["invalidas"]:
+        print(f"⚠️  {job['invalidas']} datas em texto não reconhecidas foram mantidas como estão")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migra criado_em/data_hora para datas BSON")
+    parser.add_argument("--tamanho-lote", type=int, default=migracao_datas.TAMANHO_LOTE_MIGRACAO,
+                        help="Partidas por lote (um checkpoint por lote)")
+    args = parser.parse_args()
+
+    return asyncio.run(migrar(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+"""
+Perfil sob demanda de uma requisição específica, pedido pelo cabeçalho X-Perfil (ou
+?perfil=) com o token de administrador em X-Perfil-Token. Só existe com
+PERFIL_HABILITADO=1 e PERFIL_TOKEN definidos; sem isso o middleware nem é
+instalado. Modos:
+- amostragem: uma thread amostra a pilha do event loop a cada
+  PERFIL_INTERVALO segundos e grava pilhas agregadas (.folded, formato do
+  flamegraph.pl / speedscope). Em trechos que não liberam o GIL a resolução
+  efetiva é o switch interval do Python (5 ms por padrão)
+- deterministico: cProfile durante a requisição, grava .prof (pstats,
+  abre no snakeviz / flameprof)
+O perfil cobre tudo o que roda no event loop enquanto a requisição está em
+andamento, inclusive outras requisições simultâneas.
+"""
+
+import cProfile
+import hmac
+import logging
+import os
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse, JSONResponse
+from starlette.datastructures import Headers, QueryParams
+
+logger = logging.getLogger(__name__)
+
+PERFIL_TOKEN = os.environ.get('PERFIL_TOKEN', '')
+PERFIL_HABILITADO = (
+    os.environ.get('PERFIL_HABILITADO', '0').lower() in ('1', 'true', 'sim') and bool(PERFIL_TOKEN)
+)
+PERFIL_DIRETORIO = Path(os.environ.get('PERFIL_DIRETORIO', str(Path(__file__).parent / 'perfis')))
+PERFIL_INTERVALO = float(os.environ.get('PERFIL_INTERVALO', '0.001'))
+MODOS_PERFIL = {"amostragem": ".folded", "deterministico": ".prof"}
+_perfil_deterministico = threading.Lock()
+
+
+def token_perfil_valido(token: Optional[str]) -> bool:
+    return PERFIL_HABILITADO and token is not None and hmac.compare_digest(token, PERFIL_TOKEN)
+
+
+class AmostradorPilha(threading.Thread):
+    """Amostra a pilha de uma thread e agrega as pilhas iguais (formato folded)"""
+
+    def __init__(self, thread_id: int, intervalo: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.intervalo = intervalo
+        self.pilhas: Dict[str, int] = {}
+        self._parar = threading.Event()
+
+    def run(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self.thread_id)
+            funcoes = []
+            while quadro is not None:
+                codigo = quadro.f_code
+                funcoes.append(f"{Path(codigo.co_filename).name}:{codigo.co_name}")
+                quadro = quadro.f_back
+            if funcoes:
+                pilha = ";".join(reversed(funcoes))
+                self.pilhas[pilha] = self.pilhas.get(pilha, 0) + 1
+
+    def parar(self) -> None:
+        self._parar.set()
+        self.join()
+
+    def gravar(self, caminho: Path) -> None:
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            for pilha, amostras in sorted(self.pilhas.items()):
+                arquivo.write(f"{pilha} {amostras}\n")
+
+
+class MiddlewarePerfil:
+    """Middleware ASGI: perfila as requisições que pedem (e têm o token)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cabecalhos = Headers(scope=scope)
+        modo = cabecalhos.get("x-perfil")
+        if modo is None and b"perfil=" in scope.get("query_string", b""):
+            modo = QueryParams(scope["query_string"]).get("perfil")
+        if modo is None:
+            await self.app(scope, receive, send)
+            return
+        if modo not in MODOS_PERFIL or not token_perfil_valido(cabecalhos.get("x-perfil-token")):
+            resposta = JSONResponse({"detail": "Perfil inválido ou não autorizado"}, status_code=403)
+            await resposta(scope, receive, send)
+            return
+
+        PERFIL_DIRETORIO.mkdir(parents=True, exist_ok=True)
+        nome = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}_{scope['method']}_{uuid.uuid4().hex[:8]}{MODOS_PERFIL[modo]}"
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                mensagem["headers"] = list(mensagem.get("headers", [])) + [(b"x-perfil-arquivo", nome.encode())]
+            await send(mensagem)
+
+        if modo == "amostragem":
+            amostrador = AmostradorPilha(threading.get_ident(), PERFIL_INTERVALO)
+            amostrador.start()
+            try:
+                await self.app(scope, receive, enviar)
+            finally:
+                amostrador.parar()
+                amostrador.gravar(PERFIL_DIRETORIO / nome)
+        else:
+            # Um único profiler determinístico pode estar ativo por vez
+            if not _perfil_deterministico.acquire(blocking=False):
+                resposta = JSONResponse({"detail": "Já existe um perfil determinístico em andamento"}, status_code=409)
+                await resposta(scope, receive, send)
+                return
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+                try:
+                    await self.app(scope, receive, enviar)
+                finally:
+                    perfil.disable()
+                    perfil.dump_stats(PERFIL_DIRETORIO / nome)
+            finally:
+                _perfil_deterministico.release()
+
+        logger.info(f"Perfil {modo} de {scope['method']} {scope['path']} gravado em {nome}")
+
+
+roteador = APIRouter(prefix="/api")
+
+
+def _verificar_token_perfil(token: Optional[str]) -> None:
+    if not PERFIL_HABILITADO:
+        raise HTTPException(status_code=404, detail="Perfil sob demanda desabilitado")
+    if not token_perfil_valido(token):
+        raise HTTPException(status_code=403, detail="Token de perfil inválido")
+
+
+@roteador.get("/perfis")
+async def listar_perfis(x_perfil_token: Optional[str] = Header(None)):
+    """Perfis gravados (mais recentes primeiro)"""
+    _verificar_token_perfil(x_perfil_token)
+    if not PERFIL_DIRETORIO.is_dir():
+        return []
+    arquivos = [arquivo for arquivo in PERFIL_DIRETORIO.iterdir() if arquivo.suffix in MODOS_PERFIL.values()]
+    return [
+        {"nome": arquivo.name, "bytes": arquivo.stat().st_size}
+        for arquivo in sorted(arquivos, key=lambda arquivo: arquivo.name, reverse=True)
+    ]
+
+
+@roteador.get("/perfis/{nome}")
+async def baixar_perfil(nome: str, x_perfil_token: Optional[str] = Header(None)):
+    """Download de um perfil (.folded ou .prof)"""
+    _verificar_token_perfil(x_perfil_token)
+    caminho = PERFIL_DIRETORIO / nome
+    if Path(nome).name != nome or caminho.suffix not in MODOS_PERFIL.values() or not caminho.is_file():
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return FileResponse(caminho, filename=nome, media_type="application/octet-stream")
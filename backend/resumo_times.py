@@ -0,0 +1,211 @@
+"""
+Resumo por time (visão materializada em db.times).
+
+Um documento por time em db.times, mantido incrementalmente: cada gravação de
+partida calcula a contribuição dela para os times envolvidos antes e depois
+da mudança e aplica só a diferença ($inc nos contadores, $pull/$push na
+lista de partidas recentes). Nada é recalculado a partir de db.partidas,
+exceto em POST /api/times/reconstruir (carga inicial ou correção). Os
+contadores são sempre exatos; a lista de recentes guarda só as
+MAX_PARTIDAS_RECENTES_TIME mais novas, então após remoções ela pode ficar
+menor até a próxima partida (ou a reconstrução) do time.
+"""
+
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pymongo import DeleteOne, UpdateOne
+
+import server
+
+MAX_PARTIDAS_RECENTES_TIME = int(os.environ.get('TIMES_MAX_RECENTES', '10'))
+
+CONTADORES_TIME = (
+    "partidas", "partidas_casa", "partidas_fora", "jogos_com_resultado",
+    "vitorias", "empates", "derrotas", "gols_marcados", "gols_sofridos",
+)
+LADOS_TIME = (
+    # mando, time, adversário, gols pró, gols contra, sufixo dos campos informados
+    ("casa", "time_casa", "time_visitante", "gols_casa", "gols_fora", "casa"),
+    ("fora", "time_visitante", "time_casa", "gols_fora", "gols_casa", "fora"),
+)
+
+
+def chave_time(nome: str) -> str:
+    """Identificador do time: sem diferença de maiúsculas e espaços"""
+    return " ".join(nome.split()).casefold()
+
+
+def participacoes_times(partida_doc: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Contribuição de uma partida ao resumo de cada time: chave -> nome, contadores, recente"""
+    if not partida_doc:
+        return {}
+
+    participacoes: Dict[str, Dict[str, Any]] = {}
+    for mando, campo_time, campo_adversario, campo_pro, campo_contra, sufixo in LADOS_TIME:
+        nome = " ".join(partida_doc[campo_time].split())
+        contadores = {"partidas": 1, f"partidas_{mando}": 1}
+        gols_pro, gols_contra = partida_doc.get(campo_pro), partida_doc.get(campo_contra)
+
+        resultado = None
+        if gols_pro is not None and gols_contra is not None:
+            resultado = "V" if gols_pro > gols_contra else "E" if gols_pro == gols_contra else "D"
+            contadores.update({
+                "jogos_com_resultado": 1,
+                {"V": "vitorias", "E": "empates", "D": "derrotas"}[resultado]: 1,
+                "gols_marcados": gols_pro,
+                "gols_sofridos": gols_contra,
+            })
+
+        recente = {
+            "partida_id": partida_doc["id"],
+            "data_hora": partida_doc.get("data_hora"),
+            "campeonato": partida_doc.get("campeonato"),
+            "mando": mando,
+            "adversario": partida_doc[campo_adversario],
+            "forma_informada": partida_doc.get(f"forma_{sufixo}"),
+            "media_gols_marcados_informada": partida_doc.get(f"media_gols_marcados_{sufixo}"),
+            "media_gols_sofridos_informada": partida_doc.get(f"media_gols_sofridos_{sufixo}"),
+            "gols_marcados": gols_pro,
+            "gols_sofridos": gols_contra,
+            "resultado": resultado,
+        }
+
+        existente = participacoes.get(chave_time(nome))
+        if existente:  # mesmo time dos dois lados (cadastro inconsistente): soma os contadores
+            for campo, valor in contadores.items():
+                existente["contadores"][campo] = existente["contadores"].get(campo, 0) + valor
+        else:
+            participacoes[chave_time(nome)] = {"nome": nome, "contadores": contadores, "recente": recente}
+    return participacoes
+
+
+def operacoes_resumo_times(
+    antes: Optional[Dict[str, Any]],
+    depois: Optional[Dict[str, Any]]
+) -> List[Union[UpdateOne, DeleteOne]]:
+    """Operações que levam db.times do estado com `antes` para o estado com `depois`"""
+    anteriores, atuais = participacoes_times(antes), participacoes_times(depois)
+    partida_id = (depois or antes or {}).get("id")
+    operacoes: List[Union[UpdateOne, DeleteOne]] = []
+
+    for chave in list(anteriores) + [chave for chave in atuais if chave not in anteriores]:
+        anterior, atual = anteriores.get(chave), atuais.get(chave)
+        contadores_antes = anterior["contadores"] if anterior else {}
+        contadores_depois = atual["contadores"] if atual else {}
+        delta = {
+            campo: contadores_depois.get(campo, 0) - contadores_antes.get(campo, 0)
+            for campo in CONTADORES_TIME
+        }
+        delta = {campo: valor for campo, valor in delta.items() if valor}
+        recente_mudou = (anterior or {}).get("recente") != (atual or {}).get("recente")
+
+        if not delta and not recente_mudou and (not atual or atual["nome"] == anterior["nome"]):
+            continue
+
+        # $pull e $push no mesmo campo não podem ir na mesma atualização
+        if anterior and recente_mudou:
+            operacoes.append(UpdateOne({"chave": chave}, {"$pull": {"recentes": {"partida_id": partida_id}}}))
+
+        atualizacao: Dict[str, Any] = {"$set": {"atualizado_em": server.agora_utc()}}
+        if delta:
+            atualizacao["$inc"] = delta
+        if atual:
+            atualizacao["$set"]["nome"] = atual["nome"]
+            if recente_mudou:
+                atualizacao["$push"] = {"recentes": {
+                    "$each": [atual["recente"]],
+                    "$sort": {"data_hora": -1},
+                    "$slice": MAX_PARTIDAS_RECENTES_TIME,
+                }}
+        operacoes.append(UpdateOne({"chave": chave}, atualizacao, upsert=atual is not None))
+
+        if not atual:
+            # Time sem nenhuma partida: remove o resumo
+            operacoes.append(DeleteOne({"chave": chave, "partidas": {"$lte": 0}}))
+
+    return operacoes
+
+
+async def atualizar_resumo_times(pares: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+    """Aplica a diferença de uma ou mais gravações de partida (antes, depois) em db.times"""
+    operacoes = [operacao for antes, depois in pares for operacao in operacoes_resumo_times(antes, depois)]
+    if operacoes:
+        await server.db.times.bulk_write(operacoes, ordered=True)
+
+
+def montar_resumo_time(time_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Médias e forma recente a partir do documento materializado"""
+    contadores = {campo: time_doc.get(campo, 0) for campo in CONTADORES_TIME}
+    jogos = contadores["jogos_com_resultado"]
+    recentes = time_doc.get("recentes", [])
+    encerradas = [recente for recente in recentes if recente.get("resultado")]
+
+    def media(total: float, quantidade: int) -> Optional[float]:
+        return round(total / quantidade, 2) if quantidade else None
+
+    return {
+        "nome": time_doc["nome"],
+        **contadores,
+        "media_gols_marcados": media(contadores["gols_marcados"], jogos),
+        "media_gols_sofridos": media(contadores["gols_sofridos"], jogos),
+        "forma_recente": "-".join(recente["resultado"] for recente in encerradas),
+        "media_gols_marcados_recentes": media(sum(r["gols_marcados"] for r in encerradas), len(encerradas)),
+        "media_gols_sofridos_recentes": media(sum(r["gols_sofridos"] for r in encerradas), len(encerradas)),
+        "recentes": recentes,
+        "atualizado_em": time_doc.get("atualizado_em"),
+    }
+
+
+def _ordem_bson_data_hora(recente: Dict[str, Any]) -> Tuple[int, Any]:
+    """Ordem do MongoDB para data_hora: nulo < texto (legado) < data"""
+    valor = recente["data_hora"]
+    if valor is None:
+        return (0, 0)
+    return (1, valor) if isinstance(valor, str) else (2, valor)
+
+
+async def reconstruir_resumos_times() -> int:
+    """
+    Recria db.times a partir de todas as partidas (uma leitura sequencial).
+    Os resumos são gravados numa coleção temporária que substitui db.times com
+    um rename (dropTarget): leitores veem os resumos antigos até a troca, nunca
+    uma coleção vazia. Gravações de partidas durante a leitura podem não
+    entrar nos novos resumos; a reconstrução é uma ferramenta de reparo.
+    """
+    resumos: Dict[str, Dict[str, Any]] = {}
+    async for partida_doc in server.db.partidas.find({}, {"_id": 0}):
+        for chave, participacao in participacoes_times(partida_doc).items():
+            resumo = resumos.setdefault(chave, {
+                "chave": chave, **{campo: 0 for campo in CONTADORES_TIME}, "recentes": []
+            })
+            resumo["nome"] = participacao["nome"]
+            for campo, valor in participacao["contadores"].items():
+                resumo[campo] += valor
+            resumo["recentes"].append(participacao["recente"])
+
+    agora = server.agora_utc()
+    for resumo in resumos.values():
+        # Mesma ordem do $sort da atualização incremental (datas ausentes por último)
+        resumo["recentes"].sort(key=_ordem_bson_data_hora, reverse=True)
+        resumo["recentes"] = resumo["recentes"][:MAX_PARTIDAS_RECENTES_TIME]
+        resumo["atualizado_em"] = agora
+
+    if not resumos:
+        await server.db.times.delete_many({})
+        return 0
+
+    temporaria = server.db[f"times_reconstrucao_{uuid.uuid4().hex}"]
+    try:
+        # O rename leva os índices da coleção de origem: cria os de db.times antes
+        for indice in server.INDICES_REQUERIDOS["times"]:
+            await temporaria.create_index(
+                indice["chaves"], unique=indice.get("unique", False), **indice.get("opcoes", {})
+            )
+        await temporaria.insert_many(list(resumos.values()))
+        await temporaria.rename("times", dropTarget=True)
+    except BaseException:
+        await temporaria.drop()
+        raise
+    return len(resumos)
@@ -1,24 +1,99 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, ValidationError, field_validator, model_validator
+from pymongo import ReplaceOne, ReturnDocument
+from pymongo.errors import BulkWriteError, OperationFailure
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator, Awaitable, Callable, Union
 import uuid
+import asyncio
+import base64
+import codecs
+import contextlib
+import contextvars
+import csv
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from collections import OrderedDict, deque
+import hashlib
+import json
 import math
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Sem orjson a resposta rápida usa o json da biblioteca padrão
+    orjson = None
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Métricas do Prometheus (depois do .env: METRICAS_HABILITADAS vem do ambiente)
+from metricas import (  # noqa: E402
+    METRICAS_HABILITADAS, ContadorOperacoesMongo, MiddlewareMetricas, medir_etapa, metrica_atraso_event_loop,
+    roteador as roteador_metricas,
+)
+# Perfil sob demanda (PERFIL_HABILITADO e PERFIL_TOKEN também vêm do ambiente)
+from perfil import PERFIL_HABILITADO, MiddlewarePerfil, roteador as roteador_perfis  # noqa: E402
+from autocomplete import indice_autocomplete, roteador as roteador_autocomplete  # noqa: E402
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# tz_aware: datas BSON voltam como datetime em UTC (com fuso)
+client = AsyncIOMotorClient(
+    mongo_url, tz_aware=True,
+    event_listeners=[ContadorOperacoesMongo()] if METRICAS_HABILITADAS else []
+)
 db = client[os.environ['DB_NAME']]
 
+# Versão do modelo de análise (entra na chave do cache de análises)
+VERSAO_MODELO = "2.2"
+
+# Resposta rápida: dados produzidos internamente vão direto para bytes,
+# sem a revalidação do response_model (opt-in)
+RESPOSTA_RAPIDA = os.environ.get('RESPOSTA_RAPIDA', '0').lower() in ('1', 'true', 'sim')
+
+
+def construir_modelo(modelo, **campos):
+    """Modelo com dados produzidos internamente: sem validação só com RESPOSTA_RAPIDA"""
+    if RESPOSTA_RAPIDA:
+        return modelo.model_construct(**campos)
+    return modelo(**campos)
+
+# Datas e horas sem fuso (ex.: "2024-10-22T16:00" do formulário) são horário local
+FUSO_HORARIO_PADRAO = ZoneInfo(os.environ.get('FUSO_HORARIO_PADRAO', 'America/Sao_Paulo'))
+
+
+def agora_utc() -> datetime:
+    """Instante atual em UTC, truncado em milissegundos (precisão das datas BSON)"""
+    agora = datetime.now(timezone.utc)
+    return agora.replace(microsecond=agora.microsecond // 1000 * 1000)
+
+
+def converter_data(valor: Any, fuso=timezone.utc) -> Optional[datetime]:
+    """
+    Converte string ISO 8601 ou datetime em datetime UTC (com fuso).
+    Valores sem fuso são interpretados em `fuso`; string inválida levanta ValueError.
+    """
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, str):
+        valor = datetime.fromisoformat(valor.strip())
+    if not isinstance(valor, datetime):
+        raise ValueError(f"Data inválida: {valor!r}")
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=fuso)
+    return valor.astimezone(timezone.utc)
+
+
 # Create the main app without a prefix
 app = FastAPI()
 
@@ -26,12 +101,24 @@ app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
 
+RESULTADOS_FINAIS = ("Casa", "Empate", "Fora")
+CAMPOS_RESULTADO = ("gols_casa", "gols_fora", "resultado_final")
+
+
+def resultado_pelo_placar(gols_casa: int, gols_fora: int) -> str:
+    if gols_casa > gols_fora:
+        return "Casa"
+    if gols_casa < gols_fora:
+        return "Fora"
+    return "Empate"
+
+
 # Define Models
 class PartidaCreate(BaseModel):
     # Identificação Geral
     campeonato: str
     rodada: int
-    data_hora: Optional[str] = None  # Ex: "2024-10-22T16:00:00"
+    data_hora: Optional[datetime] = None  # Ex: "2024-10-22T16:00:00" (sem fuso = FUSO_HORARIO_PADRAO)
     local_estadio: Optional[str] = None  # Ex: "BayArena"
     
     # Time Casa
@@ -76,6 +163,20 @@ class PartidaCreate(BaseModel):
     odd_casa: float
     odd_empate: float
     odd_fora: float
+    # Odds dos mercados de gols (opcionais: sem elas o EV usa uma odd estimada)
+    odd_ambos_marcam: Optional[float] = None
+    odd_acima_1_5: Optional[float] = None
+    odd_acima_2_5: Optional[float] = None
+    odd_abaixo_2_5: Optional[float] = None
+    # Odds de dupla chance (opcionais, mesma regra)
+    odd_casa_empate: Optional[float] = None
+    odd_fora_empate: Optional[float] = None
+    odd_casa_fora: Optional[float] = None
+    
+    # Resultado (partidas encerradas; usado no backtest)
+    gols_casa: Optional[int] = Field(default=None, ge=0)
+    gols_fora: Optional[int] = Field(default=None, ge=0)
+    resultado_final: Optional[str] = None  # "Casa", "Empate" ou "Fora"
     
     # Campos legados (para compatibilidade)
     artilheiro_disponivel: Optional[bool] = None
@@ -83,6 +184,24 @@ class PartidaCreate(BaseModel):
     escalacao_definida: Optional[bool] = None
     noticias_relevantes: Optional[str] = None
 
+    @field_validator("data_hora", mode="before")
+    @classmethod
+    def _validar_data_hora(cls, valor: Any) -> Optional[datetime]:
+        return converter_data(valor, FUSO_HORARIO_PADRAO)
+
+    @model_validator(mode="after")
+    def _validar_resultado(self) -> "PartidaCreate":
+        if self.resultado_final is not None and self.resultado_final not in RESULTADOS_FINAIS:
+            raise ValueError(f"resultado_final deve ser um de: {', '.join(RESULTADOS_FINAIS)}")
+        if (self.gols_casa is None) != (self.gols_fora is None):
+            raise ValueError("Informe gols_casa e gols_fora juntos")
+        if self.gols_casa is not None:
+            pelo_placar = resultado_pelo_placar(self.gols_casa, self.gols_fora)
+            if self.resultado_final not in (None, pelo_placar):
+                raise ValueError(f"resultado_final '{self.resultado_final}' não confere com o placar")
+            self.resultado_final = pelo_placar
+        return self
+
 
 class Partida(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -92,7 +211,7 @@ class Partida(BaseModel):
     # Identificação Geral
     campeonato: str
     rodada: int
-    data_hora: Optional[str] = None
+    data_hora: Optional[Union[datetime, str]] = None  # str: valor legado não convertido pela migração
     local_estadio: Optional[str] = None
     
     # Time Casa
@@ -137,6 +256,20 @@ class Partida(BaseModel):
     odd_casa: float
     odd_empate: float
     odd_fora: float
+    # Odds dos mercados de gols (opcionais: sem elas o EV usa uma odd estimada)
+    odd_ambos_marcam: Optional[float] = None
+    odd_acima_1_5: Optional[float] = None
+    odd_acima_2_5: Optional[float] = None
+    odd_abaixo_2_5: Optional[float] = None
+    # Odds de dupla chance (opcionais, mesma regra)
+    odd_casa_empate: Optional[float] = None
+    odd_fora_empate: Optional[float] = None
+    odd_casa_fora: Optional[float] = None
+    
+    # Resultado (partidas encerradas; usado no backtest)
+    gols_casa: Optional[int] = None
+    gols_fora: Optional[int] = None
+    resultado_final: Optional[str] = None  # "Casa", "Empate" ou "Fora"
     
     # Campos legados (para compatibilidade)
     artilheiro_disponivel: Optional[bool] = None
@@ -144,7 +277,26 @@ class Partida(BaseModel):
     escalacao_definida: Optional[bool] = None
     noticias_relevantes: Optional[str] = None
     
-    criado_em: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    criado_em: datetime = Field(default_factory=agora_utc)
+
+    @field_validator("data_hora", mode="before")
+    @classmethod
+    def _validar_data_hora(cls, valor: Any) -> Any:
+        try:
+            return converter_data(valor, FUSO_HORARIO_PADRAO)
+        except ValueError:
+            return valor
+
+    @field_validator("criado_em", mode="before")
+    @classmethod
+    def _validar_criado_em(cls, valor: Any) -> Optional[datetime]:
+        return converter_data(valor)
+
+
+class ResultadoPartida(BaseModel):
+    """Placar final de uma partida encerrada"""
+    gols_casa: int = Field(ge=0)
+    gols_fora: int = Field(ge=0)
 
 
 class Analise(BaseModel):
@@ -200,9 +352,238 @@ class AnaliseCompletaV2(BaseModel):
     outras_analises: Optional[List[Analise]] = None
 
 
+class ErroIngestao(BaseModel):
+    """Erro de uma linha na ingestão em massa"""
+    linha: int
+    erros: List[str]
+
+
+class ResultadoIngestao(BaseModel):
+    """Resumo de uma ingestão em massa de partidas"""
+    recebidas: int
+    inseridas: int
+    ids: List[str]
+    erros: List[ErroIngestao]
+
+
+class AnaliseLoteRequest(BaseModel):
+    """Requisição de análise em lote: IDs de partidas salvas e/ou partidas avulsas"""
+    ids: Optional[List[str]] = None
+    partidas: Optional[List[PartidaCreate]] = None
+
+
+class ResultadoLote1X2(BaseModel):
+    """Resultado 1X2 resumido de uma partida analisada em lote"""
+    partida_id: Optional[str] = None
+    probabilidade_casa: float
+    probabilidade_empate: float
+    probabilidade_fora: float
+    resultado_previsto: str
+    confianca: str
+    diferenca_probabilidade: float
+    ev_casa: float
+    ev_empate: float
+    ev_fora: float
+
+class SensitividadeRequest(BaseModel):
+    """Grade do what-if: deltas nas notas (0-10) dos fatores e variações relativas das odds"""
+    fatores: Optional[List[str]] = None  # Padrão: os 7 fatores
+    deltas_notas: List[float] = Field(default=[-2.0, -1.0, 1.0, 2.0], max_length=41)
+    variacoes_odds: List[float] = Field(default=[-0.10, -0.05, 0.05, 0.10], max_length=41)  # 0.05 = odd +5%
+
+    @field_validator("deltas_notas")
+    @classmethod
+    def _validar_deltas(cls, deltas: List[float]) -> List[float]:
+        if any(abs(delta) > 10 for delta in deltas):
+            raise ValueError("deltas_notas devem estar entre -10 e 10")
+        return deltas
+
+    @field_validator("variacoes_odds")
+    @classmethod
+    def _validar_variacoes(cls, variacoes: List[float]) -> List[float]:
+        if any(variacao <= -1 for variacao in variacoes):
+            raise ValueError("variacoes_odds devem ser maiores que -1")
+        return variacoes
+
+
+class VarianteFator(BaseModel):
+    """Resultado 1X2 com a nota de um fator alterada"""
+    fator: str
+    lado: str  # "casa", "fora" ou "ambos" (fatores comuns aos dois times)
+    delta: float
+    nota_casa: float
+    nota_fora: float
+    probabilidade_casa: float
+    probabilidade_empate: float
+    probabilidade_fora: float
+    resultado_previsto: str
+    confianca: str
+    ev_casa: float
+    ev_empate: float
+    ev_fora: float
+
+
+class VarianteOdd(BaseModel):
+    """EV de um mercado 1X2 com a odd alterada (probabilidades não dependem das odds)"""
+    mercado: str  # "casa", "empate" ou "fora"
+    variacao: float
+    odd: float
+    ev: float
+    classificacao_ev: str
+
+
+class ResultadoSensitividade(BaseModel):
+    """Superfície de resposta do what-if de uma partida"""
+    partida_id: str
+    base: ResultadoLote1X2
+    fatores: List[VarianteFator]
+    odds: List[VarianteOdd]
+
+
+class OddsSnapshot(BaseModel):
+    """Odds 1X2 observadas em um instante (sem registrado_em = agora)"""
+    odd_casa: float = Field(gt=1)
+    odd_empate: float = Field(gt=1)
+    odd_fora: float = Field(gt=1)
+    registrado_em: Optional[datetime] = None
+
+    @field_validator("registrado_em", mode="before")
+    @classmethod
+    def _validar_registrado_em(cls, valor: Any) -> Optional[datetime]:
+        return converter_data(valor)
+
+
+class RegistroOdds(BaseModel):
+    """Resultado do registro de um snapshot de odds"""
+    partida_id: str
+    registrado_em: datetime
+    odds_atuais: bool  # False: snapshot retroativo, as odds da partida não mudaram
+    ev_casa: float
+    ev_empate: float
+    ev_fora: float
+
+
+class PontoOdds(BaseModel):
+    registrado_em: datetime
+    odd_casa: float
+    odd_empate: float
+    odd_fora: float
+
+
+class SerieOdds(BaseModel):
+    """Série de odds reamostrada: último snapshot de cada intervalo"""
+    partida_id: str
+    intervalo_segundos: int
+    total_snapshots: int
+    pontos: List[PontoOdds]
+
+
+class PartidaRecenteTime(BaseModel):
+    """Partida de um time no resumo (o que foi informado e o placar, se houver)"""
+    partida_id: str
+    data_hora: Optional[Union[datetime, str]] = None
+    campeonato: Optional[str] = None
+    mando: str  # "casa" ou "fora"
+    adversario: str
+    forma_informada: Optional[str] = None
+    media_gols_marcados_informada: Optional[float] = None
+    media_gols_sofridos_informada: Optional[float] = None
+    gols_marcados: Optional[int] = None
+    gols_sofridos: Optional[int] = None
+    resultado: Optional[str] = None  # V, E ou D
+
+
+class ResumoTime(BaseModel):
+    """Resumo materializado de um time (coleção times)"""
+    nome: str
+    partidas: int
+    partidas_casa: int
+    partidas_fora: int
+    jogos_com_resultado: int
+    vitorias: int
+    empates: int
+    derrotas: int
+    gols_marcados: int
+    gols_sofridos: int
+    media_gols_marcados: Optional[float] = None
+    media_gols_sofridos: Optional[float] = None
+    forma_recente: str  # resultados das partidas recentes, da mais nova para a mais antiga
+    media_gols_marcados_recentes: Optional[float] = None
+    media_gols_sofridos_recentes: Optional[float] = None
+    recentes: List[PartidaRecenteTime]
+    atualizado_em: Optional[datetime] = None
+
+
+class ResultadoBusca(Partida):
+    """Partida encontrada pela busca textual, com a relevância calculada pelo MongoDB"""
+    relevancia: float
+
+
 # ================ LÓGICA DE CÁLCULO - VERSÃO 2.0 ================
 # Sistema de cálculo coerente com probabilidades normalizadas
 
+# ====== PESOS VERSÃO 2.0 (somam 100%) ======
+# Compartilhados entre o cálculo individual e o motor vetorizado (lote)
+PESO_FORMA = 0.25
+PESO_FORCA_ELENCO = 0.15
+PESO_DESEMPENHO = 0.15
+PESO_H2H = 0.15
+PESO_MOTIVACAO = 0.10
+PESO_ANALISTA = 0.10
+PESO_CONTEXTO = 0.10
+
+FATORES_V2 = [
+    "forma_recente",
+    "forca_elenco",
+    "desempenho_casa_fora",
+    "historico_h2h",
+    "motivacao_contexto",
+    "notas_analista",
+    "contexto_externo",
+]
+
+# Pesos calibrados (calibrar_pesos.py): arquivo JSON versionado, opcional
+ARQUIVO_PESOS = os.environ.get('ARQUIVO_PESOS')
+
+
+def carregar_pesos(caminho: str) -> Tuple[Dict[str, float], str]:
+    """Lê um arquivo de pesos: peso (0-1) de cada fator de FATORES_V2 e a versão"""
+    with open(caminho, encoding="utf-8") as arquivo:
+        conteudo = json.load(arquivo)
+
+    faltando = [fator for fator in FATORES_V2 if fator not in conteudo.get("pesos", {})]
+    if faltando or not conteudo.get("versao"):
+        raise ValueError(f"Arquivo de pesos inválido ({caminho}): requer 'versao' e os pesos de {FATORES_V2}")
+
+    pesos = {fator: float(conteudo["pesos"][fator]) for fator in FATORES_V2}
+    if min(pesos.values()) < 0 or abs(sum(pesos.values()) - 1) > 1e-4:
+        raise ValueError(f"Arquivo de pesos inválido ({caminho}): pesos devem ser >= 0 e somar 1")
+
+    return pesos, str(conteudo["versao"])
+
+
+if ARQUIVO_PESOS:
+    _pesos_calibrados, VERSAO_PESOS = carregar_pesos(ARQUIVO_PESOS)
+    (
+        PESO_FORMA, PESO_FORCA_ELENCO, PESO_DESEMPENHO, PESO_H2H,
+        PESO_MOTIVACAO, PESO_ANALISTA, PESO_CONTEXTO
+    ) = (_pesos_calibrados[fator] for fator in FATORES_V2)
+    # Cache e análises salvas são chaveados pela versão: pesos novos = análises novas
+    VERSAO_MODELO = f"{VERSAO_MODELO}+{VERSAO_PESOS}"
+else:
+    VERSAO_PESOS = "padrao"
+
+# Peso (%) de cada fator, como em detalhes_*_ponderados
+PESOS_FATORES_V2 = {
+    "forma_recente": PESO_FORMA * 100,
+    "forca_elenco": PESO_FORCA_ELENCO * 100,
+    "desempenho_casa_fora": PESO_DESEMPENHO * 100,
+    "historico_h2h": PESO_H2H * 100,
+    "motivacao_contexto": PESO_MOTIVACAO * 100,
+    "notas_analista": PESO_ANALISTA * 100,
+    "contexto_externo": PESO_CONTEXTO * 100,
+}
+
 def calcular_score_forma(forma: str) -> float:
     """Calcula score baseado na forma recente (V-E-D)"""
     if not forma:
@@ -346,94 +727,248 @@ def calcular_score_odds_implicitas(odd: float, odd_referencia: float) -> float:
         return 4.0
 
 
-def gerar_observacoes_contextuais(partida: Partida, analise_data: Dict) -> List[Dict[str, Any]]:
+# ====== CARACTERÍSTICAS INTERPRETADAS (uma passada por partida) ======
+# Os campos textuais (forma, H2H, lesões, notícias, condições) e as cadeias de
+# fallback dos campos legados são interpretados uma única vez por partida;
+# scores, justificativa e observações leem todos daqui.
+
+LESOES_SEM_DESFALQUE = ["nenhuma", "sem desfalques", "-", ""]
+
+
+def _contar_forma(forma: str) -> Tuple[int, int, int, int]:
+    """(pontos, jogos, vitórias, derrotas) de uma forma no formato V-E-D"""
+    if not forma:
+        return 0, 0, 0, 0
+
+    forma_upper = forma.upper()
+    jogos = forma_upper.split('-')
+    pontos = 0
+    for jogo in jogos:
+        if 'V' in jogo:
+            pontos += 3
+        elif 'E' in jogo:
+            pontos += 1
+
+    return pontos, len(jogos), forma_upper.count('V'), forma_upper.count('D')
+
+
+class CaracteristicasPartida:
+    """Campos da partida já interpretados (layout fixo, sem __dict__)"""
+    __slots__ = (
+        "pontos_forma_casa", "jogos_forma_casa", "vitorias_forma_casa", "derrotas_forma_casa",
+        "pontos_forma_fora", "jogos_forma_fora", "vitorias_forma_fora", "derrotas_forma_fora",
+        "h2h_vitorias", "h2h_empates", "h2h_derrotas", "h2h_cita_empate",
+        "artilheiro_casa", "artilheiro_fora",
+        "score_lesoes_casa", "score_lesoes_fora",
+        "desfalques_casa", "desfalques_fora",
+        "score_motivacao", "score_contexto", "condicoes_adversas",
+    )
+
+    def __init__(self, partida: Partida):
+        # Forma recente
+        (self.pontos_forma_casa, self.jogos_forma_casa,
+         self.vitorias_forma_casa, self.derrotas_forma_casa) = _contar_forma(partida.forma_casa)
+        (self.pontos_forma_fora, self.jogos_forma_fora,
+         self.vitorias_forma_fora, self.derrotas_forma_fora) = _contar_forma(partida.forma_fora)
+
+        # Histórico H2H
+        h2h = partida.historico_h2h or ""
+        h2h_upper = h2h.upper()
+        self.h2h_vitorias = h2h_upper.count('V')
+        self.h2h_empates = h2h_upper.count('E')
+        self.h2h_derrotas = h2h_upper.count('D')
+        self.h2h_cita_empate = "empate" in h2h.lower()
+
+        # Elenco (campos legados como fallback)
+        self.artilheiro_casa = partida.artilheiro_disponivel_casa if partida.artilheiro_disponivel_casa is not None else partida.artilheiro_disponivel if partida.artilheiro_disponivel is not None else True
+        self.artilheiro_fora = partida.artilheiro_disponivel_fora if partida.artilheiro_disponivel_fora is not None else partida.artilheiro_disponivel if partida.artilheiro_disponivel is not None else True
+        lesoes_casa = partida.lesoes_suspensoes_casa if partida.lesoes_suspensoes_casa else partida.lesoes_suspensoes if partida.lesoes_suspensoes else "Nenhuma"
+        lesoes_fora = partida.lesoes_suspensoes_fora if partida.lesoes_suspensoes_fora else partida.lesoes_suspensoes if partida.lesoes_suspensoes else "Nenhuma"
+        self.score_lesoes_casa = calcular_score_lesoes(lesoes_casa)
+        self.score_lesoes_fora = calcular_score_lesoes(lesoes_fora)
+
+        # Desfalques exibidos nas observações (visitante não usa o campo legado)
+        self.desfalques_casa = lesoes_casa if lesoes_casa.lower() not in LESOES_SEM_DESFALQUE else None
+        lesoes_fora_informadas = partida.lesoes_suspensoes_fora
+        self.desfalques_fora = lesoes_fora_informadas if lesoes_fora_informadas and lesoes_fora_informadas.lower() not in LESOES_SEM_DESFALQUE else None
+
+        # Motivação - notícias combinadas
+        noticias_combinadas = ""
+        if partida.noticia_1:
+            noticias_combinadas += partida.noticia_1 + " "
+        if partida.noticia_2:
+            noticias_combinadas += partida.noticia_2 + " "
+        if partida.noticia_3:
+            noticias_combinadas += partida.noticia_3 + " "
+        if partida.noticias_relevantes:
+            noticias_combinadas += partida.noticias_relevantes
+        self.score_motivacao = calcular_score_motivacao(noticias_combinadas.strip())
+
+        # Condições externas
+        self.score_contexto = calcular_score_condicoes(partida.condicoes_externas)
+        self.condicoes_adversas = bool(partida.condicoes_externas) and "chuva" in partida.condicoes_externas.lower()
+
+
+def _score_forma(pontos: int, jogos: int) -> float:
+    """Mesmo resultado de calcular_score_forma, a partir da forma já contada"""
+    if jogos == 0:
+        return 5.0
+    return round((pontos / (jogos * 3)) * 10, 2)
+
+
+def _score_h2h_casa(vitorias: int, empates: int, derrotas: int) -> float:
+    """Mesmo resultado de calcular_score_h2h(..., "casa"), a partir das contagens"""
+    total = vitorias + empates + derrotas
+    if total == 0:
+        return 5.0
+    pontos = vitorias * 3 + empates * 1
+    return round((pontos / (total * 3)) * 10, 2)
+
+
+class NotasFatores:
+    """Notas (0-10) dos 7 fatores de um time"""
+    __slots__ = tuple(FATORES_V2)
+
+    def __init__(self, forma_recente: float, forca_elenco: float, desempenho_casa_fora: float,
+                 historico_h2h: float, motivacao_contexto: float, notas_analista: float,
+                 contexto_externo: float):
+        self.forma_recente = forma_recente
+        self.forca_elenco = forca_elenco
+        self.desempenho_casa_fora = desempenho_casa_fora
+        self.historico_h2h = historico_h2h
+        self.motivacao_contexto = motivacao_contexto
+        self.notas_analista = notas_analista
+        self.contexto_externo = contexto_externo
+
+    def como_dict(self) -> Dict[str, float]:
+        return {fator: getattr(self, fator) for fator in FATORES_V2}
+
+    def ponderados(self) -> Dict[str, Dict[str, float]]:
+        """{fator: {nota, peso, ponderado}} como em detalhes_*_ponderados"""
+        detalhes = {}
+        for fator in FATORES_V2:
+            nota = getattr(self, fator)
+            peso = PESOS_FATORES_V2[fator]
+            detalhes[fator] = {
+                "nota": nota,
+                "peso": peso,
+                "ponderado": round((nota * peso) / 10, 2)
+            }
+        return detalhes
+
+
+class ScoresV2:
+    """Resultado de calcular_scores_independentes (layout fixo)"""
+    __slots__ = (
+        "probabilidade_casa", "probabilidade_empate", "probabilidade_fora",
+        "resultado_previsto", "confianca", "diferenca_probabilidade",
+        "notas_casa", "notas_fora", "score_casa", "score_empate", "score_fora",
+    )
+
+    def __init__(self, probabilidade_casa: float, probabilidade_empate: float, probabilidade_fora: float,
+                 resultado_previsto: str, confianca: str, diferenca_probabilidade: float,
+                 notas_casa: NotasFatores, notas_fora: NotasFatores,
+                 score_casa: float, score_empate: float, score_fora: float):
+        self.probabilidade_casa = probabilidade_casa
+        self.probabilidade_empate = probabilidade_empate
+        self.probabilidade_fora = probabilidade_fora
+        self.resultado_previsto = resultado_previsto
+        self.confianca = confianca
+        self.diferenca_probabilidade = diferenca_probabilidade
+        self.notas_casa = notas_casa
+        self.notas_fora = notas_fora
+        self.score_casa = score_casa
+        self.score_empate = score_empate
+        self.score_fora = score_fora
+
+
+def gerar_observacoes_contextuais(
+    partida: Partida,
+    scores: ScoresV2,
+    caracteristicas: Optional[CaracteristicasPartida] = None
+) -> List[Dict[str, Any]]:
     """
     Gera observações contextuais automáticas com impacto numérico (-10 a +10)
     """
+    c = caracteristicas or CaracteristicasPartida(partida)
     observacoes = []
     
-    # Observações do time casa
-    detalhes_casa = analise_data["detalhes_casa"]
-    detalhes_fora = analise_data["detalhes_fora"]
-    
     # 1. Forma recente - Casa
-    vitorias_casa = partida.forma_casa.upper().count('V')
-    jogos_casa = len(partida.forma_casa.split('-'))
+    vitorias_casa = c.vitorias_forma_casa
+    jogos_casa = c.jogos_forma_casa
     if vitorias_casa >= 4 and jogos_casa >= 5:
         observacoes.append({
             "texto": f"✓ {partida.time_casa} não perde há {vitorias_casa} vitórias em {jogos_casa} jogos",
             "impacto": min(3 + vitorias_casa - 4, 5)
         })
-    elif partida.forma_casa.upper().count('D') >= 3:
-        derrotas = partida.forma_casa.upper().count('D')
+    elif c.derrotas_forma_casa >= 3:
+        derrotas = c.derrotas_forma_casa
         observacoes.append({
             "texto": f"⚠ {partida.time_casa} acumula {derrotas} derrotas recentes",
             "impacto": max(-3 - (derrotas - 3), -5)
         })
     
     # 2. Forma recente - Fora
-    vitorias_fora = partida.forma_fora.upper().count('V')
-    jogos_fora = len(partida.forma_fora.split('-'))
+    vitorias_fora = c.vitorias_forma_fora
+    jogos_fora = c.jogos_forma_fora
     if vitorias_fora >= 4 and jogos_fora >= 5:
         observacoes.append({
             "texto": f"✓ {partida.time_visitante} em ótima sequência com {vitorias_fora} vitórias",
             "impacto": min(3 + vitorias_fora - 4, 5)
         })
-    elif partida.forma_fora.upper().count('D') >= 3:
-        derrotas = partida.forma_fora.upper().count('D')
+    elif c.derrotas_forma_fora >= 3:
+        derrotas = c.derrotas_forma_fora
         observacoes.append({
             "texto": f"⚠ {partida.time_visitante} sem vitórias há {derrotas} partidas",
             "impacto": max(-3 - (derrotas - 3), -5)
         })
     
     # 3. Lesões/Suspensões - Casa
-    lesoes_casa = partida.lesoes_suspensoes_casa if partida.lesoes_suspensoes_casa else partida.lesoes_suspensoes
-    if lesoes_casa and lesoes_casa.lower() not in ["nenhuma", "sem desfalques", "-", ""]:
+    if c.desfalques_casa:
         impacto = -2
-        if "titular" in lesoes_casa.lower() or "grave" in lesoes_casa.lower():
+        if "titular" in c.desfalques_casa.lower() or "grave" in c.desfalques_casa.lower():
             impacto = -4
         observacoes.append({
-            "texto": f"⚠ {partida.time_casa} - Desfalques: {lesoes_casa}",
+            "texto": f"⚠ {partida.time_casa} - Desfalques: {c.desfalques_casa}",
             "impacto": impacto
         })
     
     # 4. Lesões/Suspensões - Fora
-    lesoes_fora = partida.lesoes_suspensoes_fora
-    if lesoes_fora and lesoes_fora.lower() not in ["nenhuma", "sem desfalques", "-", ""]:
+    if c.desfalques_fora:
         impacto = -2
-        if "titular" in lesoes_fora.lower() or "grave" in lesoes_fora.lower():
+        if "titular" in c.desfalques_fora.lower() or "grave" in c.desfalques_fora.lower():
             impacto = -4
         observacoes.append({
-            "texto": f"⚠ {partida.time_visitante} - Desfalques: {lesoes_fora}",
+            "texto": f"⚠ {partida.time_visitante} - Desfalques: {c.desfalques_fora}",
             "impacto": impacto
         })
     
     # 5. Artilheiro disponível
-    if not partida.artilheiro_disponivel_casa:
+    if not c.artilheiro_casa:
         observacoes.append({
             "texto": f"⚠ {partida.time_casa} sem artilheiro principal",
             "impacto": -3
         })
-    if not partida.artilheiro_disponivel_fora:
+    if not c.artilheiro_fora:
         observacoes.append({
             "texto": f"⚠ {partida.time_visitante} sem artilheiro principal",
             "impacto": -3
         })
     
     # 6. Desempenho em casa
-    if detalhes_casa["desempenho_casa_fora"] >= 8.0:
+    if scores.notas_casa.desempenho_casa_fora >= 8.0:
         observacoes.append({
             "texto": f"✓ {partida.time_casa} com forte desempenho em casa (média {partida.media_gols_marcados_casa:.1f} gols)",
             "impacto": 3
         })
     
     # 7. Desempenho fora
-    if detalhes_fora["desempenho_casa_fora"] >= 8.0:
+    if scores.notas_fora.desempenho_casa_fora >= 8.0:
         observacoes.append({
             "texto": f"✓ {partida.time_visitante} com forte desempenho fora (média {partida.media_gols_marcados_fora:.1f} gols)",
             "impacto": 3
         })
-    elif detalhes_fora["desempenho_casa_fora"] <= 3.0:
+    elif scores.notas_fora.desempenho_casa_fora <= 3.0:
         observacoes.append({
             "texto": f"⚠ {partida.time_visitante} com dificuldades jogando fora de casa",
             "impacto": -3
@@ -447,7 +982,7 @@ def gerar_observacoes_contextuais(partida: Partida, analise_data: Dict) -> List[
         })
     
     # 9. Condições adversas
-    if partida.condicoes_externas and "chuva" in partida.condicoes_externas.lower():
+    if c.condicoes_adversas:
         observacoes.append({
             "texto": f"⚠ Condições climáticas adversas: {partida.condicoes_externas}",
             "impacto": -2
@@ -497,68 +1032,42 @@ def gerar_observacoes_contextuais(partida: Partida, analise_data: Dict) -> List[
     return observacoes
 
 
-def calcular_scores_independentes(partida: Partida) -> Dict[str, Any]:
+def calcular_scores_independentes(
+    partida: Partida,
+    caracteristicas: Optional[CaracteristicasPartida] = None
+) -> ScoresV2:
     """
     VERSÃO 2.0: Calcula scores independentes para Casa, Empate e Fora
     Usa os 7 fatores com pesos ajustados que somam 100%
     """
+    c = caracteristicas or CaracteristicasPartida(partida)
     
     # ====== CÁLCULO DOS SCORES BASE (0-10) ======
     
     # 1. Forma recente (25%)
-    score_forma_casa = calcular_score_forma(partida.forma_casa)
-    score_forma_fora = calcular_score_forma(partida.forma_fora)
+    score_forma_casa = _score_forma(c.pontos_forma_casa, c.jogos_forma_casa)
+    score_forma_fora = _score_forma(c.pontos_forma_fora, c.jogos_forma_fora)
     
     # 2. Força do elenco (15%) - combinação de artilheiro + lesões (separado para casa e fora)
-    # Casa
-    artilheiro_casa = partida.artilheiro_disponivel_casa if partida.artilheiro_disponivel_casa is not None else partida.artilheiro_disponivel if partida.artilheiro_disponivel is not None else True
-    lesoes_casa = partida.lesoes_suspensoes_casa if partida.lesoes_suspensoes_casa else partida.lesoes_suspensoes if partida.lesoes_suspensoes else "Nenhuma"
-    score_artilheiro_casa = calcular_score_artilheiro(artilheiro_casa)
-    score_lesoes_casa = calcular_score_lesoes(lesoes_casa)
-    score_forca_elenco_casa = (score_artilheiro_casa + score_lesoes_casa) / 2
-    
-    # Fora
-    artilheiro_fora = partida.artilheiro_disponivel_fora if partida.artilheiro_disponivel_fora is not None else partida.artilheiro_disponivel if partida.artilheiro_disponivel is not None else True
-    lesoes_fora = partida.lesoes_suspensoes_fora if partida.lesoes_suspensoes_fora else partida.lesoes_suspensoes if partida.lesoes_suspensoes else "Nenhuma"
-    score_artilheiro_fora = calcular_score_artilheiro(artilheiro_fora)
-    score_lesoes_fora = calcular_score_lesoes(lesoes_fora)
-    score_forca_elenco_fora = (score_artilheiro_fora + score_lesoes_fora) / 2
+    score_forca_elenco_casa = (calcular_score_artilheiro(c.artilheiro_casa) + c.score_lesoes_casa) / 2
+    score_forca_elenco_fora = (calcular_score_artilheiro(c.artilheiro_fora) + c.score_lesoes_fora) / 2
     
     # 3. Desempenho casa/fora (15%) - baseado em média de gols
     score_desempenho_casa = calcular_score_xg(partida.media_gols_marcados_casa, partida.media_gols_sofridos_casa)
     score_desempenho_fora = calcular_score_xg(partida.media_gols_marcados_fora, partida.media_gols_sofridos_fora)
     
     # 4. Histórico H2H (15%)
-    score_h2h_casa = calcular_score_h2h(partida.historico_h2h, "casa")
+    score_h2h_casa = _score_h2h_casa(c.h2h_vitorias, c.h2h_empates, c.h2h_derrotas)
     score_h2h_fora = 10 - score_h2h_casa
     
-    # 5. Motivação/contexto (10%) - combinar notícias
-    noticias_combinadas = ""
-    if partida.noticia_1:
-        noticias_combinadas += partida.noticia_1 + " "
-    if partida.noticia_2:
-        noticias_combinadas += partida.noticia_2 + " "
-    if partida.noticia_3:
-        noticias_combinadas += partida.noticia_3 + " "
-    if partida.noticias_relevantes:
-        noticias_combinadas += partida.noticias_relevantes
-    
-    score_motivacao = calcular_score_motivacao(noticias_combinadas.strip())
+    # 5. Motivação/contexto (10%) - notícias combinadas
+    score_motivacao = c.score_motivacao
     
     # 6. Notas do analista (10%) - baseado em múltiplos fatores
     score_arbitro = calcular_score_arbitro(partida.media_cartoes_arbitro)
     
     # 7. Notícias/contexto externo (10%)
-    score_contexto = calcular_score_condicoes(partida.condicoes_externas)
-    
-    # ====== PESOS VERSÃO 2.0 (somam 100%) ======
-    PESO_FORMA = 0.25
-    PESO_FORCA_ELENCO = 0.15
-    PESO_DESEMPENHO = 0.15
-    PESO_H2H = 0.15
-    PESO_MOTIVACAO = 0.10
-    PESO_ANALISTA = 0.10
-    PESO_CONTEXTO = 0.10
+    score_contexto = c.score_contexto
     
     # ====== CÁLCULO SCORE CASA (0-100) ======
     score_casa = (
@@ -648,74 +1157,39 @@ def calcular_scores_independentes(partida: Partida) -> Dict[str, Any]:
             resultado_previsto = "Empate"
     
     # ====== DETALHES DOS FATORES ======
-    detalhes_casa = {
-        "forma_recente": round(score_forma_casa, 2),
-        "forca_elenco": round(score_forca_elenco_casa, 2),
-        "desempenho_casa_fora": round(score_desempenho_casa, 2),
-        "historico_h2h": round(score_h2h_casa, 2),
-        "motivacao_contexto": round(score_motivacao, 2),
-        "notas_analista": round(score_arbitro, 2),
-        "contexto_externo": round(score_contexto, 2)
-    }
-    
-    detalhes_fora = {
-        "forma_recente": round(score_forma_fora, 2),
-        "forca_elenco": round(score_forca_elenco_fora, 2),
-        "desempenho_casa_fora": round(score_desempenho_fora, 2),
-        "historico_h2h": round(score_h2h_fora, 2),
-        "motivacao_contexto": round(score_motivacao, 2),
-        "notas_analista": round(score_arbitro, 2),
-        "contexto_externo": round(score_contexto, 2)
-    }
-    
-    # ====== DETALHES PONDERADOS (com peso e valor ponderado) ======
-    pesos_dict = {
-        "forma_recente": PESO_FORMA * 100,  # 25%
-        "forca_elenco": PESO_FORCA_ELENCO * 100,  # 15%
-        "desempenho_casa_fora": PESO_DESEMPENHO * 100,  # 15%
-        "historico_h2h": PESO_H2H * 100,  # 15%
-        "motivacao_contexto": PESO_MOTIVACAO * 100,  # 10%
-        "notas_analista": PESO_ANALISTA * 100,  # 10%
-        "contexto_externo": PESO_CONTEXTO * 100  # 10%
-    }
-    
-    detalhes_casa_ponderados = {}
-    for fator, nota in detalhes_casa.items():
-        peso = pesos_dict[fator]
-        ponderado = round((nota * peso) / 10, 2)  # Valor ponderado
-        detalhes_casa_ponderados[fator] = {
-            "nota": nota,
-            "peso": peso,
-            "ponderado": ponderado
-        }
+    notas_casa = NotasFatores(
+        forma_recente=round(score_forma_casa, 2),
+        forca_elenco=round(score_forca_elenco_casa, 2),
+        desempenho_casa_fora=round(score_desempenho_casa, 2),
+        historico_h2h=round(score_h2h_casa, 2),
+        motivacao_contexto=round(score_motivacao, 2),
+        notas_analista=round(score_arbitro, 2),
+        contexto_externo=round(score_contexto, 2)
+    )
     
-    detalhes_fora_ponderados = {}
-    for fator, nota in detalhes_fora.items():
-        peso = pesos_dict[fator]
-        ponderado = round((nota * peso) / 10, 2)  # Valor ponderado
-        detalhes_fora_ponderados[fator] = {
-            "nota": nota,
-            "peso": peso,
-            "ponderado": ponderado
-        }
+    notas_fora = NotasFatores(
+        forma_recente=round(score_forma_fora, 2),
+        forca_elenco=round(score_forca_elenco_fora, 2),
+        desempenho_casa_fora=round(score_desempenho_fora, 2),
+        historico_h2h=round(score_h2h_fora, 2),
+        motivacao_contexto=round(score_motivacao, 2),
+        notas_analista=round(score_arbitro, 2),
+        contexto_externo=round(score_contexto, 2)
+    )
     
-    return {
-        "probabilidade_casa": prob_casa,
-        "probabilidade_empate": prob_empate,
-        "probabilidade_fora": prob_fora,
-        "resultado_previsto": resultado_previsto,
-        "confianca": confianca,
-        "diferenca_probabilidade": round(diferenca, 2),
-        "detalhes_casa": detalhes_casa,
-        "detalhes_fora": detalhes_fora,
-        "detalhes_casa_ponderados": detalhes_casa_ponderados,
-        "detalhes_fora_ponderados": detalhes_fora_ponderados,
-        "scores_brutos": {
-            "casa": round(score_casa, 2),
-            "empate": round(score_empate, 2),
-            "fora": round(score_fora, 2)
-        }
-    }
+    return ScoresV2(
+        probabilidade_casa=prob_casa,
+        probabilidade_empate=prob_empate,
+        probabilidade_fora=prob_fora,
+        resultado_previsto=resultado_previsto,
+        confianca=confianca,
+        diferenca_probabilidade=round(diferenca, 2),
+        notas_casa=notas_casa,
+        notas_fora=notas_fora,
+        score_casa=round(score_casa, 2),
+        score_empate=round(score_empate, 2),
+        score_fora=round(score_fora, 2)
+    )
 
 
 def calcular_score_total_mercado(partida: Partida, mercado: str) -> Dict[str, Any]:
@@ -864,14 +1338,19 @@ def classificar_ev(ev: float) -> str:
         return "Alto Valor"
 
 
-def gerar_justificativa_1x2(partida: Partida, analise_data: Dict) -> str:
+def gerar_justificativa_1x2(
+    partida: Partida,
+    scores: ScoresV2,
+    caracteristicas: Optional[CaracteristicasPartida] = None
+) -> str:
     """
     VERSÃO 2.0 APRIMORADA: Gera justificativa natural e descritiva
     Foca na explicação qualitativa sem repetir números excessivamente
     """
-    resultado = analise_data["resultado_previsto"]
-    confianca = analise_data["confianca"]
-    diferenca = analise_data["diferenca_probabilidade"]
+    c = caracteristicas or CaracteristicasPartida(partida)
+    resultado = scores.resultado_previsto
+    confianca = scores.confianca
+    diferenca = scores.diferenca_probabilidade
     
     # Caso sem recomendação segura
     if confianca == "Sem recomendação segura":
@@ -884,14 +1363,14 @@ def gerar_justificativa_1x2(partida: Partida, analise_data: Dict) -> str:
     
     # Seleciona detalhes do time correto
     if resultado == "Casa":
-        detalhes = analise_data["detalhes_casa"]
-        detalhes_oponente = analise_data["detalhes_fora"]
+        detalhes = scores.notas_casa
+        detalhes_oponente = scores.notas_fora
         time_favorito = partida.time_casa
         time_oponente = partida.time_visitante
         local = "em casa"
     elif resultado == "Fora":
-        detalhes = analise_data["detalhes_fora"]
-        detalhes_oponente = analise_data["detalhes_casa"]
+        detalhes = scores.notas_fora
+        detalhes_oponente = scores.notas_casa
         time_favorito = partida.time_visitante
         time_oponente = partida.time_casa
         local = "fora de casa"
@@ -903,7 +1382,7 @@ def gerar_justificativa_1x2(partida: Partida, analise_data: Dict) -> str:
         )
         
         # Verifica histórico
-        if "empate" in partida.historico_h2h.lower() or "e" in partida.historico_h2h.upper():
+        if c.h2h_cita_empate:
             justificativa += "O histórico de confrontos diretos reforça a tendência de igualdade. "
         
         # Confiança
@@ -918,17 +1397,17 @@ def gerar_justificativa_1x2(partida: Partida, analise_data: Dict) -> str:
     justificativa = f"O {time_favorito} apresenta "
     
     # Analisa forma recente
-    if detalhes["forma_recente"] >= 7:
-        vitorias = partida.forma_casa.upper().count('V') if resultado == "Casa" else partida.forma_fora.upper().count('V')
+    if detalhes.forma_recente >= 7:
+        vitorias = c.vitorias_forma_casa if resultado == "Casa" else c.vitorias_forma_fora
         justificativa += "excelente momento com forma recente superior"
         if vitorias >= 3:
             justificativa += " (sequência invicta)"
         justificativa += ", "
-    elif detalhes["forma_recente"] >= 5:
+    elif detalhes.forma_recente >= 5:
         justificativa += "forma recente estável, "
     
     # Analisa desempenho específico
-    if detalhes["desempenho_casa_fora"] >= 7:
+    if detalhes.desempenho_casa_fora >= 7:
         justificativa += f"forte desempenho jogando {local} "
         if resultado == "Casa":
             justificativa += f"com média de {partida.media_gols_marcados_casa:.1f} gols marcados"
@@ -937,22 +1416,22 @@ def gerar_justificativa_1x2(partida: Partida, analise_data: Dict) -> str:
         justificativa += ", "
     
     # Analisa força do elenco
-    if detalhes["forca_elenco"] >= 7:
+    if detalhes.forca_elenco >= 7:
         justificativa += "e elenco bem estruturado. "
     else:
         justificativa += "mas enfrenta problemas no elenco. "
     
     # Compara com oponente
-    diferenca_forma = detalhes["forma_recente"] - detalhes_oponente["forma_recente"]
-    diferenca_desempenho = detalhes["desempenho_casa_fora"] - detalhes_oponente["desempenho_casa_fora"]
+    diferenca_forma = detalhes.forma_recente - detalhes_oponente.forma_recente
+    diferenca_desempenho = detalhes.desempenho_casa_fora - detalhes_oponente.desempenho_casa_fora
     
     if diferenca_forma >= 2 or diferenca_desempenho >= 2:
         justificativa += f"Em contraste, o {time_oponente} "
         
-        if detalhes_oponente["forma_recente"] < 5:
+        if detalhes_oponente.forma_recente < 5:
             justificativa += "passa por momento irregular "
         
-        if detalhes_oponente["desempenho_casa_fora"] < 5:
+        if detalhes_oponente.desempenho_casa_fora < 5:
             local_oponente = "fora de casa" if resultado == "Casa" else "em casa"
             justificativa += f"e apresenta dificuldades jogando {local_oponente}. "
         else:
@@ -972,6 +1451,16 @@ def gerar_justificativa_1x2(partida: Partida, analise_data: Dict) -> str:
     return justificativa
 
 
+def recomendar_por_ev(ev: float) -> str:
+    """Recomendação de aposta a partir do EV"""
+    if ev > 0.10:
+        return "✅ Aposta de alto valor"
+    elif ev > 0:
+        return "⚡ Aposta de valor moderado"
+    else:
+        return "❌ Não recomendada"
+
+
 def analisar_mercado(partida: Partida, mercado: str, odd: float) -> Analise:
     """Analisa um mercado específico"""
     analise_data = calcular_score_total_mercado(partida, mercado)
@@ -981,13 +1470,7 @@ def analisar_mercado(partida: Partida, mercado: str, odd: float) -> Analise:
     class_prob = classificar_probabilidade(prob)
     ev = calcular_ev(prob, odd)
     class_ev = classificar_ev(ev)
-    
-    if ev > 0.10:
-        recomendacao = "✅ Aposta de alto valor"
-    elif ev > 0:
-        recomendacao = "⚡ Aposta de valor moderado"
-    else:
-        recomendacao = "❌ Não recomendada"
+    recomendacao = recomendar_por_ev(ev)
     
     justificativa = gerar_justificativa(partida, mercado, analise_data)
     
@@ -1009,41 +1492,52 @@ def analisar_1x2_v2(partida: Partida) -> Analise1X2:
     """
     VERSÃO 2.0: Analisa mercado 1X2 com probabilidades normalizadas
     """
+    # Interpreta os campos textuais uma única vez
+    caracteristicas = CaracteristicasPartida(partida)
+    
     # Calcula probabilidades coerentes
-    analise_data = calcular_scores_independentes(partida)
+    with medir_etapa("pontuacao"):
+        scores = calcular_scores_independentes(partida, caracteristicas)
     
     # Calcula EV (Expected Value) para cada mercado
-    prob_casa = analise_data["probabilidade_casa"]
-    prob_empate = analise_data["probabilidade_empate"]
-    prob_fora = analise_data["probabilidade_fora"]
-    
-    ev_casa = calcular_ev(prob_casa, partida.odd_casa)
-    ev_empate = calcular_ev(prob_empate, partida.odd_empate)
-    ev_fora = calcular_ev(prob_fora, partida.odd_fora)
+    ev_casa = calcular_ev(scores.probabilidade_casa, partida.odd_casa)
+    ev_empate = calcular_ev(scores.probabilidade_empate, partida.odd_empate)
+    ev_fora = calcular_ev(scores.probabilidade_fora, partida.odd_fora)
     
     # Gera justificativa
-    justificativa = gerar_justificativa_1x2(partida, analise_data)
+    with medir_etapa("justificativa"):
+        justificativa = gerar_justificativa_1x2(partida, scores, caracteristicas)
     
     # Gera observações contextuais automáticas
-    observacoes = gerar_observacoes_contextuais(partida, analise_data)
+    with medir_etapa("observacoes"):
+        observacoes = gerar_observacoes_contextuais(partida, scores, caracteristicas)
+    # Impactos gerados aqui já são inteiros; os manuais sempre passam pela validação
     observacoes_formatadas = [
-        ObservacaoContextual(texto=obs["texto"], impacto=obs["impacto"])
+        construir_modelo(ObservacaoContextual, texto=obs["texto"], impacto=obs["impacto"])
+        if type(obs["impacto"]) is int
+        else ObservacaoContextual(texto=obs["texto"], impacto=obs["impacto"])
         for obs in observacoes
     ]
     
-    return Analise1X2(
-        probabilidade_casa=prob_casa,
-        probabilidade_empate=prob_empate,
-        probabilidade_fora=prob_fora,
-        resultado_previsto=analise_data["resultado_previsto"],
-        confianca=analise_data["confianca"],
-        diferenca_probabilidade=analise_data["diferenca_probabilidade"],
+    # Todos os campos são produzidos internamente com os tipos certos
+    return construir_modelo(
+        Analise1X2,
+        probabilidade_casa=scores.probabilidade_casa,
+        probabilidade_empate=scores.probabilidade_empate,
+        probabilidade_fora=scores.probabilidade_fora,
+        resultado_previsto=scores.resultado_previsto,
+        confianca=scores.confianca,
+        diferenca_probabilidade=scores.diferenca_probabilidade,
         justificativa=justificativa,
-        detalhes_casa=analise_data["detalhes_casa"],
-        detalhes_fora=analise_data["detalhes_fora"],
-        detalhes_casa_ponderados=analise_data["detalhes_casa_ponderados"],
-        detalhes_fora_ponderados=analise_data["detalhes_fora_ponderados"],
-        scores_brutos=analise_data["scores_brutos"],
+        detalhes_casa=scores.notas_casa.como_dict(),
+        detalhes_fora=scores.notas_fora.como_dict(),
+        detalhes_casa_ponderados=scores.notas_casa.ponderados(),
+        detalhes_fora_ponderados=scores.notas_fora.ponderados(),
+        scores_brutos={
+            "casa": scores.score_casa,
+            "empate": scores.score_empate,
+            "fora": scores.score_fora
+        },
         ev_casa=ev_casa,
         ev_empate=ev_empate,
         ev_fora=ev_fora,
@@ -1059,19 +1553,15 @@ def analisar_partida_completa(partida: Partida) -> AnaliseCompleta:
         ("Casa", partida.odd_casa),
         ("Empate", partida.odd_empate),
         ("Fora", partida.odd_fora),
-        ("Casa ou Empate", 1.30),  # Odds estimadas
-        ("Fora ou Empate", 1.50),
-        ("Casa ou Fora", 1.25),
-        ("Ambos Marcam", 1.85),
-        ("Acima 1.5 gols", 1.50),
-        ("Acima 2.5 gols", 2.00),
-        ("Abaixo 2.5 gols", 1.70)
     ]
     
     analises = []
     for mercado, odd in mercados:
         analise = analisar_mercado(partida, mercado, odd)
         analises.append(analise)
+
+    # Mercados de gols e dupla chance: matriz de placares (Poisson)
+    analises.extend(analisar_mercados_gols([partida])[0])
     
     # Ordena por EV (maior primeiro)
     analises_ordenadas = sorted(analises, key=lambda x: x.ev, reverse=True)
@@ -1084,19 +1574,1104 @@ def analisar_partida_completa(partida: Partida) -> AnaliseCompleta:
     )
 
 
-def analisar_partida_v2(partida: Partida) -> AnaliseCompletaV2:
+def analisar_partida_v2(
+    partida: Partida,
+    outras_analises: Optional[List[Analise]] = None
+) -> AnaliseCompletaV2:
     """
     VERSÃO 2.0: Análise completa com foco em 1X2 coerente
+    - outras_analises: mercados de gols já calculados em lote (senão calcula aqui)
     """
     analise_1x2 = analisar_1x2_v2(partida)
+    if outras_analises is None:
+        outras_analises = analisar_mercados_gols([partida])[0]
     
-    return AnaliseCompletaV2(
+    return construir_modelo(
+        AnaliseCompletaV2,
         partida=partida,
         analise_1x2=analise_1x2,
-        outras_analises=None  # Será expandido futuramente
+        outras_analises=outras_analises
+    )
+
+
+# ================ MOTOR VETORIZADO (LOTE) - VERSÃO 2.0 ================
+# Mesma lógica de calcular_scores_independentes, aplicada a N partidas de uma vez
+# com arrays NumPy. As operações seguem exatamente a mesma ordem do cálculo
+# individual para que os resultados sejam idênticos.
+
+CONFIANCAS_V2 = np.array(["Sem recomendação segura", "Baixa", "Média", "Alta"], dtype=object)
+RESULTADOS_V2 = np.array(["Sem recomendação", "Casa", "Empate", "Fora"], dtype=object)
+
+
+def arredondar_lote(valores: np.ndarray, casas: int) -> np.ndarray:
+    """
+    Arredonda como o round() do Python.
+    np.round pode divergir em valores próximos de x.xx5; esses casos
+    (raros) são refeitos individualmente com round().
+    """
+    escala = 10.0 ** casas
+    escalados = valores * escala
+    resultado = np.rint(escalados) / escala
+
+    ambiguos = np.nonzero(np.abs(escalados - np.floor(escalados) - 0.5) < 1e-6)[0]
+    for i in ambiguos:
+        resultado[i] = round(float(valores[i]), casas)
+
+    return resultado
+
+
+def extrair_colunas_lote(partidas: List[Partida]) -> Dict[str, np.ndarray]:
+    """
+    Converte N partidas em colunas numéricas (via CaracteristicasPartida).
+    Fatores textuais (lesões, motivação, condições) já saem como score 0-10.
+    """
+    n = len(partidas)
+    colunas = {
+        nome: np.empty(n, dtype=np.float64)
+        for nome in [
+            "pontos_forma_casa", "jogos_forma_casa", "pontos_forma_fora", "jogos_forma_fora",
+            "media_gols_marcados_casa", "media_gols_sofridos_casa",
+            "media_gols_marcados_fora", "media_gols_sofridos_fora",
+            "h2h_vitorias", "h2h_empates", "h2h_derrotas",
+            "media_cartoes_arbitro",
+            "score_artilheiro_casa", "score_lesoes_casa",
+            "score_artilheiro_fora", "score_lesoes_fora",
+            "score_motivacao", "score_contexto",
+            "odd_casa", "odd_empate", "odd_fora",
+        ]
+    }
+
+    for i, partida in enumerate(partidas):
+        c = CaracteristicasPartida(partida)
+
+        colunas["pontos_forma_casa"][i] = c.pontos_forma_casa
+        colunas["jogos_forma_casa"][i] = c.jogos_forma_casa
+        colunas["pontos_forma_fora"][i] = c.pontos_forma_fora
+        colunas["jogos_forma_fora"][i] = c.jogos_forma_fora
+
+        colunas["h2h_vitorias"][i] = c.h2h_vitorias
+        colunas["h2h_empates"][i] = c.h2h_empates
+        colunas["h2h_derrotas"][i] = c.h2h_derrotas
+
+        colunas["score_artilheiro_casa"][i] = calcular_score_artilheiro(c.artilheiro_casa)
+        colunas["score_lesoes_casa"][i] = c.score_lesoes_casa
+        colunas["score_artilheiro_fora"][i] = calcular_score_artilheiro(c.artilheiro_fora)
+        colunas["score_lesoes_fora"][i] = c.score_lesoes_fora
+
+        colunas["score_motivacao"][i] = c.score_motivacao
+        colunas["score_contexto"][i] = c.score_contexto
+
+        colunas["media_gols_marcados_casa"][i] = partida.media_gols_marcados_casa
+        colunas["media_gols_sofridos_casa"][i] = partida.media_gols_sofridos_casa
+        colunas["media_gols_marcados_fora"][i] = partida.media_gols_marcados_fora
+        colunas["media_gols_sofridos_fora"][i] = partida.media_gols_sofridos_fora
+        colunas["media_cartoes_arbitro"][i] = partida.media_cartoes_arbitro
+        colunas["odd_casa"][i] = partida.odd_casa
+        colunas["odd_empate"][i] = partida.odd_empate
+        colunas["odd_fora"][i] = partida.odd_fora
+
+    return colunas
+
+
+def _score_forma_lote(pontos: np.ndarray, jogos: np.ndarray) -> np.ndarray:
+    """Versão vetorizada de calcular_score_forma (forma vazia = 5.0)"""
+    max_pontos = jogos * 3
+    com_jogos = max_pontos > 0
+    score = np.full(pontos.shape, 5.0)
+    score[com_jogos] = arredondar_lote((pontos[com_jogos] / max_pontos[com_jogos]) * 10, 2)
+    return score
+
+
+def _score_xg_lote(marcados: np.ndarray, sofridos: np.ndarray) -> np.ndarray:
+    """Versão vetorizada de calcular_score_xg"""
+    saldo = marcados - sofridos
+    return np.select(
+        [saldo >= 1.5, saldo >= 0.8, saldo >= 0, saldo >= -0.8],
+        [9.0, 7.5, 6.0, 4.0],
+        default=2.0
+    )
+
+
+def calcular_notas_lote(colunas: Dict[str, np.ndarray]) -> Dict[str, Dict[str, np.ndarray]]:
+    """Calcula as notas (0-10) dos 7 fatores para casa e fora a partir das colunas"""
+    # 1. Forma recente
+    score_forma_casa = _score_forma_lote(colunas["pontos_forma_casa"], colunas["jogos_forma_casa"])
+    score_forma_fora = _score_forma_lote(colunas["pontos_forma_fora"], colunas["jogos_forma_fora"])
+
+    # 2. Força do elenco
+    score_forca_elenco_casa = (colunas["score_artilheiro_casa"] + colunas["score_lesoes_casa"]) / 2
+    score_forca_elenco_fora = (colunas["score_artilheiro_fora"] + colunas["score_lesoes_fora"]) / 2
+
+    # 3. Desempenho casa/fora
+    score_desempenho_casa = _score_xg_lote(colunas["media_gols_marcados_casa"], colunas["media_gols_sofridos_casa"])
+    score_desempenho_fora = _score_xg_lote(colunas["media_gols_marcados_fora"], colunas["media_gols_sofridos_fora"])
+
+    # 4. Histórico H2H
+    vitorias = colunas["h2h_vitorias"]
+    empates = colunas["h2h_empates"]
+    total = vitorias + colunas["h2h_derrotas"] + empates
+    com_h2h = total > 0
+    score_h2h_casa = np.full(total.shape, 5.0)
+    pontos = vitorias[com_h2h] * 3 + empates[com_h2h] * 1
+    score_h2h_casa[com_h2h] = arredondar_lote((pontos / (total[com_h2h] * 3)) * 10, 2)
+    score_h2h_fora = 10 - score_h2h_casa
+
+    # 6. Árbitro
+    cartoes = colunas["media_cartoes_arbitro"]
+    score_arbitro = np.select([cartoes < 3, cartoes < 5], [7.0, 5.0], default=3.0)
+
+    comuns = {
+        "motivacao_contexto": colunas["score_motivacao"],
+        "notas_analista": score_arbitro,
+        "contexto_externo": colunas["score_contexto"],
+    }
+
+    return {
+        "casa": {
+            "forma_recente": score_forma_casa,
+            "forca_elenco": score_forca_elenco_casa,
+            "desempenho_casa_fora": score_desempenho_casa,
+            "historico_h2h": score_h2h_casa,
+            **comuns,
+        },
+        "fora": {
+            "forma_recente": score_forma_fora,
+            "forca_elenco": score_forca_elenco_fora,
+            "desempenho_casa_fora": score_desempenho_fora,
+            "historico_h2h": score_h2h_fora,
+            **comuns,
+        },
+    }
+
+
+def calcular_probabilidades_lote(notas: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Scores, probabilidades normalizadas, confiança e resultado previsto para N partidas.
+    Recebe as notas por fator (ver calcular_notas_lote) e devolve arrays de tamanho N.
+    """
+    casa = notas["casa"]
+    fora = notas["fora"]
+
+    score_casa = (
+        casa["forma_recente"] * PESO_FORMA * 10 +
+        casa["forca_elenco"] * PESO_FORCA_ELENCO * 10 +
+        casa["desempenho_casa_fora"] * PESO_DESEMPENHO * 10 +
+        casa["historico_h2h"] * PESO_H2H * 10 +
+        casa["motivacao_contexto"] * PESO_MOTIVACAO * 10 +
+        casa["notas_analista"] * PESO_ANALISTA * 10 +
+        casa["contexto_externo"] * PESO_CONTEXTO * 10
+    )
+
+    score_fora = (
+        fora["forma_recente"] * PESO_FORMA * 10 +
+        fora["forca_elenco"] * PESO_FORCA_ELENCO * 10 +
+        fora["desempenho_casa_fora"] * PESO_DESEMPENHO * 10 +
+        fora["historico_h2h"] * PESO_H2H * 10 +
+        fora["motivacao_contexto"] * PESO_MOTIVACAO * 10 +
+        fora["notas_analista"] * PESO_ANALISTA * 10 +
+        fora["contexto_externo"] * PESO_CONTEXTO * 10
+    )
+
+    # Empate favorecido quando times estão equilibrados
+    score_forma_empate = 10 - np.abs(casa["forma_recente"] - fora["forma_recente"])
+    score_desempenho_empate = 10 - np.abs(casa["desempenho_casa_fora"] - fora["desempenho_casa_fora"])
+    score_h2h_empate = 5.0
+    score_forca_elenco_empate = (casa["forca_elenco"] + fora["forca_elenco"]) / 2
+
+    score_empate = (
+        score_forma_empate * PESO_FORMA * 10 +
+        score_forca_elenco_empate * PESO_FORCA_ELENCO * 10 +
+        score_desempenho_empate * PESO_DESEMPENHO * 10 +
+        score_h2h_empate * PESO_H2H * 10 +
+        casa["motivacao_contexto"] * PESO_MOTIVACAO * 10 +
+        casa["notas_analista"] * PESO_ANALISTA * 10 +
+        casa["contexto_externo"] * PESO_CONTEXTO * 10
+    )
+
+    # Normalização para somar 100%
+    total_scores = score_casa + score_empate + score_fora
+    positivo = total_scores > 0
+    divisor = np.where(positivo, total_scores, 1.0)
+    prob_casa = np.where(positivo, (score_casa / divisor) * 100, 33.33)
+    prob_empate = np.where(positivo, (score_empate / divisor) * 100, 33.33)
+
+    prob_casa = arredondar_lote(prob_casa, 2)
+    prob_empate = arredondar_lote(prob_empate, 2)
+    prob_fora = arredondar_lote(100 - prob_casa - prob_empate, 2)
+
+    # Confiança (limite 5%)
+    ordenadas = np.sort(np.stack([prob_casa, prob_empate, prob_fora], axis=1), axis=1)
+    diferenca = ordenadas[:, 2] - ordenadas[:, 1]
+
+    indice_confianca = np.select([diferenca < 5, diferenca >= 20, diferenca >= 10], [0, 3, 2], default=1)
+    indice_resultado = np.select(
+        [
+            diferenca < 5,
+            (prob_casa > prob_empate) & (prob_casa > prob_fora),
+            (prob_fora > prob_casa) & (prob_fora > prob_empate),
+        ],
+        [0, 1, 3],
+        default=2
+    )
+
+    return {
+        "probabilidade_casa": prob_casa,
+        "probabilidade_empate": prob_empate,
+        "probabilidade_fora": prob_fora,
+        "resultado_previsto": RESULTADOS_V2[indice_resultado],
+        "confianca": CONFIANCAS_V2[indice_confianca],
+        "diferenca_probabilidade": arredondar_lote(diferenca, 2),
+        "score_casa": arredondar_lote(score_casa, 2),
+        "score_empate": arredondar_lote(score_empate, 2),
+        "score_fora": arredondar_lote(score_fora, 2),
+    }
+
+
+def calcular_ev_lote(prob: np.ndarray, odd: np.ndarray) -> np.ndarray:
+    """Versão vetorizada de calcular_ev"""
+    return arredondar_lote((prob / 100 * odd) - 1, 4)
+
+
+def analisar_1x2_lote(partidas: List[Partida]) -> Dict[str, np.ndarray]:
+    """
+    VERSÃO 2.0 (LOTE): probabilidades, confiança e EVs de N partidas em uma passada.
+    Resultados idênticos a calcular_scores_independentes + calcular_ev.
+    """
+    colunas = extrair_colunas_lote(partidas)
+    notas = calcular_notas_lote(colunas)
+    resultado = calcular_probabilidades_lote(notas)
+
+    resultado["ev_casa"] = calcular_ev_lote(resultado["probabilidade_casa"], colunas["odd_casa"])
+    resultado["ev_empate"] = calcular_ev_lote(resultado["probabilidade_empate"], colunas["odd_empate"])
+    resultado["ev_fora"] = calcular_ev_lote(resultado["probabilidade_fora"], colunas["odd_fora"])
+    resultado["notas_casa"] = notas["casa"]
+    resultado["notas_fora"] = notas["fora"]
+
+    return resultado
+
+
+# ================ MODELO DE GOLS (POISSON) ================
+# Gols de cada time ~ Poisson independentes. A média esperada combina o ataque
+# de um time com a defesa do adversário; a matriz de placares (0..MAX_GOLS
+# para cada lado) é calculada uma vez por partida e todos os mercados
+# secundários (gols e dupla chance) são lidos dela com máscaras, para N
+# partidas de uma vez.
+
+MAX_GOLS = 10
+GOLS_ESPERADOS_MINIMO = 0.05  # evita λ = 0 quando as médias informadas são zero
+
+_GOLS_CASA, _GOLS_FORA = np.indices((MAX_GOLS + 1, MAX_GOLS + 1))
+_LOG_FATORIAIS = np.array([math.lgamma(k + 1) for k in range(MAX_GOLS + 1)])
+
+# (mercado, campo da odd na partida, odd estimada quando ausente, placares que ganham)
+MERCADOS_GOLS = [
+    ("Ambos Marcam", "odd_ambos_marcam", 1.85, (_GOLS_CASA >= 1) & (_GOLS_FORA >= 1)),
+    ("Acima 1.5 gols", "odd_acima_1_5", 1.50, _GOLS_CASA + _GOLS_FORA >= 2),
+    ("Acima 2.5 gols", "odd_acima_2_5", 2.00, _GOLS_CASA + _GOLS_FORA >= 3),
+    ("Abaixo 2.5 gols", "odd_abaixo_2_5", 1.70, _GOLS_CASA + _GOLS_FORA <= 2),
+    ("Casa ou Empate", "odd_casa_empate", 1.30, _GOLS_CASA >= _GOLS_FORA),
+    ("Fora ou Empate", "odd_fora_empate", 1.50, _GOLS_CASA <= _GOLS_FORA),
+    ("Casa ou Fora", "odd_casa_fora", 1.25, _GOLS_CASA != _GOLS_FORA),
+]
+MASCARAS_MERCADOS_GOLS = np.stack([mascara for *_, mascara in MERCADOS_GOLS]).astype(float)
+
+
+def calcular_gols_esperados_lote(
+    marcados_casa: np.ndarray,
+    sofridos_casa: np.ndarray,
+    marcados_fora: np.ndarray,
+    sofridos_fora: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """λ de cada time: média entre os gols que marca e os que o adversário sofre"""
+    lambda_casa = np.maximum((marcados_casa + sofridos_fora) / 2, GOLS_ESPERADOS_MINIMO)
+    lambda_fora = np.maximum((marcados_fora + sofridos_casa) / 2, GOLS_ESPERADOS_MINIMO)
+    return lambda_casa, lambda_fora
+
+
+def _poisson_lote(lambdas: np.ndarray) -> np.ndarray:
+    """P(k gols), k = 0..MAX_GOLS, para cada λ: matriz (N, MAX_GOLS + 1)"""
+    gols = np.arange(MAX_GOLS + 1)
+    return np.exp(gols * np.log(lambdas)[:, None] - lambdas[:, None] - _LOG_FATORIAIS)
+
+
+def matriz_placares_lote(lambda_casa: np.ndarray, lambda_fora: np.ndarray) -> np.ndarray:
+    """
+    Probabilidade de cada placar (casa x fora) de N partidas: (N, MAX_GOLS + 1, MAX_GOLS + 1).
+    A massa acima de MAX_GOLS (desprezível) é redistribuída para a matriz somar 1.
+    """
+    matriz = _poisson_lote(lambda_casa)[:, :, None] * _poisson_lote(lambda_fora)[:, None, :]
+    return matriz / matriz.sum(axis=(1, 2), keepdims=True)
+
+
+def analisar_mercados_gols_lote(partidas: List[Partida]) -> Dict[str, np.ndarray]:
+    """
+    Probabilidades (%), odds e EVs dos mercados de gols de N partidas.
+    Colunas na ordem de MERCADOS_GOLS; uma matriz de placares por partida.
+    """
+    def coluna(campo: str) -> np.ndarray:
+        return np.array([getattr(partida, campo) for partida in partidas], dtype=float)
+
+    lambda_casa, lambda_fora = calcular_gols_esperados_lote(
+        coluna("media_gols_marcados_casa"),
+        coluna("media_gols_sofridos_casa"),
+        coluna("media_gols_marcados_fora"),
+        coluna("media_gols_sofridos_fora"),
+    )
+    matriz = matriz_placares_lote(lambda_casa, lambda_fora)
+    probabilidades = np.einsum("nij,mij->nm", matriz, MASCARAS_MERCADOS_GOLS) * 100
+
+    informadas = np.array(
+        [[getattr(partida, campo) for _, campo, _, _ in MERCADOS_GOLS] for partida in partidas],
+        dtype=float
+    ).reshape(len(partidas), len(MERCADOS_GOLS))
+    estimadas = np.array([odd_estimada for _, _, odd_estimada, _ in MERCADOS_GOLS])
+    odd_estimada = np.isnan(informadas)
+    odds = np.where(odd_estimada, estimadas, informadas)
+
+    formato = probabilidades.shape
+    probabilidades = arredondar_lote(probabilidades.ravel(), 2).reshape(formato)
+    evs = arredondar_lote(((probabilidades / 100 * odds) - 1).ravel(), 4).reshape(formato)
+
+    return {
+        "gols_esperados_casa": lambda_casa,
+        "gols_esperados_fora": lambda_fora,
+        "probabilidades": probabilidades,
+        "odds": odds,
+        "odd_estimada": odd_estimada,
+        "evs": evs,
+    }
+
+
+def analisar_mercados_gols(partidas: List[Partida]) -> List[List[Analise]]:
+    """Análises dos mercados secundários (Ambos Marcam, Acima/Abaixo, dupla chance) de cada partida"""
+    resultado = analisar_mercados_gols_lote(partidas)
+
+    analises = []
+    for n, partida in enumerate(partidas):
+        gols_casa = round(float(resultado["gols_esperados_casa"][n]), 2)
+        gols_fora = round(float(resultado["gols_esperados_fora"][n]), 2)
+        analises_partida = []
+        for m, (mercado, _, _, _) in enumerate(MERCADOS_GOLS):
+            prob = float(resultado["probabilidades"][n, m])
+            odd = float(resultado["odds"][n, m])
+            ev = float(resultado["evs"][n, m])
+            odd_estimada = bool(resultado["odd_estimada"][n, m])
+            odd_justa = round(100 / prob, 2) if prob > 0 else None
+
+            justificativa = (
+                f"Gols esperados (Poisson): {partida.time_casa} {gols_casa:.2f} x "
+                f"{gols_fora:.2f} {partida.time_visitante} (total {gols_casa + gols_fora:.2f})\n"
+                f"Probabilidade de {mercado}: {prob:.1f}%"
+            )
+            if odd_justa is not None:
+                justificativa += f" (odd justa {odd_justa:.2f})"
+            if odd_estimada:
+                justificativa += f"\n⚠ Odd do mercado não informada: EV calculado com odd estimada {odd:.2f}"
+
+            analises_partida.append(construir_modelo(
+                Analise,
+                mercado=mercado,
+                probabilidade=prob,
+                classificacao_prob=classificar_probabilidade(prob),
+                odd=odd,
+                ev=ev,
+                classificacao_ev=classificar_ev(ev),
+                recomendacao=recomendar_por_ev(ev),
+                justificativa=justificativa,
+                score_total=prob,
+                detalhes_scores={
+                    "gols_esperados_casa": gols_casa,
+                    "gols_esperados_fora": gols_fora,
+                    "odd_justa": odd_justa,
+                    "odd_estimada": odd_estimada,
+                },
+            ))
+        analises.append(analises_partida)
+
+    return analises
+
+
+# ================ SENSIBILIDADE (WHAT-IF) ================
+# Cada variante (fator, lado, delta) é uma linha do lote: as notas da partida
+# são replicadas, cada linha recebe sua alteração e tudo passa uma única vez
+# por calcular_probabilidades_lote. Como as probabilidades não dependem das
+# odds, a grade de odds só recalcula o EV sobre as probabilidades da base.
+
+MERCADOS_1X2 = ("casa", "empate", "fora")
+
+# Lados que cada fator pode variar; H2H fora é sempre 10 - H2H casa
+LADOS_FATORES_V2 = {
+    "forma_recente": ("casa", "fora"),
+    "forca_elenco": ("casa", "fora"),
+    "desempenho_casa_fora": ("casa", "fora"),
+    "historico_h2h": ("casa",),
+    "motivacao_contexto": ("ambos",),
+    "notas_analista": ("ambos",),
+    "contexto_externo": ("ambos",),
+}
+
+
+def calcular_sensitividade(
+    partida: Partida,
+    fatores: List[str],
+    deltas_notas: List[float],
+    variacoes_odds: List[float]
+) -> Dict[str, Any]:
+    """
+    Probabilidades e EVs da partida para cada variação de nota (linha 0 = base)
+    e EV de cada mercado para cada variação de odd.
+    """
+    notas_base = calcular_notas_lote(extrair_colunas_lote([partida]))
+    variantes = [(None, None, 0.0)] + [
+        (fator, lado, delta)
+        for fator in fatores
+        for lado in LADOS_FATORES_V2[fator]
+        for delta in deltas_notas
+    ]
+
+    total = len(variantes)
+    notas = {
+        lado: {fator: np.repeat(notas_base[lado][fator], total) for fator in FATORES_V2}
+        for lado in ("casa", "fora")
+    }
+    for i, (fator, lado, delta) in enumerate(variantes[1:], start=1):
+        for lado_nota in ("casa", "fora"):
+            if lado in (lado_nota, "ambos"):
+                notas[lado_nota][fator][i] = min(10.0, max(0.0, notas[lado_nota][fator][i] + delta))
+        if fator == "historico_h2h":
+            notas["fora"][fator][i] = 10 - notas["casa"][fator][i]
+
+    resultado = calcular_probabilidades_lote(notas)
+    odds_atuais = {mercado: getattr(partida, f"odd_{mercado}") for mercado in MERCADOS_1X2}
+    for mercado in MERCADOS_1X2:
+        resultado[f"ev_{mercado}"] = calcular_ev_lote(
+            resultado[f"probabilidade_{mercado}"], np.full(total, odds_atuais[mercado])
+        )
+
+    # Grade de odds: todos os mercados x variações em um único cálculo de EV
+    variacoes = np.array(variacoes_odds, dtype=float)
+    grade_mercados = np.repeat(np.array(MERCADOS_1X2, dtype=object), len(variacoes))
+    grade_variacoes = np.tile(variacoes, len(MERCADOS_1X2))
+    grade_odds = arredondar_lote(
+        np.array([odds_atuais[mercado] for mercado in grade_mercados], dtype=float) * (1 + grade_variacoes), 2
+    )
+    grade_probabilidades = np.array(
+        [resultado[f"probabilidade_{mercado}"][0] for mercado in grade_mercados], dtype=float
+    )
+
+    return {
+        "variantes": variantes,
+        "notas_casa": notas["casa"],
+        "notas_fora": notas["fora"],
+        "resultado": resultado,
+        "odds": {
+            "mercado": grade_mercados,
+            "variacao": grade_variacoes,
+            "odd": grade_odds,
+            "ev": calcular_ev_lote(grade_probabilidades, grade_odds),
+        },
+    }
+
+
+# ================ SERIALIZAÇÃO ================
+
+def _padrao_json(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def codificar_json(conteudo: Any) -> bytes:
+    """Codifica dicts/listas já prontos direto para bytes (orjson quando disponível)"""
+    if orjson is not None:
+        return orjson.dumps(conteudo, default=_padrao_json)
+    return json.dumps(conteudo, default=_padrao_json, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def resposta_json(conteudo: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Resposta JSON sem passar pelo response_model nem pelo jsonable_encoder"""
+    if isinstance(conteudo, BaseModel):
+        corpo = conteudo.model_dump_json().encode("utf-8")
+    else:
+        corpo = codificar_json(conteudo)
+    return Response(content=corpo, media_type="application/json", headers=headers)
+
+
+ADAPTADOR_PARTIDAS = TypeAdapter(List[Partida])
+ADAPTADOR_RESULTADOS_BUSCA = TypeAdapter(List[ResultadoBusca])
+
+
+def resposta_documentos(adaptador: TypeAdapter, documentos: List[Dict[str, Any]],
+                        headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Resposta rápida para documentos lidos do MongoDB: a mesma validação do
+    response_model (padrões em documentos legados, campos internos como
+    odds_registradas_em descartados, datas no formato do pydantic), mas
+    serializada direto em bytes pelo pydantic-core, sem o jsonable_encoder
+    e o json.dumps do FastAPI. Bytes idênticos aos do caminho padrão.
+    """
+    corpo = adaptador.dump_json(adaptador.validate_python(documentos))
+    return Response(content=corpo, media_type="application/json", headers=headers)
+
+
+# ================ CACHE DE ANÁLISES ================
+# Cache em memória das análises V2, endereçado pelo conteúdo da partida.
+# A chave é o hash dos campos da partida + versão do modelo, então qualquer
+# alteração nos dados gera uma chave nova. Cada partida tem no máximo uma
+# entrada, e a leitura em GET /analise-v2 é feita pelo partida_id, antes de
+# ir ao MongoDB: por isso toda gravação da partida invalida explicitamente a
+# entrada dela (invalidar_analise).
+
+class CacheAnalises:
+    """Cache LRU de AnaliseCompletaV2 limitado por número de entradas e bytes"""
+
+    def __init__(self, max_entradas: int, max_bytes: int):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas: "OrderedDict[str, tuple]" = OrderedDict()  # chave -> (analise, tamanho, partida_id)
+        self._chaves_por_partida: Dict[str, str] = {}
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self.invalidacoes = 0
+
+    @staticmethod
+    def gerar_chave(partida_dict: Dict[str, Any]) -> str:
+        """Hash SHA-256 dos campos da partida + versão do modelo"""
+        campos = {k: v for k, v in partida_dict.items() if k != "_id"}
+        conteudo = json.dumps(campos, sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(f"{VERSAO_MODELO}|{conteudo}".encode("utf-8")).hexdigest()
+
+    def obter(self, chave: str) -> Optional[AnaliseCompletaV2]:
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            self.falhas += 1
+            return None
+
+        self._entradas.move_to_end(chave)
+        self.acertos += 1
+        return entrada[0]
+
+    def obter_por_partida(self, partida_id: str) -> Optional[AnaliseCompletaV2]:
+        """Entrada atual da partida (sem consultar o documento no MongoDB)"""
+        chave = self._chaves_por_partida.get(partida_id)
+        if chave is None:
+            self.falhas += 1
+            return None
+        return self.obter(chave)
+
+    def guardar(self, chave: str, partida_id: str, analise: AnaliseCompletaV2) -> None:
+        tamanho = len(analise.model_dump_json())
+        if tamanho > self.max_bytes:
+            return
+
+        # Uma entrada por partida: versão anterior (se houver) é descartada
+        self.invalidar(partida_id, contar=False)
+        self._remover(chave)
+
+        self._entradas[chave] = (analise, tamanho, partida_id)
+        self._chaves_por_partida[partida_id] = chave
+        self.bytes_usados += tamanho
+
+        while len(self._entradas) > self.max_entradas or self.bytes_usados > self.max_bytes:
+            chave_antiga = next(iter(self._entradas))
+            self._remover(chave_antiga)
+            self.remocoes += 1
+
+    def invalidar(self, partida_id: str, contar: bool = True) -> None:
+        chave = self._chaves_por_partida.get(partida_id)
+        if chave is not None:
+            self._remover(chave)
+            if contar:
+                self.invalidacoes += 1
+
+    def _remover(self, chave: str) -> None:
+        entrada = self._entradas.pop(chave, None)
+        if entrada is None:
+            return
+
+        _, tamanho, partida_id = entrada
+        self.bytes_usados -= tamanho
+        if self._chaves_por_partida.get(partida_id) == chave:
+            del self._chaves_por_partida[partida_id]
+
+    def estatisticas(self) -> Dict[str, Any]:
+        consultas = self.acertos + self.falhas
+        return {
+            "versao_modelo": VERSAO_MODELO,
+            "entradas": len(self._entradas),
+            "max_entradas": self.max_entradas,
+            "bytes_usados": self.bytes_usados,
+            "max_bytes": self.max_bytes,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+            "remocoes_lru": self.remocoes,
+            "invalidacoes": self.invalidacoes,
+        }
+
+
+cache_analises = CacheAnalises(
+    max_entradas=int(os.environ.get('CACHE_ANALISE_MAX_ENTRADAS', '5000')),
+    max_bytes=int(os.environ.get('CACHE_ANALISE_MAX_BYTES', str(64 * 1024 * 1024)))
+)
+
+
+# ================ COALESCÊNCIA DE REQUISIÇÕES (SINGLE-FLIGHT) ================
+# Requisições simultâneas da mesma análise aguardam uma única execução: uma
+# rajada de N clientes custa uma leitura no banco, um cálculo e uma
+# serialização. A entrada sai do mapa assim que a execução termina (não é
+# cache) e é esquecida quando a partida muda, para que quem chega depois de
+# uma alteração não receba o resultado calculado antes dela.
+
+class ChamadasCoalescidas:
+    """Execuções assíncronas em andamento, compartilhadas por chave"""
+
+    def __init__(self):
+        self._em_andamento: Dict[Any, asyncio.Task] = {}
+        self.execucoes = 0
+        self.coalescidas = 0
+
+    async def executar(self, chave: Any, funcao: Callable[[], Awaitable[Any]]) -> Any:
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(funcao())
+            self._em_andamento[chave] = tarefa
+            tarefa.add_done_callback(lambda _: self._encerrar(chave, tarefa))
+            self.execucoes += 1
+        else:
+            self.coalescidas += 1
+        # shield: um cliente que desconecta não cancela a execução dos demais
+        return await asyncio.shield(tarefa)
+
+    def _encerrar(self, chave: Any, tarefa: asyncio.Task) -> None:
+        if self._em_andamento.get(chave) is tarefa:
+            del self._em_andamento[chave]
+        if not tarefa.cancelled():
+            tarefa.exception()  # marca como lida se todos os clientes desistiram
+
+    def esquecer(self, chave: Any) -> None:
+        """Novas chamadas com a chave iniciam outra execução (as em andamento seguem)"""
+        self._em_andamento.pop(chave, None)
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {
+            "em_andamento": len(self._em_andamento),
+            "execucoes": self.execucoes,
+            "coalescidas": self.coalescidas,
+        }
+
+
+analises_em_andamento = ChamadasCoalescidas()
+
+
+def invalidar_analise(partida_id: str) -> None:
+    """A partida mudou: descarta a análise do cache e a execução em andamento"""
+    cache_analises.invalidar(partida_id)
+    analises_em_andamento.esquecer((partida_id, VERSAO_MODELO))
+
+
+# ================ EXECUÇÃO FORA DO EVENT LOOP ================
+# Cálculos pesados (lote, sensitividade, exportação, ingestão e recálculo) não
+# rodam dentro do event loop: a partir de EXECUTOR_LIMIAR partidas vão para um
+# pool dedicado, com até EXECUTOR_TRABALHADORES em execução e no máximo
+# EXECUTOR_FILA_MAXIMA aguardando vaga. Abaixo do limiar o salto para o pool
+# custa mais que o próprio cálculo e ele roda no loop.
+# - thread: o NumPy solta o GIL nas operações vetorizadas e o interpretador
+#   troca de thread a cada 5 ms, então o loop continua atendendo; não há
+#   paralelismo real no código Python puro
+# - processo: paralelismo real; argumentos e resultado passam por pickle e as
+#   etapas medidas nos processos filhos não aparecem em /metrics
+# - nenhum: tudo no event loop (comportamento anterior)
+# O pool é próprio para não disputar o executor padrão do loop, usado pelo Motor.
+
+MODOS_EXECUTOR = ("thread", "processo", "nenhum")
+EXECUTOR_MODO = os.environ.get('EXECUTOR_MODO', 'thread').lower()
+EXECUTOR_TRABALHADORES = int(os.environ.get('EXECUTOR_TRABALHADORES', str(min(4, os.cpu_count() or 1))))
+EXECUTOR_FILA_MAXIMA = int(os.environ.get('EXECUTOR_FILA_MAXIMA', '32'))
+EXECUTOR_LIMIAR = int(os.environ.get('EXECUTOR_LIMIAR', '100'))
+MONITOR_LOOP_INTERVALO = float(os.environ.get('MONITOR_LOOP_INTERVALO', '0.1'))
+
+if EXECUTOR_MODO not in MODOS_EXECUTOR:
+    raise ValueError(f"EXECUTOR_MODO inválido: {EXECUTOR_MODO} (válidos: {', '.join(MODOS_EXECUTOR)})")
+
+
+class ExecutorCalculos:
+    """
+    Pool para cálculos pesados, com fila limitada e contadores.
+
+    O limite é o par semáforo + na_fila: o semáforo admite `trabalhadores`
+    cálculos no pool e na_fila conta quem espera vaga. Com o semáforo sem vagas
+    e na_fila >= fila_maxima, a próxima chamada recebe 503, então aceita-se no
+    máximo trabalhadores + fila_maxima chamadas ao mesmo tempo (chamadas com
+    rejeitar_se_cheia=False esperam e podem passar do limite). A verificação e
+    o incremento de na_fila não têm await entre si: no event loop são atômicos.
+    """
+
+    def __init__(self, modo: str, trabalhadores: int, fila_maxima: int, limiar: int):
+        self.modo = modo
+        self.trabalhadores = max(1, trabalhadores)
+        self.fila_maxima = fila_maxima
+        self.limiar = limiar
+        self._pool = None
+        self._vagas: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.em_execucao = 0
+        self.na_fila = 0
+        self.no_pool = 0
+        self.no_loop = 0
+        self.rejeitadas = 0
+
+    def _obter_pool(self):
+        # Criado no primeiro uso: importar o módulo (scripts, processos filhos) não sobe pool
+        if self._pool is None:
+            if self.modo == "processo":
+                # spawn: o filho não herda threads nem o event loop do servidor
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.trabalhadores, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.trabalhadores, thread_name_prefix="calculos")
+        return self._pool
+
+    def _obter_vagas(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._vagas = asyncio.Semaphore(self.trabalhadores)
+            self._loop = loop
+        return self._vagas
+
+    async def executar(self, funcao: Callable[..., Any], *args, tamanho: int, rejeitar_se_cheia: bool = True) -> Any:
+        """
+        funcao(*args) fora do event loop se tamanho (partidas/linhas) >= limiar
+        - Fila cheia: 503 (rejeitar_se_cheia) ou espera a vez (jobs e respostas já em streaming)
+        """
+        if self.modo == "nenhum" or tamanho < self.limiar:
+            self.no_loop += 1
+            return funcao(*args)
+
+        vagas = self._obter_vagas()
+        # Sem await até o incremento de na_fila (ver o limite na docstring da classe)
+        if vagas.locked() and self.na_fila >= self.fila_maxima and rejeitar_se_cheia:
+            self.rejeitadas += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Servidor ocupado com cálculos pesados, tente novamente",
+                headers={"Retry-After": "1"}
+            )
+
+        self.na_fila += 1
+        try:
+            with medir_etapa("espera_executor"):
+                await vagas.acquire()
+        finally:
+            self.na_fila -= 1
+
+        loop = asyncio.get_running_loop()
+        self.em_execucao += 1
+        self.no_pool += 1
+        try:
+            if self.modo == "thread":
+                # Contexto copiado: variáveis de contexto da requisição seguem para o thread
+                tarefa = functools.partial(contextvars.copy_context().run, funcao, *args)
+            else:
+                tarefa = functools.partial(funcao, *args)
+            futuro = self._obter_pool().submit(tarefa)
+        except BaseException:
+            self.em_execucao -= 1
+            vagas.release()
+            raise
+
+        # A vaga só é devolvida quando o cálculo termina de fato, mesmo que o
+        # cliente desista antes (o thread/processo não pode ser interrompido)
+        futuro.add_done_callback(lambda _: self._devolver_vaga(loop, vagas))
+        return await asyncio.wrap_future(futuro)
+
+    def _devolver_vaga(self, loop: asyncio.AbstractEventLoop, vagas: asyncio.Semaphore) -> None:
+        def devolver():
+            self.em_execucao -= 1
+            vagas.release()
+
+        with contextlib.suppress(RuntimeError):  # loop já encerrado
+            loop.call_soon_threadsafe(devolver)
+
+    def encerrar(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def estatisticas(self) -> Dict[str, Any]:
+        return {
+            "modo": self.modo,
+            "trabalhadores": self.trabalhadores,
+            "fila_maxima": self.fila_maxima,
+            "limiar": self.limiar,
+            "em_execucao": self.em_execucao,
+            "na_fila": self.na_fila,
+            "no_pool": self.no_pool,
+            "no_loop": self.no_loop,
+            "rejeitadas": self.rejeitadas,
+        }
+
+
+class MonitorEventLoop:
+    """Quanto o event loop acorda atrasado de um sleep: trechos síncronos longos travam todas as requisições"""
+
+    def __init__(self, intervalo: float, amostras: int = 600):
+        self.intervalo = intervalo
+        self._atrasos: deque = deque(maxlen=amostras)
+        self.maximo = 0.0
+        self._tarefa: Optional[asyncio.Task] = None
+
+    def iniciar(self) -> None:
+        if self._tarefa is None or self._tarefa.done():
+            self._tarefa = asyncio.create_task(self._monitorar())
+
+    async def parar(self) -> None:
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._tarefa
+            self._tarefa = None
+
+    async def _monitorar(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            inicio = loop.time()
+            await asyncio.sleep(self.intervalo)
+            atraso = max(0.0, loop.time() - inicio - self.intervalo)
+            self._atrasos.append(atraso)
+            self.maximo = max(self.maximo, atraso)
+            if METRICAS_HABILITADAS:
+                metrica_atraso_event_loop.observar((), atraso)
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Percentis das últimas amostras (ms) e o máximo desde a inicialização"""
+        resumo: Dict[str, Any] = {
+            "intervalo_ms": round(self.intervalo * 1000, 1),
+            "amostras": len(self._atrasos),
+            "max_ms": round(self.maximo * 1000, 2),
+        }
+        if self._atrasos:
+            atrasos = np.asarray(self._atrasos) * 1000
+            p50, p95, p99 = np.percentile(atrasos, [50, 95, 99])
+            resumo.update({
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_recente_ms": round(float(atrasos.max()), 2),
+            })
+        return resumo
+
+
+executor_calculos = ExecutorCalculos(EXECUTOR_MODO, EXECUTOR_TRABALHADORES, EXECUTOR_FILA_MAXIMA, EXECUTOR_LIMIAR)
+monitor_event_loop = MonitorEventLoop(MONITOR_LOOP_INTERVALO)
+
+
+# ================ ANÁLISES PERSISTIDAS ================
+# A análise V2 é calculada na gravação da partida e salva em db.analises
+# (um documento por partida, com a versão do modelo). A leitura faz uma
+# única consulta indexada por partida_id + versao_modelo.
+
+TAMANHO_LOTE_RECALCULO = int(os.environ.get('RECALCULO_TAMANHO_LOTE', '500'))
+
+jobs_recalculo: Dict[str, Dict[str, Any]] = {}
+_tarefas_em_segundo_plano: set = set()
+
+
+def montar_documento_analise(partida_doc: Dict[str, Any], analise: AnaliseCompletaV2) -> Dict[str, Any]:
+    """Documento salvo em db.analises para uma partida"""
+    return {
+        "partida_id": partida_doc["id"],
+        "versao_modelo": VERSAO_MODELO,
+        "chave": CacheAnalises.gerar_chave(partida_doc),
+        "analise": analise.model_dump(mode="json"),
+        "calculado_em": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def calcular_analises(partida_docs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], AnaliseCompletaV2]]:
+    """Calcula a análise V2 de cada documento de partida (mercados de gols em um único lote)"""
+    with medir_etapa("construcao_partida"):
+        partidas = [Partida(**{k: v for k, v in partida_doc.items() if k != "_id"}) for partida_doc in partida_docs]
+    with medir_etapa("mercados_gols"):
+        mercados_gols = analisar_mercados_gols(partidas) if partidas else []
+    return [
+        (partida_doc, analisar_partida_v2(partida, outras))
+        for partida_doc, partida, outras in zip(partida_docs, partidas, mercados_gols)
+    ]
+
+
+async def calcular_analises_fora_do_loop(
+    partida_docs: List[Dict[str, Any]]
+) -> List[Tuple[Dict[str, Any], AnaliseCompletaV2]]:
+    """calcular_analises no executor de cálculos (espera vaga em vez de rejeitar)"""
+    return await executor_calculos.executar(
+        calcular_analises, partida_docs, tamanho=len(partida_docs), rejeitar_se_cheia=False
+    )
+
+
+async def salvar_analises(pares: List[Tuple[Dict[str, Any], AnaliseCompletaV2]]) -> None:
+    """Grava (upsert) as análises em db.analises com um único bulk_write"""
+    if not pares:
+        return
+
+    operacoes = [
+        ReplaceOne({"partida_id": partida_doc["id"]}, montar_documento_analise(partida_doc, analise), upsert=True)
+        for partida_doc, analise in pares
+    ]
+    await db.analises.bulk_write(operacoes, ordered=False)
+
+
+async def executar_recalculo(job: Dict[str, Any]) -> None:
+    """Recalcula e regrava todas as análises em blocos (ex.: após mudança de pesos)"""
+    job["status"] = "executando"
+    try:
+        job["total"] = await db.partidas.count_documents({})
+
+        bloco: List[Dict[str, Any]] = []
+        cursor = db.partidas.find({}, {"_id": 0}).batch_size(TAMANHO_LOTE_RECALCULO)
+        async for partida_doc in cursor:
+            bloco.append(partida_doc)
+            if len(bloco) >= TAMANHO_LOTE_RECALCULO:
+                await salvar_analises(await calcular_analises_fora_do_loop(bloco))
+                job["processadas"] += len(bloco)
+                bloco = []
+
+        if bloco:
+            await salvar_analises(await calcular_analises_fora_do_loop(bloco))
+            job["processadas"] += len(bloco)
+
+        job["status"] = "concluido"
+    except Exception as e:
+        logger.exception("Falha no recálculo de análises")
+        job["status"] = "erro"
+        job["erro"] = str(e)
+    finally:
+        job["finalizado_em"] = datetime.now(timezone.utc).isoformat()
+
+
+# ================ HISTÓRICO DE ODDS ================
+# Cada mudança de odds vira um snapshot em db.odds_historico, agrupado em
+# documentos por partida e hora (bucket com até MAX_SNAPSHOTS_BUCKET itens):
+# registrar é um único upsert com $push. As probabilidades V2 não dependem
+# das odds, então uma mudança só de odds recalcula apenas os EVs da análise.
+#
+# A partida guarda odds_registradas_em (instante das odds atuais) e as
+# escritas das odds atuais e dos EVs só avançam esse instante: registros
+# simultâneos ou fora de ordem não deixam a partida na odd mais antiga.
+# Com o bucket da hora cheio, upserts simultâneos podem abrir mais de um
+# bucket irmão para a mesma hora; é aceitável, nenhum snapshot se perde e a
+# leitura ordena os snapshots por registrado_em, não por bucket.
+
+MAX_SNAPSHOTS_BUCKET = 500
+CAMPOS_ODDS_1X2 = ("odd_casa", "odd_empate", "odd_fora")
+
+
+def _inicio_bucket_odds(registrado_em: datetime) -> datetime:
+    return registrado_em.replace(minute=0, second=0, microsecond=0)
+
+
+def novo_bucket_odds(partida_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Bucket com o snapshot inicial (odds da criação) de uma partida"""
+    registrado_em = partida_doc["criado_em"]
+    snapshot = {"registrado_em": registrado_em, **{campo: partida_doc[campo] for campo in CAMPOS_ODDS_1X2}}
+    return {
+        "partida_id": partida_doc["id"],
+        "inicio": _inicio_bucket_odds(registrado_em),
+        "n": 1,
+        "primeiro": registrado_em,
+        "ultimo": registrado_em,
+        "snapshots": [snapshot],
+    }
+
+
+async def registrar_snapshot_odds(partida_id: str, odds: Dict[str, float], registrado_em: datetime) -> None:
+    """Acrescenta um snapshot ao bucket da hora (cria o bucket se ausente ou cheio)"""
+    await db.odds_historico.update_one(
+        {
+            "partida_id": partida_id,
+            "inicio": _inicio_bucket_odds(registrado_em),
+            "n": {"$lt": MAX_SNAPSHOTS_BUCKET},
+        },
+        {
+            "$push": {"snapshots": {"registrado_em": registrado_em, **odds}},
+            "$inc": {"n": 1},
+            "$min": {"primeiro": registrado_em},
+            "$max": {"ultimo": registrado_em},
+        },
+        upsert=True
     )
 
 
+async def atualizar_ev_analise(partida_doc: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Atualiza só os EVs 1X2 da análise salva (probabilidades não mudam com as odds).
+    Sem análise salva da versão atual, calcula e salva a análise completa.
+    """
+    partida_id = partida_doc["id"]
+    analise_doc = await db.analises.find_one(
+        {"partida_id": partida_id, "versao_modelo": VERSAO_MODELO},
+        {"_id": 0, "analise.analise_1x2": 1}
+    )
+    invalidar_analise(partida_id)
+
+    if not analise_doc:
+        # Uma partida só: abaixo de EXECUTOR_LIMIAR, calculada no próprio loop
+        analise = calcular_analises([partida_doc])[0][1]
+        await salvar_analises([(partida_doc, analise)])
+        return {f"ev_{mercado}": getattr(analise.analise_1x2, f"ev_{mercado}") for mercado in MERCADOS_1X2}
+
+    analise_1x2 = analise_doc["analise"]["analise_1x2"]
+    evs = {
+        f"ev_{mercado}": calcular_ev(analise_1x2[f"probabilidade_{mercado}"], partida_doc[f"odd_{mercado}"])
+        for mercado in MERCADOS_1X2
+    }
+    filtro: Dict[str, Any] = {"partida_id": partida_id}
+    alteracoes = {
+        **{f"analise.analise_1x2.{campo}": ev for campo, ev in evs.items()},
+        **{f"analise.partida.{campo}": partida_doc[campo] for campo in CAMPOS_ODDS_1X2},
+        "chave": CacheAnalises.gerar_chave(partida_doc),
+        "calculado_em": datetime.now(timezone.utc).isoformat(),
+    }
+    registradas_em = partida_doc.get("odds_registradas_em")
+    if registradas_em is not None:
+        # EVs de odds mais antigas que as já gravadas não sobrescrevem os atuais
+        filtro["$or"] = [
+            {"odds_registradas_em": {"$lt": registradas_em}},
+            {"odds_registradas_em": {"$exists": False}},
+        ]
+        alteracoes["odds_registradas_em"] = registradas_em
+    await db.analises.update_one(filtro, {"$set": alteracoes})
+    return evs
+
+
+def reamostrar_odds(snapshots: List[Dict[str, Any]], pontos: int) -> Tuple[int, List[Dict[str, Any]]]:
+    """Divide o período em até `pontos` intervalos iguais e mantém o último snapshot de cada um"""
+    if not snapshots:
+        return 0, []
+
+    snapshots = sorted(snapshots, key=lambda snapshot: snapshot["registrado_em"])
+    instantes = np.array([snapshot["registrado_em"].timestamp() for snapshot in snapshots])
+    intervalo = max(1, math.ceil((instantes[-1] - instantes[0]) / pontos))
+
+    grupos = np.minimum((instantes - instantes[0]) // intervalo, pontos - 1).astype(np.int64)
+    ultimos = np.nonzero(np.append(grupos[1:] != grupos[:-1], True))[0]
+    return intervalo, [snapshots[i] for i in ultimos]
+
+
+# ================ DERIVADOS DAS PARTIDAS ================
+# Autocomplete (autocomplete.py) e resumo por time (resumo_times.py), atualizados
+# a cada gravação.
+
+async def propagar_gravacoes(pares: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+    """Atualiza o que é derivado das partidas (autocomplete e db.times) após gravações (antes, depois)"""
+    for antes, depois in pares:
+        indice_autocomplete.aplicar(antes, depois)
+    await resumo_times.atualizar_resumo_times(pares)
+
+
 # ================ ROUTES ================
 
 @api_router.get("/")
@@ -1109,21 +2684,489 @@ async def criar_partida(input: PartidaCreate):
     """Cria uma nova partida"""
     partida = Partida(**input.model_dump())
     doc = partida.model_dump()
-    doc['criado_em'] = doc['criado_em'].isoformat()
     
     await db.partidas.insert_one(doc)
+    await db.odds_historico.insert_one(novo_bucket_odds(doc))
+    await propagar_gravacoes([(None, doc)])
+
+    analise = analisar_partida_v2(partida)
+    await salvar_analises([(doc, analise)])
+    cache_analises.guardar(CacheAnalises.gerar_chave(doc), partida.id, analise)
     return partida
 
 
+def codificar_cursor(partida_doc: Dict[str, Any]) -> str:
+    """Cursor opaco (criado_em, id) da última partida de uma página; criado_em em texto (legado) é marcado"""
+    criado_em = partida_doc["criado_em"]
+    tipo = "texto" if isinstance(criado_em, str) else "data"
+    bruto = json.dumps([criado_em, partida_doc["id"], tipo], default=_padrao_json)
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[Union[datetime, str], str]:
+    try:
+        criado_em, partida_id, tipo = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if tipo == "texto" and isinstance(criado_em, str):
+            return criado_em, partida_id
+        if tipo == "data":
+            return converter_data(criado_em), partida_id
+    except Exception:
+        pass
+    raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+
+
+def condicao_cursor(criado_em: Union[datetime, str], partida_id: str) -> Dict[str, Any]:
+    """
+    Partidas depois do cursor na ordem (criado_em desc, id desc). O MongoDB
+    ordena datas antes de textos e $lt só compara valores do mesmo tipo: sem
+    o ramo $type, partidas com criado_em ainda em texto (antes da migração de
+    datas) sumiriam de todas as páginas depois da primeira.
+    """
+    ramos: List[Dict[str, Any]] = [
+        {"criado_em": {"$lt": criado_em}},
+        {"criado_em": criado_em, "id": {"$lt": partida_id}},
+    ]
+    if isinstance(criado_em, datetime):
+        ramos.append({"criado_em": {"$type": "string"}})
+    return {"$or": ramos}
+
+
+def montar_filtro_partidas(
+    campeonato: Optional[str] = None,
+    rodada: Optional[int] = None,
+    time: Optional[str] = None,
+    after: Optional[str] = None
+) -> Dict[str, Any]:
+    """Filtro Mongo da listagem: campeonato, rodada, time (casa ou visitante) e cursor"""
+    condicoes: List[Dict[str, Any]] = []
+    if campeonato:
+        condicoes.append({"campeonato": campeonato})
+    if rodada is not None:
+        condicoes.append({"rodada": rodada})
+    if time:
+        condicoes.append({"$or": [{"time_casa": time}, {"time_visitante": time}]})
+    if after:
+        condicoes.append(condicao_cursor(*decodificar_cursor(after)))
+
+    if not condicoes:
+        return {}
+    if len(condicoes) == 1:
+        return condicoes[0]
+    return {"$and": condicoes}
+
+
+def montar_projecao_partidas(campos: Optional[str]) -> Optional[Dict[str, int]]:
+    """Projeção a partir de 'campos' (separados por vírgula); id e criado_em sempre vêm"""
+    if not campos:
+        return None
+
+    nomes = [campo.strip() for campo in campos.split(",") if campo.strip()]
+    invalidos = [nome for nome in nomes if nome not in Partida.model_fields]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(invalidos)}")
+
+    projecao = {"_id": 0, "id": 1, "criado_em": 1}
+    for nome in nomes:
+        projecao[nome] = 1
+    return projecao
+
+
+ORDEM_LISTAGEM = [("criado_em", -1), ("id", -1)]
+ORDEM_PROXIMAS = [("data_hora", 1), ("id", 1)]
+
+
+# ================ INGESTÃO EM MASSA ================
+
+TAMANHO_LOTE_INGESTAO = int(os.environ.get('INGESTAO_TAMANHO_LOTE', '1000'))
+
+
+async def _linhas_do_corpo(request: Request) -> AsyncIterator[str]:
+    """Linhas do corpo da requisição, decodificadas à medida que chegam"""
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    pendente = ""
+    async for pedaco in request.stream():
+        pendente += decodificador.decode(pedaco)
+        *linhas, pendente = pendente.split("\n")
+        for linha in linhas:
+            yield linha.rstrip("\r")
+
+    pendente += decodificador.decode(b"", final=True)
+    if pendente.strip():
+        yield pendente.rstrip("\r")
+
+
+async def _registros_ndjson(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    numero = 0
+    async for linha in _linhas_do_corpo(request):
+        numero += 1
+        if not linha.strip():
+            continue
+        try:
+            yield numero, json.loads(linha)
+        except json.JSONDecodeError as e:
+            yield numero, ValueError(f"JSON inválido: {e.msg}")
+
+
+async def _registros_csv(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    cabecalho: Optional[List[str]] = None
+    numero = 0
+    pendente = ""
+    async for linha in _linhas_do_corpo(request):
+        # Campos entre aspas podem conter quebras de linha
+        pendente = f"{pendente}\n{linha}" if pendente else linha
+        if pendente.count('"') % 2:
+            continue
+        registro, pendente = pendente, ""
+        if not registro.strip():
+            continue
+
+        valores = next(csv.reader([registro]))
+        if cabecalho is None:
+            cabecalho = [nome.strip().lstrip("\ufeff") for nome in valores]
+            continue
+
+        numero += 1
+        if len(valores) != len(cabecalho):
+            yield numero, ValueError(f"Esperadas {len(cabecalho)} colunas, encontradas {len(valores)}")
+            continue
+        yield numero, _converter_linha_csv(dict(zip(cabecalho, valores)))
+
+
+def _converter_linha_csv(linha: Dict[str, str]) -> Dict[str, Any]:
+    """Células vazias de campos opcionais usam o valor padrão; observacoes_contextuais vem como JSON"""
+    dados: Dict[str, Any] = {}
+    for campo, valor in linha.items():
+        valor = valor.strip()
+        if valor == "":
+            definicao = PartidaCreate.model_fields.get(campo)
+            if definicao is None or not definicao.is_required():
+                continue
+        if campo == "observacoes_contextuais":
+            try:
+                valor = json.loads(valor)
+            except json.JSONDecodeError:
+                valor = [valor]
+        dados[campo] = valor
+    return dados
+
+
+async def _registros_json(request: Request) -> AsyncIterator[Tuple[int, Any]]:
+    try:
+        registros = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"JSON inválido: {e.msg}")
+    if not isinstance(registros, list):
+        raise HTTPException(status_code=400, detail="O corpo JSON deve ser uma lista de partidas")
+
+    for numero, registro in enumerate(registros, start=1):
+        yield numero, registro
+
+
+LEITORES_INGESTAO = {
+    "json": _registros_json,
+    "ndjson": _registros_ndjson,
+    "csv": _registros_csv,
+}
+
+TIPOS_CONTEUDO_INGESTAO = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/ndjson": "ndjson",
+    "text/csv": "csv",
+}
+
+
+def _mensagens_validacao(erro: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(parte) for parte in detalhe['loc'])}: {detalhe['msg']}"
+        for detalhe in erro.errors()
+    ]
+
+
+async def _gravar_bloco_ingestao(
+    bloco: List[Tuple[int, Dict[str, Any]]],
+    analisar: bool,
+    resultado: ResultadoIngestao
+) -> None:
+    """Grava um bloco validado com insert_many não ordenado"""
+    docs = [doc for _, doc in bloco]
+    falhas: Dict[int, str] = {}
+    try:
+        await db.partidas.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for erro in e.details.get("writeErrors", []):
+            falhas[erro["index"]] = erro.get("errmsg", "Erro de gravação")
+
+    inseridos = []
+    for indice, (numero, doc) in enumerate(bloco):
+        if indice in falhas:
+            resultado.erros.append(ErroIngestao(linha=numero, erros=[falhas[indice]]))
+        else:
+            inseridos.append(doc)
+            resultado.ids.append(doc["id"])
+
+    resultado.inseridas += len(inseridos)
+    if inseridos:
+        await db.odds_historico.insert_many([novo_bucket_odds(doc) for doc in inseridos])
+        await propagar_gravacoes([(None, doc) for doc in inseridos])
+    if analisar:
+        await salvar_analises(await calcular_analises_fora_do_loop(inseridos))
+
+
+@api_router.post("/partidas/bulk", response_model=ResultadoIngestao)
+async def ingerir_partidas(request: Request, analisar: bool = True, formato: Optional[str] = None):
+    """
+    Cadastra várias partidas em uma requisição
+    - Corpo: lista JSON, NDJSON (uma partida por linha) ou CSV com cabeçalho
+    - Formato pelo Content-Type ou pelo parâmetro 'formato' (json, ndjson, csv)
+    - Validação e gravação em blocos (insert_many não ordenado)
+    - Linhas inválidas são reportadas em 'erros' sem interromper o lote
+    - analisar=false adia o cálculo das análises para a primeira leitura
+    """
+    if formato is None:
+        tipo = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+        formato = TIPOS_CONTEUDO_INGESTAO.get(tipo)
+    if formato not in LEITORES_INGESTAO:
+        raise HTTPException(status_code=415, detail="Formato não suportado: use JSON, NDJSON ou CSV")
+
+    resultado = ResultadoIngestao(recebidas=0, inseridas=0, ids=[], erros=[])
+    bloco: List[Tuple[int, Dict[str, Any]]] = []
+
+    async for numero, registro in LEITORES_INGESTAO[formato](request):
+        resultado.recebidas += 1
+
+        if isinstance(registro, Exception):
+            resultado.erros.append(ErroIngestao(linha=numero, erros=[str(registro)]))
+            continue
+        if not isinstance(registro, dict):
+            resultado.erros.append(ErroIngestao(linha=numero, erros=["Cada registro deve ser um objeto"]))
+            continue
+
+        try:
+            partida = Partida(**PartidaCreate(**registro).model_dump())
+        except ValidationError as e:
+            resultado.erros.append(ErroIngestao(linha=numero, erros=_mensagens_validacao(e)))
+            continue
+
+        bloco.append((numero, partida.model_dump()))
+
+        if len(bloco) >= TAMANHO_LOTE_INGESTAO:
+            await _gravar_bloco_ingestao(bloco, analisar, resultado)
+            bloco = []
+
+    if bloco:
+        await _gravar_bloco_ingestao(bloco, analisar, resultado)
+
+    return resultado
+
+
 @api_router.get("/partidas", response_model=List[Partida])
-async def listar_partidas():
-    """Lista todas as partidas"""
-    partidas = await db.partidas.find({}, {"_id": 0}).to_list(1000)
-    
-    for partida in partidas:
-        if isinstance(partida['criado_em'], str):
-            partida['criado_em'] = datetime.fromisoformat(partida['criado_em'])
-    
+async def listar_partidas(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = None,
+    campeonato: Optional[str] = None,
+    rodada: Optional[int] = None,
+    time: Optional[str] = None,
+    campos: Optional[str] = None
+):
+    """
+    Lista partidas (mais recentes primeiro) com paginação por cursor
+    - limit: tamanho da página (máx. 1000)
+    - after: cursor retornado no header X-Proximo-Cursor da página anterior
+    - campeonato, rodada, time: filtros (time = casa ou visitante)
+    - campos: projeção opcional, ex. "time_casa,time_visitante,odd_casa"
+    """
+    filtro = montar_filtro_partidas(campeonato, rodada, time, after)
+    projecao = montar_projecao_partidas(campos)
+
+    partidas = await db.partidas.find(filtro, projecao or {"_id": 0}) \
+        .sort(ORDEM_LISTAGEM) \
+        .limit(limit + 1) \
+        .to_list(limit + 1)
+
+    headers = {}
+    if len(partidas) > limit:
+        partidas = partidas[:limit]
+        headers["X-Proximo-Cursor"] = codificar_cursor(partidas[-1])
+
+    if projecao:
+        # Documentos parciais não passam pela validação de Partida
+        return resposta_json(partidas, headers)
+    if RESPOSTA_RAPIDA:
+        return resposta_documentos(ADAPTADOR_PARTIDAS, partidas, headers)
+
+    response.headers.update(headers)
+    return partidas
+
+
+TAMANHO_BLOCO_STREAM = 200
+
+
+async def _analises_do_bloco(bloco: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Análises V2 (sem a partida) de um bloco: salvas em db.analises ou calculadas na hora"""
+    ids = [partida_doc["id"] for partida_doc in bloco]
+    salvas = await db.analises.find(
+        {"partida_id": {"$in": ids}, "versao_modelo": VERSAO_MODELO},
+        {"_id": 0, "partida_id": 1, "analise.analise_1x2": 1, "analise.outras_analises": 1}
+    ).to_list(None)
+    analises = {doc["partida_id"]: doc["analise"] for doc in salvas}
+
+    faltando = [partida_doc for partida_doc in bloco if partida_doc["id"] not in analises]
+    for partida_doc, analise in await calcular_analises_fora_do_loop(faltando):
+        analises[partida_doc["id"]] = analise.model_dump(mode="json", exclude={"partida"})
+
+    return analises
+
+
+async def gerar_linhas_ndjson(
+    filtro: Dict[str, Any],
+    projecao: Optional[Dict[str, int]],
+    incluir_analise: bool
+) -> AsyncIterator[bytes]:
+    """Itera o cursor do Motor emitindo uma linha JSON por partida (memória constante)"""
+    if incluir_analise:
+        # A análise precisa da partida completa
+        projecao = None
+
+    cursor = db.partidas.find(filtro, projecao or {"_id": 0}) \
+        .sort(ORDEM_LISTAGEM) \
+        .batch_size(TAMANHO_BLOCO_STREAM)
+
+    bloco: List[Dict[str, Any]] = []
+
+    async def emitir(bloco: List[Dict[str, Any]]) -> bytes:
+        analises = await _analises_do_bloco(bloco) if incluir_analise else {}
+        linhas = []
+        for partida_doc in bloco:
+            if incluir_analise:
+                partida_doc["analise_v2"] = analises[partida_doc["id"]]
+            linhas.append(json.dumps(partida_doc, default=_padrao_json, ensure_ascii=False))
+        return ("\n".join(linhas) + "\n").encode("utf-8")
+
+    async for partida_doc in cursor:
+        bloco.append(partida_doc)
+        if len(bloco) >= TAMANHO_BLOCO_STREAM:
+            yield await emitir(bloco)
+            bloco = []
+
+    if bloco:
+        yield await emitir(bloco)
+
+
+@api_router.get("/partidas/stream")
+async def stream_partidas(
+    incluir_analise: bool = False,
+    campeonato: Optional[str] = None,
+    rodada: Optional[int] = None,
+    time: Optional[str] = None,
+    campos: Optional[str] = None
+):
+    """
+    Exporta partidas como NDJSON (uma partida por linha), em streaming
+    - incluir_analise: adiciona a análise V2 em "analise_v2" em cada linha
+    - campeonato, rodada, time, campos: mesmos filtros/projeção da listagem
+    """
+    filtro = montar_filtro_partidas(campeonato, rodada, time)
+    projecao = montar_projecao_partidas(campos)
+
+    return StreamingResponse(
+        gerar_linhas_ndjson(filtro, projecao, incluir_analise),
+        media_type="application/x-ndjson"
+    )
+
+
+@api_router.get("/exportar")
+async def exportar_partidas(
+    formato: str = "csv",
+    campeonato: Optional[str] = None,
+    rodada: Optional[int] = None,
+    time: Optional[str] = None
+):
+    """
+    Exporta partidas com a análise 1X2 (probabilidades, EV, confiança e notas por fator)
+    - formato: csv ou parquet (um row group por bloco)
+    - campeonato, rodada, time: mesmos filtros da listagem
+    """
+    if formato not in exportacao.FORMATOS_EXPORTACAO:
+        raise HTTPException(status_code=400, detail="Formato inválido: use csv ou parquet")
+    if formato == "parquet" and exportacao.pq is None:
+        raise HTTPException(status_code=501, detail="Exportação Parquet requer o pacote pyarrow")
+
+    tipo_conteudo, extensao = exportacao.FORMATOS_EXPORTACAO[formato]
+    filtro = montar_filtro_partidas(campeonato, rodada, time)
+
+    return StreamingResponse(
+        exportacao.gerar_exportacao(filtro, formato, exportacao.TAMANHO_BLOCO_EXPORTACAO),
+        media_type=tipo_conteudo,
+        headers={"Content-Disposition": f'attachment; filename="partidas.{extensao}"'}
+    )
+
+
+@api_router.get("/partidas/proximas", response_model=List[Partida])
+async def listar_proximas_partidas(
+    de: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    campos: Optional[str] = None
+):
+    """
+    Partidas por data_hora (mais próximas primeiro), servidas pelo índice (data_hora, id)
+    - de: início do intervalo (padrão: agora); ate: fim do intervalo (opcional)
+    - Datas sem fuso são interpretadas no FUSO_HORARIO_PADRAO
+    - campos: projeção opcional, como na listagem
+    """
+    inicio = converter_data(de, FUSO_HORARIO_PADRAO) if de else agora_utc()
+    intervalo: Dict[str, Any] = {"$gte": inicio}
+    if ate:
+        fim = converter_data(ate, FUSO_HORARIO_PADRAO)
+        if fim < inicio:
+            raise HTTPException(status_code=400, detail="'ate' deve ser posterior a 'de'")
+        intervalo["$lte"] = fim
+
+    projecao = montar_projecao_partidas(campos)
+    if projecao:
+        projecao["data_hora"] = 1
+
+    partidas = await db.partidas.find({"data_hora": intervalo}, projecao or {"_id": 0}) \
+        .sort(ORDEM_PROXIMAS) \
+        .limit(limit) \
+        .to_list(limit)
+
+    if projecao:
+        return resposta_json(partidas)
+    if RESPOSTA_RAPIDA:
+        return resposta_documentos(ADAPTADOR_PARTIDAS, partidas)
+    return partidas
+
+
+@api_router.get("/partidas/busca", response_model=List[ResultadoBusca])
+async def buscar_partidas_texto(
+    q: str = Query(..., min_length=2, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    campos: Optional[str] = None
+):
+    """
+    Busca por times, campeonato, árbitro e estádio (índice de texto em português)
+    - Sem diferença de acentos e maiúsculas; termos com radical em comum também casam
+    - Ordenada pela relevância (times pesam mais que campeonato, árbitro e estádio)
+    - Aspas buscam a frase exata ("são paulo"); -termo exclui
+    - campos: projeção opcional, como na listagem
+    """
+    relevancia = {"$meta": "textScore"}
+    projecao = montar_projecao_partidas(campos) or {"_id": 0}
+    projecao["relevancia"] = relevancia
+
+    partidas = await db.partidas.find({"$text": {"$search": q}}, projecao) \
+        .sort([("relevancia", relevancia)]) \
+        .limit(limit) \
+        .to_list(limit)
+
+    if campos:
+        return resposta_json(partidas)
+    if RESPOSTA_RAPIDA:
+        return resposta_documentos(ADAPTADOR_RESULTADOS_BUSCA, partidas)
     return partidas
 
 
@@ -1135,9 +3178,6 @@ async def buscar_partida(partida_id: str):
     if not partida:
         raise HTTPException(status_code=404, detail="Partida não encontrada")
     
-    if isinstance(partida['criado_em'], str):
-        partida['criado_em'] = datetime.fromisoformat(partida['criado_em'])
-    
     return partida
 
 
@@ -1149,25 +3189,215 @@ async def atualizar_partida(partida_id: str, input: PartidaCreate):
     if not partida_existente:
         raise HTTPException(status_code=404, detail="Partida não encontrada")
     
-    partida_atualizada = Partida(id=partida_id, **input.model_dump())
+    # O placar registrado em PUT /resultado só muda se o corpo trouxer o
+    # resultado: editar os outros campos não apaga gols/resultado_final
+    dados = input.model_dump()
+    if not input.model_fields_set & set(CAMPOS_RESULTADO):
+        dados.update({campo: partida_existente.get(campo) for campo in CAMPOS_RESULTADO})
+
+    # id e criado_em são os da partida original: editar não muda a posição na
+    # listagem por (criado_em, id) nem a data de criação usada no histórico
+    partida_atualizada = Partida(
+        id=partida_id,
+        criado_em=partida_existente.get("criado_em") or agora_utc(),
+        **dados
+    )
     doc = partida_atualizada.model_dump()
-    doc['criado_em'] = doc['criado_em'].isoformat()
-    
-    await db.partidas.update_one({"id": partida_id}, {"$set": doc})
+
+    odds = {campo: doc[campo] for campo in CAMPOS_ODDS_1X2}
+    odds_mudaram = any(odds[campo] != partida_existente.get(campo) for campo in CAMPOS_ODDS_1X2)
+    if odds_mudaram:
+        registrado_em = agora_utc()
+        await registrar_snapshot_odds(partida_id, odds, registrado_em)
+
+    so_odds = odds_mudaram and all(
+        valor == partida_existente.get(campo)
+        for campo, valor in doc.items()
+        if campo not in CAMPOS_ODDS_1X2 and campo not in ("id", "criado_em")
+    )
+    if so_odds:
+        # Probabilidades não mudam: grava as odds e recalcula só os EVs
+        partida_doc = await db.partidas.find_one_and_update(
+            {"id": partida_id},
+            {"$set": {**odds, "odds_registradas_em": registrado_em}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        await atualizar_ev_analise(partida_doc)
+        return partida_doc
+    
+    alteracoes = {campo: valor for campo, valor in doc.items() if campo not in ("id", "criado_em")}
+    if odds_mudaram:
+        alteracoes["odds_registradas_em"] = registrado_em
+
+    # Documento anterior lido na própria atualização: a diferença aplicada aos times é exata
+    anterior = await db.partidas.find_one_and_update(
+        {"id": partida_id},
+        {"$set": alteracoes},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
+    )
+    invalidar_analise(partida_id)
+    await propagar_gravacoes([(anterior, doc)])
+
+    analise = analisar_partida_v2(partida_atualizada)
+    await salvar_analises([(doc, analise)])
+    cache_analises.guardar(CacheAnalises.gerar_chave(doc), partida_id, analise)
     return partida_atualizada
 
 
+@api_router.put("/partidas/{partida_id}/resultado", response_model=Partida)
+async def registrar_resultado(partida_id: str, input: ResultadoPartida):
+    """Registra o placar final (e o resultado 1X2) de uma partida encerrada"""
+    campos = {
+        "gols_casa": input.gols_casa,
+        "gols_fora": input.gols_fora,
+        "resultado_final": resultado_pelo_placar(input.gols_casa, input.gols_fora),
+    }
+    anterior = await db.partidas.find_one_and_update(
+        {"id": partida_id},
+        {"$set": campos},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
+    )
+
+    if not anterior:
+        raise HTTPException(status_code=404, detail="Partida não encontrada")
+    partida = {**anterior, **campos}
+    await propagar_gravacoes([(anterior, partida)])
+
+    # O resultado não altera a análise: só a cópia da partida embutida nela
+    await db.analises.update_one(
+        {"partida_id": partida_id},
+        {"$set": {f"analise.partida.{campo}": valor for campo, valor in campos.items()}}
+    )
+    invalidar_analise(partida_id)
+    return partida
+
+
+@api_router.post("/partidas/{partida_id}/odds", response_model=RegistroOdds)
+async def registrar_odds(partida_id: str, input: OddsSnapshot):
+    """
+    Registra um snapshot das odds 1X2 (movimento de linha)
+    - O snapshot mais recente vira a odd atual da partida e só os EVs são recalculados
+    - Snapshot retroativo (registrado_em anterior ao último) entra apenas no histórico
+    """
+    registrado_em = input.registrado_em or agora_utc()
+    odds = {campo: getattr(input, campo) for campo in CAMPOS_ODDS_1X2}
+
+    if not await db.partidas.find_one({"id": partida_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Partida não encontrada")
+
+    # Só vira a odd atual se for mais recente que a atual: a condição está na
+    # própria escrita. Partidas ainda sem odds_registradas_em comparam com o histórico.
+    condicoes: List[Dict[str, Any]] = [{"odds_registradas_em": {"$lt": registrado_em}}]
+    if not await db.odds_historico.find_one({"partida_id": partida_id, "ultimo": {"$gt": registrado_em}}, {"_id": 1}):
+        condicoes.append({"odds_registradas_em": {"$exists": False}})
+    await registrar_snapshot_odds(partida_id, odds, registrado_em)
+
+    alteracoes = {**odds, "odds_registradas_em": registrado_em}
+    anterior = await db.partidas.find_one_and_update(
+        {"id": partida_id, "$or": condicoes},
+        {"$set": alteracoes},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
+    )
+    odds_atuais = anterior is not None
+
+    if odds_atuais:
+        evs = await atualizar_ev_analise({**anterior, **alteracoes})
+    else:
+        # Snapshot retroativo: só histórico; os EVs continuam os das odds atuais
+        analise = await db.analises.find_one(
+            {"partida_id": partida_id, "versao_modelo": VERSAO_MODELO},
+            {"_id": 0, "analise.analise_1x2": 1}
+        )
+        if analise:
+            evs = {f"ev_{m}": analise["analise"]["analise_1x2"][f"ev_{m}"] for m in MERCADOS_1X2}
+        else:
+            partida_doc = await db.partidas.find_one({"id": partida_id}, {"_id": 0})
+            if not partida_doc:
+                raise HTTPException(status_code=404, detail="Partida não encontrada")
+            evs = await atualizar_ev_analise(partida_doc)
+
+    return RegistroOdds(partida_id=partida_id, registrado_em=registrado_em, odds_atuais=odds_atuais, **evs)
+
+
+@api_router.get("/partidas/{partida_id}/odds", response_model=SerieOdds)
+async def serie_odds(
+    partida_id: str,
+    de: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    pontos: int = Query(200, ge=2, le=5000)
+):
+    """
+    Série temporal das odds 1X2 para gráficos
+    - de / ate: intervalo (sem fuso = UTC)
+    - pontos: máximo de pontos; o período é dividido em intervalos iguais e cada
+      intervalo mantém o último snapshot
+    """
+    inicio = converter_data(de)
+    fim = converter_data(ate)
+
+    filtro: Dict[str, Any] = {"partida_id": partida_id}
+    if inicio:
+        filtro["ultimo"] = {"$gte": inicio}
+    if fim:
+        filtro["inicio"] = {"$lte": fim}
+
+    buckets = await db.odds_historico.find(filtro, {"_id": 0, "snapshots": 1}) \
+        .sort("inicio", 1) \
+        .to_list(None)
+
+    snapshots = [
+        snapshot
+        for bucket in buckets
+        for snapshot in bucket["snapshots"]
+        if (not inicio or snapshot["registrado_em"] >= inicio) and (not fim or snapshot["registrado_em"] <= fim)
+    ]
+    if not snapshots and not await db.partidas.find_one({"id": partida_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Partida não encontrada")
+
+    intervalo, amostra = reamostrar_odds(snapshots, pontos)
+    return SerieOdds(
+        partida_id=partida_id,
+        intervalo_segundos=intervalo,
+        total_snapshots=len(snapshots),
+        pontos=amostra
+    )
+
+
 @api_router.delete("/partidas/{partida_id}")
 async def deletar_partida(partida_id: str):
     """Deleta uma partida"""
-    result = await db.partidas.delete_one({"id": partida_id})
+    partida_doc = await db.partidas.find_one_and_delete({"id": partida_id}, projection={"_id": 0})
     
-    if result.deleted_count == 0:
+    if not partida_doc:
         raise HTTPException(status_code=404, detail="Partida não encontrada")
     
+    await propagar_gravacoes([(partida_doc, None)])
+    await db.analises.delete_one({"partida_id": partida_id})
+    await db.odds_historico.delete_many({"partida_id": partida_id})
+    invalidar_analise(partida_id)
     return {"message": "Partida deletada com sucesso"}
 
 
+@api_router.get("/times/{nome}/resumo", response_model=ResumoTime)
+async def resumo_time(nome: str):
+    """Resumo do time (partidas, resultados, médias de gols e forma recente) em uma leitura indexada"""
+    time_doc = await db.times.find_one({"chave": resumo_times.chave_time(nome)}, {"_id": 0})
+    if not time_doc:
+        raise HTTPException(status_code=404, detail="Time não encontrado")
+    return resumo_times.montar_resumo_time(time_doc)
+
+
+@api_router.post("/times/reconstruir")
+async def reconstruir_times():
+    """Recria os resumos de todos os times a partir das partidas (carga inicial ou correção)"""
+    total = await resumo_times.reconstruir_resumos_times()
+    return {"times": total}
+
+
 # Endpoint antigo removido - usar /analise-v2
 
 
@@ -1179,23 +3409,286 @@ async def analisar_partida_v2_endpoint(partida_id: str):
     - Sistema de confiança (Alta/Média/Baixa)
     - Justificativa automática detalhada
     - Análise de valor esperado (EV)
+    - Servida da análise pré-calculada na gravação (db.analises)
     """
-    partida_dict = await db.partidas.find_one({"id": partida_id}, {"_id": 0})
+    corpo = await analises_em_andamento.executar(
+        (partida_id, VERSAO_MODELO), lambda: gerar_corpo_analise_v2(partida_id)
+    )
+    return Response(content=corpo, media_type="application/json")
+
+
+async def gerar_corpo_analise_v2(partida_id: str) -> bytes:
+    """JSON da análise V2 (executado uma vez por rajada de requisições simultâneas)"""
+    # Acerto no cache não consulta o MongoDB
+    analise = cache_analises.obter_por_partida(partida_id)
+    if analise is not None:
+        return serializar_analise(analise).body
+
+    with medir_etapa("busca_mongo"):
+        analise_doc = await db.analises.find_one(
+            {"partida_id": partida_id, "versao_modelo": VERSAO_MODELO},
+            {"_id": 0, "chave": 1, "analise": 1}
+        )
+
+    if analise_doc:
+        if RESPOSTA_RAPIDA:
+            # Documento salvo já está em formato JSON: vai direto para bytes
+            with medir_etapa("serializacao"):
+                return codificar_json(analise_doc["analise"])
+
+        with medir_etapa("construcao_analise"):
+            analise = AnaliseCompletaV2(**analise_doc["analise"])
+        cache_analises.guardar(analise_doc["chave"], partida_id, analise)
+        return serializar_analise(analise).body
+
+    # Análise ausente ou de versão anterior do modelo: calcula e persiste
+    with medir_etapa("busca_mongo"):
+        partida_dict = await db.partidas.find_one({"id": partida_id}, {"_id": 0})
     
     if not partida_dict:
         raise HTTPException(status_code=404, detail="Partida não encontrada")
     
-    if isinstance(partida_dict['criado_em'], str):
-        partida_dict['criado_em'] = datetime.fromisoformat(partida_dict['criado_em'])
-    
-    partida = Partida(**partida_dict)
-    analise = analisar_partida_v2(partida)
-    
-    return analise
+    # Uma partida só: abaixo de EXECUTOR_LIMIAR, calculada no próprio loop
+    analise = calcular_analises([partida_dict])[0][1]
+    await salvar_analises([(partida_dict, analise)])
+    cache_analises.guardar(CacheAnalises.gerar_chave(partida_dict), partida_id, analise)
+    return serializar_analise(analise).body
+
+
+def serializar_analise(analise: AnaliseCompletaV2) -> Response:
+    """
+    Resposta da análise V2, serializada aqui (e não pelo response_model) para
+    medir a etapa de serialização; mesmo JSON que o FastAPI produziria.
+    """
+    with medir_etapa("serializacao"):
+        if RESPOSTA_RAPIDA:
+            return resposta_json(analise)
+        return JSONResponse(analise.model_dump(mode="json"))
+
+
+@api_router.post("/analises/recalcular")
+async def recalcular_analises():
+    """Dispara o recálculo em segundo plano de todas as análises salvas"""
+    job = {
+        "id": str(uuid.uuid4()),
+        "status": "pendente",
+        "versao_modelo": VERSAO_MODELO,
+        "processadas": 0,
+        "total": None,
+        "erro": None,
+        "iniciado_em": datetime.now(timezone.utc).isoformat(),
+        "finalizado_em": None,
+    }
+    jobs_recalculo[job["id"]] = job
+
+    tarefa = asyncio.create_task(executar_recalculo(job))
+    _tarefas_em_segundo_plano.add(tarefa)
+    tarefa.add_done_callback(_tarefas_em_segundo_plano.discard)
+
+    return job
+
+
+@api_router.get("/analises/recalcular/{job_id}")
+async def status_recalculo(job_id: str):
+    """Progresso de um recálculo de análises"""
+    job = jobs_recalculo.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Recálculo não encontrado")
+    return job
+
+
+@api_router.post("/migracoes/datas")
+async def migrar_datas():
+    """
+    Dispara em segundo plano a conversão de criado_em/data_hora em texto para datas BSON
+    - Retoma do checkpoint se uma execução anterior foi interrompida
+    - Se já houver uma migração em andamento, retorna o job dela
+    """
+    for job in migracao_datas.jobs_migracao.values():
+        if job["status"] in ("pendente", "executando"):
+            return job
+
+    job = migracao_datas.novo_job_migracao_datas()
+    migracao_datas.jobs_migracao[job["id"]] = job
+
+    tarefa = asyncio.create_task(migracao_datas.executar_migracao_datas(job))
+    _tarefas_em_segundo_plano.add(tarefa)
+    tarefa.add_done_callback(_tarefas_em_segundo_plano.discard)
+
+    return job
+
+
+@api_router.get("/migracoes/datas/{job_id}")
+async def status_migracao_datas(job_id: str):
+    """Progresso de uma migração de datas"""
+    job = migracao_datas.jobs_migracao.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Migração não encontrada")
+    return job
+
+
+@api_router.get("/cache/analises")
+async def estatisticas_cache_analises():
+    """Contadores do cache de análises V2 (acertos, falhas, ocupação) e das requisições coalescidas"""
+    return {**cache_analises.estatisticas(), "coalescencia": analises_em_andamento.estatisticas()}
+
+
+@api_router.get("/executor")
+async def estatisticas_executor():
+    """Ocupação do executor de cálculos pesados e atraso do event loop"""
+    return {**executor_calculos.estatisticas(), "atraso_event_loop": monitor_event_loop.estatisticas()}
+
+
+@api_router.post("/analise-v2/lote", response_model=List[ResultadoLote1X2])
+async def analisar_lote_endpoint(input: AnaliseLoteRequest):
+    """
+    VERSÃO 2.0 (LOTE): Probabilidades 1X2, confiança e EV de várias partidas
+    - Aceita IDs de partidas salvas e/ou partidas avulsas (não salvas)
+    - Cálculo vetorizado, idêntico ao de /partidas/{id}/analise-v2
+    """
+    partida_docs: List[Dict[str, Any]] = []
+    partida_ids: List[Optional[str]] = []
+
+    if input.ids:
+        docs = await db.partidas.find({"id": {"$in": input.ids}}, {"_id": 0}).to_list(None)
+        por_id = {doc["id"]: doc for doc in docs}
+
+        faltando = [partida_id for partida_id in input.ids if partida_id not in por_id]
+        if faltando:
+            raise HTTPException(status_code=404, detail=f"Partidas não encontradas: {', '.join(faltando)}")
+
+        for partida_id in input.ids:
+            partida_docs.append(por_id[partida_id])
+            partida_ids.append(partida_id)
+
+    if input.partidas:
+        for partida_input in input.partidas:
+            partida_docs.append(partida_input.model_dump())
+            partida_ids.append(None)
+
+    if not partida_docs:
+        return []
+
+    corpo = await executor_calculos.executar(
+        gerar_corpo_lote, partida_docs, partida_ids, tamanho=len(partida_docs)
+    )
+    return Response(content=corpo, media_type="application/json")
+
+
+def gerar_corpo_lote(partida_docs: List[Dict[str, Any]], partida_ids: List[Optional[str]]) -> bytes:
+    """
+    JSON dos resultados 1X2 do lote; em lotes grandes roda no executor de
+    cálculos, serialização incluída (mesmo JSON do response_model)
+    """
+    partidas = [Partida(**partida_doc) for partida_doc in partida_docs]
+    resultado = analisar_1x2_lote(partidas)
+
+    resultados = [
+        ResultadoLote1X2(
+            partida_id=partida_ids[i],
+            probabilidade_casa=float(resultado["probabilidade_casa"][i]),
+            probabilidade_empate=float(resultado["probabilidade_empate"][i]),
+            probabilidade_fora=float(resultado["probabilidade_fora"][i]),
+            resultado_previsto=resultado["resultado_previsto"][i],
+            confianca=resultado["confianca"][i],
+            diferenca_probabilidade=float(resultado["diferenca_probabilidade"][i]),
+            ev_casa=float(resultado["ev_casa"][i]),
+            ev_empate=float(resultado["ev_empate"][i]),
+            ev_fora=float(resultado["ev_fora"][i])
+        )
+        for i in range(len(partidas))
+    ]
+    return JSONResponse([resultado_lote.model_dump(mode="json") for resultado_lote in resultados]).body
+
+
+@api_router.post("/partidas/{partida_id}/sensitividade", response_model=ResultadoSensitividade)
+async def sensitividade_partida(partida_id: str, input: SensitividadeRequest):
+    """
+    What-if: como as probabilidades 1X2 e os EVs mudam ao variar cada fator e cada odd
+    - deltas_notas: somados à nota (0-10) de cada fator, por lado (casa/fora/ambos)
+    - variacoes_odds: variação relativa de cada odd (0.05 = +5%)
+    - Todas as variantes são calculadas em um único lote vetorizado
+    """
+    fatores = input.fatores or FATORES_V2
+    invalidos = [fator for fator in fatores if fator not in LADOS_FATORES_V2]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Fatores inválidos: {', '.join(invalidos)}")
+
+    partida_doc = await db.partidas.find_one({"id": partida_id}, {"_id": 0})
+    if not partida_doc:
+        raise HTTPException(status_code=404, detail="Partida não encontrada")
+
+    # Tamanho: linhas do lote de variantes + pontos da grade de odds
+    variantes = 1 + sum(len(LADOS_FATORES_V2[fator]) for fator in fatores) * len(input.deltas_notas)
+    corpo = await executor_calculos.executar(
+        gerar_corpo_sensitividade, partida_id, Partida(**partida_doc), fatores,
+        input.deltas_notas, input.variacoes_odds,
+        tamanho=variantes + len(MERCADOS_1X2) * len(input.variacoes_odds)
+    )
+    return Response(content=corpo, media_type="application/json")
+
+
+def gerar_corpo_sensitividade(
+    partida_id: str,
+    partida: Partida,
+    fatores: List[str],
+    deltas_notas: List[float],
+    variacoes_odds: List[float]
+) -> bytes:
+    """JSON do what-if (no executor de cálculos em grades grandes, como gerar_corpo_lote)"""
+    calculo = calcular_sensitividade(partida, fatores, deltas_notas, variacoes_odds)
+    resultado = calculo["resultado"]
+
+    def linha(i: int) -> Dict[str, Any]:
+        return {
+            "probabilidade_casa": float(resultado["probabilidade_casa"][i]),
+            "probabilidade_empate": float(resultado["probabilidade_empate"][i]),
+            "probabilidade_fora": float(resultado["probabilidade_fora"][i]),
+            "resultado_previsto": resultado["resultado_previsto"][i],
+            "confianca": resultado["confianca"][i],
+            "ev_casa": float(resultado["ev_casa"][i]),
+            "ev_empate": float(resultado["ev_empate"][i]),
+            "ev_fora": float(resultado["ev_fora"][i]),
+        }
+
+    odds = calculo["odds"]
+    sensitividade = ResultadoSensitividade(
+        partida_id=partida_id,
+        base=ResultadoLote1X2(
+            partida_id=partida_id,
+            diferenca_probabilidade=float(resultado["diferenca_probabilidade"][0]),
+            **linha(0)
+        ),
+        fatores=[
+            VarianteFator(
+                fator=fator,
+                lado=lado,
+                delta=delta,
+                nota_casa=round(float(calculo["notas_casa"][fator][i]), 2),
+                nota_fora=round(float(calculo["notas_fora"][fator][i]), 2),
+                **linha(i)
+            )
+            for i, (fator, lado, delta) in enumerate(calculo["variantes"]) if i > 0
+        ],
+        odds=[
+            VarianteOdd(
+                mercado=odds["mercado"][i],
+                variacao=float(odds["variacao"][i]),
+                odd=float(odds["odd"][i]),
+                ev=float(odds["ev"][i]),
+                classificacao_ev=classificar_ev(float(odds["ev"][i]))
+            )
+            for i in range(len(odds["mercado"]))
+        ]
+    )
+    return JSONResponse(sensitividade.model_dump(mode="json")).body
 
 
 # Include the router in the main app
 app.include_router(api_router)
+app.include_router(roteador_metricas)
+app.include_router(roteador_perfis)
+app.include_router(roteador_autocomplete)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1203,8 +3696,15 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Proximo-Cursor"],
 )
 
+if METRICAS_HABILITADAS:
+    app.add_middleware(MiddlewareMetricas)
+
+if PERFIL_HABILITADO:
+    app.add_middleware(MiddlewarePerfil)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -1212,6 +3712,151 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ================ ÍNDICES ================
+# Índices exigidos pelas consultas da API, por coleção. Na inicialização os
+# índices existentes são comparados com esta lista: os ausentes são criados e
+# os que não constam aqui (ou são prefixo de outro) são apenas reportados no log.
+
+# Relevância de cada campo na busca textual (/partidas/busca)
+PESOS_BUSCA_TEXTO = {
+    "time_casa": 10,
+    "time_visitante": 10,
+    "campeonato": 5,
+    "arbitro": 3,
+    "local_estadio": 2,
+}
+
+INDICES_REQUERIDOS: Dict[str, List[Dict[str, Any]]] = {
+    "partidas": [
+        # Busca/atualização/remoção por id em todas as rotas
+        {"chaves": [("id", 1)], "unique": True},
+        # Listagem ordenada e paginada por (criado_em, id)
+        {"chaves": ORDEM_LISTAGEM},
+        # Filtros da listagem
+        {"chaves": [("campeonato", 1), ("rodada", 1)] + ORDEM_LISTAGEM},
+        {"chaves": [("time_casa", 1)] + ORDEM_LISTAGEM},
+        {"chaves": [("time_visitante", 1)] + ORDEM_LISTAGEM},
+        # Próximas partidas: intervalo e ordenação por data_hora
+        {"chaves": ORDEM_PROXIMAS},
+        # Busca textual (único índice de texto da coleção)
+        {"chaves": [(campo, "text") for campo in PESOS_BUSCA_TEXTO], "opcoes": {
+            "name": "busca_texto",
+            "weights": PESOS_BUSCA_TEXTO,
+            "default_language": "portuguese",
+        }},
+    ],
+    "analises": [
+        {"chaves": [("partida_id", 1)], "unique": True},
+    ],
+    "odds_historico": [
+        # Bucket da hora corrente no registro e série por partida em ordem
+        {"chaves": [("partida_id", 1), ("inicio", 1)]},
+    ],
+    "times": [
+        # Resumo do time: leitura e atualização incremental por chave
+        {"chaves": [("chave", 1)], "unique": True},
+    ],
+}
+
+
+def _normalizar_chaves(chaves) -> Tuple[Tuple[str, Any], ...]:
+    chaves = [(campo, int(direcao) if isinstance(direcao, (int, float)) else direcao) for campo, direcao in chaves]
+    # Índice de texto: a ordem dos campos não importa
+    texto = sorted(chave for chave in chaves if chave[1] == "text")
+    return tuple([chave for chave in chaves if chave[1] != "text"] + texto)
+
+
+def _chaves_indice_existente(info: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    """Chaves de um índice de index_information(); o de texto aparece como _fts/_ftsx"""
+    if any(campo == "_fts" for campo, _ in info["key"]):
+        outras = [(campo, direcao) for campo, direcao in info["key"] if campo not in ("_fts", "_ftsx")]
+        return _normalizar_chaves(outras + [(campo, "text") for campo in info.get("weights", {})])
+    return _normalizar_chaves(info["key"])
+
+
+async def reconciliar_indices(colecao: str, requeridos: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """Cria os índices ausentes de uma coleção e reporta os redundantes"""
+    existentes = await db[colecao].index_information()
+    por_chave = {
+        _chaves_indice_existente(info): (nome, info)
+        for nome, info in existentes.items()
+        if nome != "_id_"
+    }
+    chaves_requeridas = {_normalizar_chaves(indice["chaves"]) for indice in requeridos}
+
+    relatorio: Dict[str, List[str]] = {"criados": [], "divergentes": [], "redundantes": []}
+
+    for indice in requeridos:
+        chaves = _normalizar_chaves(indice["chaves"])
+        unique = indice.get("unique", False)
+        existente = por_chave.get(chaves)
+
+        if existente:
+            nome, info = existente
+            pesos = indice.get("opcoes", {}).get("weights")
+            if bool(info.get("unique", False)) != unique:
+                logger.warning(f"Índice {colecao}.{nome} existe mas unique={info.get('unique', False)} (esperado {unique})")
+                relatorio["divergentes"].append(nome)
+            elif pesos and info.get("weights") != pesos:
+                logger.warning(f"Índice de texto {colecao}.{nome} existe com pesos {info.get('weights')} (esperado {pesos})")
+                relatorio["divergentes"].append(nome)
+            continue
+
+        logger.warning(f"Índice ausente em {colecao}: {list(chaves)} (unique={unique}) - criando")
+        try:
+            nome = await db[colecao].create_index(list(chaves), unique=unique, **indice.get("opcoes", {}))
+            relatorio["criados"].append(nome)
+        except OperationFailure as e:
+            logger.error(f"Não foi possível criar índice em {colecao} {list(chaves)}: {e}")
+
+    for chaves, (nome, _) in por_chave.items():
+        # Índice não declarado ou coberto (prefixo) por um índice requerido
+        coberto = any(
+            outras != chaves and outras[:len(chaves)] == chaves
+            for outras in chaves_requeridas
+        )
+        if chaves not in chaves_requeridas or coberto:
+            logger.warning(f"Índice redundante em {colecao}: {nome}")
+            relatorio["redundantes"].append(nome)
+
+    return relatorio
+
+
+@app.on_event("startup")
+async def criar_indices():
+    for colecao, requeridos in INDICES_REQUERIDOS.items():
+        relatorio = await reconciliar_indices(colecao, requeridos)
+        logger.info(
+            f"Índices de {colecao}: {len(relatorio['criados'])} criado(s), "
+            f"{len(relatorio['redundantes'])} redundante(s), {len(relatorio['divergentes'])} divergente(s)"
+        )
+
+
+@app.on_event("startup")
+async def carregar_autocomplete():
+    await indice_autocomplete.carregar(db.partidas)
+    logger.info(
+        "Autocomplete: " + ", ".join(f"{len(indice)} {campo}" for campo, indice in indice_autocomplete.indices.items())
+    )
+
+
+@app.on_event("startup")
+async def iniciar_monitor_event_loop():
+    monitor_event_loop.iniciar()
+
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await monitor_event_loop.parar()
+    executor_calculos.encerrar()
+    client.close()
+
+
+# ================ SUBSISTEMAS ================
+# Módulos que usam os modelos, o motor e o banco deste arquivo (import server):
+# importados no fim, com tudo acima já definido. As rotas acima só acessam
+# esses módulos durante as requisições.
+
+import exportacao  # noqa: E402
+import migracao_datas  # noqa: E402
+import resumo_times  # noqa: E402
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Teste de carga da API (app FastAPI real, em processo).
+
+As requisições vão direto para o app via httpx.ASGITransport, sem rede e sem
+servidor uvicorn; o banco é um MongoDB em memória (mongomock-motor) ou o
+MongoDB configurado em backend/.env (--banco mongo). N clientes concorrentes
+executam uma mistura realista de rotas durante o tempo pedido.
+
+Relatório:
+- Vazão (req/s) e latência p50/p95/p99/máx por rota
+- Atraso do event loop: um monitor dorme INTERVALO_MONITOR e mede quanto
+  acordou atrasado (trechos síncronos longos travam todas as requisições)
+- Executor de cálculos: tarefas no pool, no loop e rejeitadas (503)
+
+As operações pesadas (lote, exportar) ficam fora do mix padrão; com elas a
+latência de listar/buscar/criar deve continuar estável (EXECUTOR_MODO=nenhum
+mostra o contrário).
+
+Exemplos:
+    python teste_carga.py
+    python teste_carga.py --concorrencia 50 --duracao 30
+    python teste_carga.py --mix criar=1,listar=2,buscar=4,atualizar=1,analise=4 --json carga.json
+    python teste_carga.py --mix listar=3,buscar=3,criar=1,lote=1,exportar=1 --tamanho-lote 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "teste_carga")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+import server  # noqa: E402
+from benchmark import gerar_partidas_sinteticas  # noqa: E402
+
+
+INTERVALO_MONITOR = 0.01  # segundos
+MIX_PADRAO = "criar=1,listar=2,buscar=3,atualizar=1,analise=3"
+CAMPOS_ENTRADA = set(server.PartidaCreate.model_fields)
+
+
+class Estado:
+    """Partidas conhecidas pelos clientes e latências coletadas por rota"""
+
+    def __init__(self, semente: int, tamanho_lote: int = 1000):
+        self.rng = random.Random(semente)
+        self.tamanho_lote = tamanho_lote
+        self.corpo_lote: Optional[Dict[str, Any]] = None
+        self.partidas: List[Dict[str, Any]] = []
+        self.latencias: Dict[str, List[float]] = {}
+        self.erros: Dict[str, int] = {}
+
+    def registrar(self, rota: str, duracao: float, status: int) -> None:
+        self.latencias.setdefault(rota, []).append(duracao)
+        if status >= 400:
+            self.erros[rota] = self.erros.get(rota, 0) + 1
+
+    def nova_partida(self) -> Dict[str, Any]:
+        doc = gerar_partidas_sinteticas(1, self.rng.getrandbits(32))[0]
+        return {campo: valor for campo, valor in doc.items() if campo in CAMPOS_ENTRADA}
+
+
+def _corpo(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {"content": server.codificar_json(payload), "headers": {"Content-Type": "application/json"}}
+
+
+async def _requisitar(
+    cliente: httpx.AsyncClient, estado: Estado, rota: str, metodo: str, url: str, **kwargs
+) -> httpx.Response:
+    inicio = time.perf_counter()
+    resposta = await cliente.request(metodo, url, **kwargs)
+    estado.registrar(rota, time.perf_counter() - inicio, resposta.status_code)
+    return resposta
+
+
+async def op_criar(cliente: httpx.AsyncClient, estado: Estado) -> None:
+    payload = estado.nova_partida()
+    resposta = await _requisitar(cliente, estado, "POST /api/partidas", "POST", "/api/partidas", **_corpo(payload))
+    if resposta.status_code == 200:
+        estado.partidas.append(resposta.json())
+
+
+async def op_listar(cliente: httpx.AsyncClient, estado: Estado) -> None:
+    await _requisitar(cliente, estado, "GET /api/partidas", "GET", "/api/partidas", params={"limit": 50})
+
+
+async def op_buscar(cliente: httpx.AsyncClient, estado: Estado) -> None:
+    partida = estado.rng.choice(estado.partidas)
+    await _requisitar(cliente, estado, "GET /api/partidas/{id}", "GET", f"/api/partidas/{partida['id']}")
+
+
+async def op_atualizar(cliente: httpx.AsyncClient, estado: Estado) -> None:
+    partida = estado.rng.choice(estado.partidas)
+    payload = {campo: valor for campo, valor in partida.items() if campo in CAMPOS_ENTRADA}
+    # Metade das edições mexe só nas odds (caminho de recálculo de EV), metade no resto
+    if estado.rng.random() < 0.5:
+        payload["odd_casa"] = round(max(1.01, payload["odd_casa"] + estado.rng.uniform(-0.2, 0.2)), 2)
+    else:
+        payload["media_gols_marcados_casa"] = round(estado.rng.uniform(0.5, 3.0), 2)
+    await _requisitar(
+        cliente, estado, "PUT /api/partidas/{id}", "PUT", f"/api/partidas/{partida['id']}", **_corpo(payload)
+    )
+
+
+async def op_analise(cliente: httpx.AsyncClient, estado: Estado) -> None:
+    partida = estado.rng.choice(estado.partidas)
+    await _requisitar(
+        cliente, estado, "GET /api/partidas/{id}/analise-v2", "GET", f"/api/partidas/{partida['id']}/analise-v2"
+    )
+
+
+async def op_lote(cliente: httpx.AsyncClient, estado: Estado) -> None:
+    # Corpo gerado uma vez: montá-lo a cada chamada pesaria no mesmo event loop do servidor
+    if estado.corpo_lote is None:
+        estado.corpo_lote = _corpo({"partidas": [estado.nova_partida() for _ in range(estado.tamanho_lote)]})
+    await _requisitar(
+        cliente, estado, "POST /api/analise-v2/lote", "POST", "/api/analise-v2/lote", **estado.corpo_lote
+    )
+
+
+async def op_exportar(cliente: httpx.AsyncClient, estado: Estado) -> None:
+    await _requisitar(cliente, estado, "GET /api/exportar", "GET", "/api/exportar", params={"formato": "csv"})
+
+
+OPERACOES: Dict[str, Callable[[httpx.AsyncClient, Estado], Any]] = {
+    "criar": op_criar,
+    "listar": op_listar,
+    "buscar": op_buscar,
+    "atualizar": op_atualizar,
+    "analise": op_analise,
+    "lote": op_lote,
+    "exportar": op_exportar,
+}
+
+
+def interpretar_mix(texto: str) -> Tuple[List[str], List[float]]:
+    """"criar=1,buscar=3" -> (operações, pesos)"""
+    pesos: Dict[str, float] = {}
+    for item in texto.split(","):
+        nome, _, peso = item.partition("=")
+        nome = nome.strip()
+        if nome not in OPERACOES:
+            raise ValueError(f"Operação desconhecida: {nome} (válidas: {', '.join(OPERACOES)})")
+        pesos[nome] = float(peso or 1)
+    if not any(peso > 0 for peso in pesos.values()):
+        raise ValueError("O mix precisa de ao menos uma operação com peso > 0")
+    return list(pesos), list(pesos.values())
+
+
+async def monitorar_event_loop(atrasos: List[float], parar: asyncio.Event) -> None:
+    """Quanto cada sleep(INTERVALO_MONITOR) acordou depois do previsto"""
+    loop = asyncio.get_running_loop()
+    while not parar.is_set():
+        inicio = loop.time()
+        await asyncio.sleep(INTERVALO_MONITOR)
+        atrasos.append(max(0.0, loop.time() - inicio - INTERVALO_MONITOR))
+
+
+async def cliente_carga(
+    cliente: httpx.AsyncClient, estado: Estado, nomes: List[str], pesos: List[float], fim: float
+) -> None:
+    while time.perf_counter() < fim:
+        nome = estado.rng.choices(nomes, weights=pesos)[0]
+        await OPERACOES[nome](cliente, estado)
+        # O banco em memória responde sem nunca ceder o event loop: sem este
+        # ponto de troca um cliente monopolizaria o loop até o fim da carga
+        await asyncio.sleep(0)
+
+
+def _percentis_ms(valores: List[float]) -> Dict[str, float]:
+    amostras = np.asarray(valores) * 1000
+    p50, p95, p99 = np.percentile(amostras, [50, 95, 99])
+    return {"p50": round(float(p50), 2), "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2), "max": round(float(amostras.max()), 2)}
+
+
+def resumir(estado: Estado, atrasos: List[float], duracao: float, concorrencia: int) -> Dict[str, Any]:
+    rotas = {
+        rota: {
+            "requisicoes": len(latencias),
+            "erros": estado.erros.get(rota, 0),
+            "req_s": round(len(latencias) / duracao, 1),
+            "latencia_ms": _percentis_ms(latencias),
+        }
+        for rota, latencias in sorted(estado.latencias.items())
+    }
+    total = sum(len(latencias) for latencias in estado.latencias.values())
+    return {
+        "versao_modelo": server.VERSAO_MODELO,
+        "concorrencia": concorrencia,
+        "duracao_s": round(duracao, 2),
+        "requisicoes": total,
+        "req_s": round(total / duracao, 1),
+        "rotas": rotas,
+        "atraso_event_loop_ms": _percentis_ms(atrasos) if atrasos else None,
+        "executor": server.executor_calculos.estatisticas(),
+    }
+
+
+def configurar_banco(banco: str) -> None:
+    if banco != "memoria":
+        return
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("❌ --banco memoria requer mongomock-motor (pip install mongomock-motor)")
+    server.db = AsyncMongoMockClient(tz_aware=True)[os.environ["DB_NAME"]]
+
+
+async def executar_carga(args: argparse.Namespace) -> Dict[str, Any]:
+    nomes, pesos = interpretar_mix(args.mix)
+    estado = Estado(args.semente, args.tamanho_lote)
+
+    # ASGITransport não dispara os eventos de startup: índices criados aqui
+    await server.criar_indices()
+
+    transporte = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://carga", timeout=None) as cliente:
+        print(f"🌱 Cadastrando {args.partidas_iniciais} partidas iniciais...")
+        for _ in range(args.partidas_iniciais):
+            await op_criar(cliente, estado)
+        if not estado.partidas:
+            raise SystemExit("❌ Nenhuma partida inicial pôde ser cadastrada")
+        estado.latencias.clear()
+        estado.erros.clear()
+
+        print(f"🚀 {args.concorrencia} clientes por {args.duracao:.0f}s (mix: {args.mix})")
+        atrasos: List[float] = []
+        parar = asyncio.Event()
+        monitor = asyncio.create_task(monitorar_event_loop(atrasos, parar))
+
+        inicio = time.perf_counter()
+        fim = inicio + args.duracao
+        await asyncio.gather(*(
+            cliente_carga(cliente, estado, nomes, pesos, fim) for _ in range(args.concorrencia)
+        ))
+        duracao = time.perf_counter() - inicio
+
+        parar.set()
+        await monitor
+
+    return resumir(estado, atrasos, duracao, args.concorrencia)
+
+
+def imprimir(resumo: Dict[str, Any]) -> None:
+    print(f"\n📊 {resumo['requisicoes']} requisições em {resumo['duracao_s']}s "
+          f"({resumo['req_s']} req/s, {resumo['concorrencia']} clientes)")
+    print(f"   {'Rota':<36} {'Req':>7} {'Erros':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'máx':>8}")
+    for rota, dados in resumo["rotas"].items():
+        lat = dados["latencia_ms"]
+        print(f"   {rota:<36} {dados['requisicoes']:>7} {dados['erros']:>6} {dados['req_s']:>8} "
+              f"{lat['p50']:>8} {lat['p95']:>8} {lat['p99']:>8} {lat['max']:>8}")
+    print("   (latências em ms)")
+
+    atraso = resumo["atraso_event_loop_ms"]
+    if atraso:
+        print(f"\n   Atraso do event loop (ms): p50 {atraso['p50']}  p95 {atraso['p95']}  "
+              f"p99 {atraso['p99']}  máx {atraso['max']}")
+
+    executor = resumo["executor"]
+    print(f"   Executor ({executor['modo']}, {executor['trabalhadores']} trabalhador(es)): "
+          f"{executor['no_pool']} no pool, {executor['no_loop']} no loop, {executor['rejeitadas']} rejeitada(s)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga da API (em processo)")
+    parser.add_argument("--concorrencia", type=int, default=20, help="Clientes simultâneos")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument("--mix", default=MIX_PADRAO, help=f"Pesos das operações (padrão: {MIX_PADRAO})")
+    parser.add_argument("--partidas-iniciais", type=int, default=200)
+    parser.add_argument("--tamanho-lote", type=int, default=1000, help="Partidas por requisição da operação lote")
+    parser.add_argument("--banco", choices=["memoria", "mongo"], default="memoria",
+                        help="memoria: mongomock-motor; mongo: MONGO_URL/DB_NAME do .env")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--json", dest="saida_json", help="Grava o relatório neste arquivo JSON")
+    args = parser.parse_args()
+
+    try:
+        interpretar_mix(args.mix)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if args.concorrencia < 1 or args.duracao <= 0:
+        print("❌ --concorrencia e --duracao devem ser positivos")
+        return 1
+
+    configurar_banco(args.banco)
+    resumo = asyncio.run(executar_carga(args))
+    imprimir(resumo)
+
+    if args.saida_json:
+        with open(args.saida_json, "w", encoding="utf-8") as arquivo:
+            json.dump(resumo, arquivo, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
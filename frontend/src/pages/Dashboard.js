@@ -9,19 +9,44 @@ import { toast } from "sonner";
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Apenas as colunas renderizadas nos cards
+const CAMPOS_LISTAGEM = [
+  "campeonato",
+  "rodada",
+  "time_casa",
+  "time_visitante",
+  "forma_casa",
+  "forma_fora",
+  "odd_casa",
+  "odd_empate",
+  "odd_fora",
+].join(",");
+const TAMANHO_PAGINA = 60;
+
 const Dashboard = () => {
   const navigate = useNavigate();
   const [partidas, setPartidas] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [proximoCursor, setProximoCursor] = useState(null);
+  const [carregandoMais, setCarregandoMais] = useState(false);
 
   useEffect(() => {
     carregarPartidas();
   }, []);
 
+  const buscarPagina = async (cursor) => {
+    const params = { limit: TAMANHO_PAGINA, campos: CAMPOS_LISTAGEM };
+    if (cursor) {
+      params.after = cursor;
+    }
+    const response = await axios.get(`${API}/partidas`, { params });
+    setProximoCursor(response.headers["x-proximo-cursor"] || null);
+    return response.data;
+  };
+
   const carregarPartidas = async () => {
     try {
-      const response = await axios.get(`${API}/partidas`);
-      setPartidas(response.data);
+      setPartidas(await buscarPagina(null));
     } catch (error) {
       console.error("Erro ao carregar partidas:", error);
       toast.error("Erro ao carregar partidas");
@@ -30,6 +55,19 @@ const Dashboard = () => {
     }
   };
 
+  const carregarMais = async () => {
+    setCarregandoMais(true);
+    try {
+      const pagina = await buscarPagina(proximoCursor);
+      setPartidas((atuais) => [...atuais, ...pagina]);
+    } catch (error) {
+      console.error("Erro ao carregar partidas:", error);
+      toast.error("Erro ao carregar partidas");
+    } finally {
+      setCarregandoMais(false);
+    }
+  };
+
   const deletarPartida = async (id, e) => {
     e.stopPropagation();
     if (window.confirm("Tem certeza que deseja deletar esta partida?")) {
@@ -154,6 +192,20 @@ const Dashboard = () => {
             ))}
           </div>
         )}
+
+        {!loading && proximoCursor && (
+          <div className="mt-8 text-center">
+            <Button
+              onClick={carregarMais}
+              disabled={carregandoMais}
+              variant="outline"
+              className="border-emerald-200 text-emerald-700 hover:bg-emerald-50"
+              data-testid="carregar-mais-btn"
+            >
+              {carregandoMais ? "Carregando..." : "Carregar mais partidas"}
+            </Button>
+          </div>
+        )}
       </main>
     </div>
   );
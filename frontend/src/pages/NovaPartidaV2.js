@@ -1,4 +1,4 @@
-import { useState } from "react";
+import { useRef, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import axios from "axios";
 import { Button } from "@/components/ui/button";
@@ -14,11 +14,22 @@ import { toast } from "sonner";
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Campos do formulário com sugestões de valores já cadastrados (GET /api/autocomplete/{campo})
+const CAMPOS_AUTOCOMPLETE = {
+  time_casa: "time",
+  time_visitante: "time",
+  campeonato: "campeonato",
+  arbitro: "arbitro",
+  local_estadio: "local_estadio"
+};
+
 const NovaPartidaV2 = () => {
   const navigate = useNavigate();
   const [loading, setLoading] = useState(false);
   const [activeTab, setActiveTab] = useState("geral");
   const [observacaoManual, setObservacaoManual] = useState({ texto: "", impacto: 0 });
+  const [sugestoes, setSugestoes] = useState({});
+  const temporizadoresSugestoes = useRef({});
   const [formData, setFormData] = useState({
     // Geral
     campeonato: "",
@@ -60,10 +71,50 @@ const NovaPartidaV2 = () => {
     artilheiro_disponivel_fora: true
   });
 
+  const buscarSugestoes = (field, prefixo) => {
+    clearTimeout(temporizadoresSugestoes.current[field]);
+    if (!prefixo.trim()) {
+      setSugestoes(prev => ({ ...prev, [field]: [] }));
+      return;
+    }
+    // Espera o usuário parar de digitar antes de consultar
+    temporizadoresSugestoes.current[field] = setTimeout(async () => {
+      try {
+        const response = await axios.get(`${API}/autocomplete/${CAMPOS_AUTOCOMPLETE[field]}`, {
+          params: { prefixo, limit: 8 }
+        });
+        setSugestoes(prev => ({ ...prev, [field]: response.data }));
+      } catch (error) {
+        console.error("Erro ao buscar sugestões:", error);
+      }
+    }, 200);
+  };
+
   const handleChange = (field, value) => {
-    setFormData(prev => ({ ...prev, [field]: value }));
+    setFormData(prev => {
+      const atualizado = { ...prev, [field]: value };
+      // Árbitro conhecido: preenche a última média de cartões se o campo estiver vazio
+      if (field === "arbitro" && prev.media_cartoes_arbitro === "") {
+        const arbitro = (sugestoes.arbitro || []).find(s => s.valor === value);
+        if (arbitro && arbitro.media_cartoes_arbitro != null) {
+          atualizado.media_cartoes_arbitro = String(arbitro.media_cartoes_arbitro);
+        }
+      }
+      return atualizado;
+    });
+    if (field in CAMPOS_AUTOCOMPLETE) {
+      buscarSugestoes(field, value);
+    }
   };
 
+  const listaSugestoes = (field) => (
+    <datalist id={`sugestoes-${field}`}>
+      {(sugestoes[field] || []).map(sugestao => (
+        <option key={sugestao.valor} value={sugestao.valor} />
+      ))}
+    </datalist>
+  );
+
   const adicionarObservacao = () => {
     if (observacaoManual.texto.trim()) {
       setFormData(prev => ({
@@ -146,7 +197,8 @@ const NovaPartidaV2 = () => {
           ? formData.observacoes_contextuais
           : null,
         // Garantir que campos vazios sejam null ao invés de string vazia
-        data_hora: formData.data_hora || null,
+        // datetime-local é horário local do navegador: envia o instante com fuso (UTC)
+        data_hora: formData.data_hora ? new Date(formData.data_hora).toISOString() : null,
         local_estadio: formData.local_estadio || null,
         desempenho_especifico_casa: formData.desempenho_especifico_casa || null,
         lesoes_suspensoes_casa: formData.lesoes_suspensoes_casa || null,
@@ -238,10 +290,13 @@ const NovaPartidaV2 = () => {
                         <Input
                           id="campeonato"
                           placeholder="Ex: Liga dos Campeões"
+                          list="sugestoes-campeonato"
+                          autoComplete="off"
                           value={formData.campeonato}
                           onChange={(e) => handleChange("campeonato", e.target.value)}
                           required
                         />
+                        {listaSugestoes("campeonato")}
                       </div>
                       <div>
                         <Label htmlFor="rodada">Rodada *</Label>
@@ -268,9 +323,12 @@ const NovaPartidaV2 = () => {
                         <Input
                           id="local_estadio"
                           placeholder="Ex: BayArena"
+                          list="sugestoes-local_estadio"
+                          autoComplete="off"
                           value={formData.local_estadio}
                           onChange={(e) => handleChange("local_estadio", e.target.value)}
                         />
+                        {listaSugestoes("local_estadio")}
                       </div>
                     </div>
                   </div>
@@ -286,10 +344,13 @@ const NovaPartidaV2 = () => {
                         <Input
                           id="arbitro"
                           placeholder="Nome do árbitro"
+                          list="sugestoes-arbitro"
+                          autoComplete="off"
                           value={formData.arbitro}
                           onChange={(e) => handleChange("arbitro", e.target.value)}
                           required
                         />
+                        {listaSugestoes("arbitro")}
                       </div>
                       <div>
                         <Label htmlFor="media_cartoes_arbitro">Média de Cartões do Árbitro *</Label>
@@ -579,10 +640,13 @@ const NovaPartidaV2 = () => {
                       <Input
                         id="time_casa"
                         placeholder="Ex: Leverkusen"
+                        list="sugestoes-time_casa"
+                        autoComplete="off"
                         value={formData.time_casa}
                         onChange={(e) => handleChange("time_casa", e.target.value)}
                         required
                       />
+                      {listaSugestoes("time_casa")}
                     </div>
                   </div>
 
@@ -697,10 +761,13 @@ const NovaPartidaV2 = () => {
                       <Input
                         id="time_visitante"
                         placeholder="Ex: PSG"
+                        list="sugestoes-time_visitante"
+                        autoComplete="off"
                         value={formData.time_visitante}
                         onChange={(e) => handleChange("time_visitante", e.target.value)}
                         required
                       />
+                      {listaSugestoes("time_visitante")}
                     </div>
                   </div>
 
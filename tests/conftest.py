@@ -0,0 +1,151 @@
+"""
+Configuração comum dos testes: importa backend/server.py com um MongoDB em
+memória (mongomock-motor) no lugar do servidor real.
+"""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "analisebet_testes")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import resumo_times  # noqa: E402
+import server  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def banco(monkeypatch):
+    """Banco vazio e cache de análises novo a cada teste"""
+    db = AsyncMongoMockClient(tz_aware=True)[os.environ["DB_NAME"]]
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "cache_analises", server.CacheAnalises(max_entradas=5000, max_bytes=64 * 1024 * 1024))
+    monkeypatch.setattr(server, "analises_em_andamento", server.ChamadasCoalescidas())
+    return db
+
+
+@pytest.fixture
+def cliente(banco):
+    """Cliente HTTP do app, com os eventos de startup/shutdown"""
+    with TestClient(server.app) as cliente:
+        yield cliente
+
+
+def executar(cliente, funcao, *args):
+    """Executa uma corrotina no event loop do app (leituras e gravações diretas no banco)"""
+    return cliente.portal.call(funcao, *args)
+
+
+def resumos_times(cliente, banco):
+    """
+    Documentos de db.times comparáveis, por chave: sem _id e atualizado_em, e
+    com os contadores nunca incrementados valendo 0 (como na leitura da API)
+    """
+    async def ler():
+        return await banco.times.find({}, {"_id": 0, "atualizado_em": 0}).sort("chave", 1).to_list(None)
+    return [
+        {**{campo: 0 for campo in resumo_times.CONTADORES_TIME}, **resumo}
+        for resumo in executar(cliente, ler)
+    ]
+
+
+def conferir_com_reconstrucao(cliente, banco):
+    """O estado incremental de db.times é igual ao recalculado do zero a partir de db.partidas"""
+    incremental = resumos_times(cliente, banco)
+    assert cliente.post("/api/times/reconstruir").json() == {"times": len(incremental)}
+    assert resumos_times(cliente, banco) == incremental
+    return {resumo["chave"]: resumo for resumo in incremental}
+
+
+def dados_partida(**alteracoes):
+    """Corpo válido de POST /api/partidas (data_hora preenchida: o mongomock não ordena None no $push)"""
+    dados = {
+        "campeonato": "Brasileirão Série A",
+        "rodada": 10,
+        "data_hora": "2024-10-22T16:00:00Z",
+        "local_estadio": "Maracanã",
+        "time_casa": "Flamengo",
+        "forma_casa": "V-V-E-D-V",
+        "media_gols_marcados_casa": 1.8,
+        "media_gols_sofridos_casa": 0.9,
+        "lesoes_suspensoes_casa": "Nenhuma",
+        "artilheiro_disponivel_casa": True,
+        "time_visitante": "Palmeiras",
+        "forma_fora": "V-E-E-D-V",
+        "media_gols_marcados_fora": 1.5,
+        "media_gols_sofridos_fora": 1.1,
+        "lesoes_suspensoes_fora": "2 titulares",
+        "artilheiro_disponivel_fora": True,
+        "historico_h2h": "3V 2E 1D",
+        "arbitro": "Raphael Claus",
+        "media_cartoes_arbitro": 4.5,
+        "condicoes_externas": "Tempo bom",
+        "odd_casa": 2.1,
+        "odd_empate": 3.3,
+        "odd_fora": 3.6,
+    }
+    dados.update(alteracoes)
+    return dados
+
+
+TIMES = ["Flamengo", "Palmeiras", "Grêmio", "Internacional", "São Paulo", "Corinthians",
+         "Atlético-MG", "Fluminense", "Botafogo", "Bahia", "Fortaleza", "Cruzeiro"]
+ARBITROS = ["Anderson Daronco", "Raphael Claus", "Wilton Pereira Sampaio", "Bruno Arleu"]
+LESOES = [None, "Nenhuma", "1 reserva", "2 titulares", "Lesão grave do zagueiro", "3 desfalques"]
+NOTICIAS = [None, "Time confiante e motivado", "Pressão após derrotas", "Briga pelo título",
+            "Risco de rebaixamento", "Jogo decisivo pela classificação"]
+CONDICOES = ["Tempo bom", "Chuva forte", "Gramado pesado", "Boas condições", "Calor"]
+
+
+def gerar_partidas_sinteticas(quantidade: int, semente: int = 42):
+    """Corpos de POST /api/partidas variados e reprodutíveis (mesma semente = mesmos dados)"""
+    rng = random.Random(semente)
+
+    def forma() -> str:
+        return "-".join(rng.choice("VVEDD") for _ in range(5))
+
+    partidas = []
+    for i in range(quantidade):
+        casa, visitante = rng.sample(TIMES, 2)
+        partidas.append(dados_partida(
+            campeonato=rng.choice(["Brasileirão Série A", "Copa do Brasil", "Libertadores"]),
+            rodada=rng.randint(1, 38),
+            data_hora=f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(16, 21)}:00:00Z",
+            local_estadio=f"Estádio {casa}",
+            time_casa=casa,
+            forma_casa=forma(),
+            media_gols_marcados_casa=round(rng.uniform(0.5, 3.0), 2),
+            media_gols_sofridos_casa=round(rng.uniform(0.4, 2.5), 2),
+            lesoes_suspensoes_casa=rng.choice(LESOES),
+            artilheiro_disponivel_casa=rng.random() > 0.2,
+            time_visitante=visitante,
+            forma_fora=forma(),
+            media_gols_marcados_fora=round(rng.uniform(0.3, 2.5), 2),
+            media_gols_sofridos_fora=round(rng.uniform(0.5, 3.0), 2),
+            lesoes_suspensoes_fora=rng.choice(LESOES),
+            artilheiro_disponivel_fora=rng.random() > 0.2,
+            historico_h2h=f"{rng.randint(0, 4)}V {rng.randint(0, 3)}E {rng.randint(0, 4)}D",
+            arbitro=rng.choice(ARBITROS),
+            media_cartoes_arbitro=round(rng.uniform(2.0, 7.0), 1),
+            condicoes_externas=rng.choice(CONDICOES),
+            noticia_1=rng.choice(NOTICIAS),
+            noticia_1_impacto=rng.randint(-5, 5),
+            noticia_2=rng.choice(NOTICIAS),
+            noticia_2_impacto=rng.randint(-5, 5),
+            observacoes_contextuais=[{"texto": "Clássico regional", "impacto": 2}] if i % 7 == 0 else None,
+            odd_casa=round(rng.uniform(1.3, 5.0), 2),
+            odd_empate=round(rng.uniform(2.8, 4.5), 2),
+            odd_fora=round(rng.uniform(1.5, 8.0), 2),
+        ))
+    return partidas
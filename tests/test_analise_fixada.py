@@ -0,0 +1,41 @@
+"""
+JSON de analisar_1x2_v2 fixado para entradas representativas: campos legados
+como fallback, H2H vazio e cada impacto de notícia (0-10).
+
+O arquivo em dados/ foi gerado com a implementação anterior a
+CaracteristicasPartida; qualquer diferença é mudança de saída do modelo.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+import server
+
+CASOS = json.loads((Path(__file__).parent / "dados" / "analise_1x2_fixada.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("caso", CASOS, ids=[caso["nome"] for caso in CASOS])
+def test_analise_1x2_v2_fixada(caso):
+    analise = server.analisar_1x2_v2(server.Partida(**caso["partida"]))
+    assert analise.model_dump(mode="json") == caso["esperado"]
+
+
+# Implementação anterior: max(0, min(10, ...)) devolve int nos limites, e os
+# detalhes_scores da análise legada (Dict[str, Any]) saem como 10/0 no JSON
+MOTIVACAO_NOS_LIMITES = [
+    ("Time confiante, motivado e decisivo; briga pelo título, acesso e classificação", 10),
+    ("Pressão, crise e derrotas: demissão e rebaixamento", 0),
+]
+
+
+@pytest.mark.parametrize("noticias, esperado", MOTIVACAO_NOS_LIMITES, ids=["acima", "abaixo"])
+def test_motivacao_nos_limites_como_na_implementacao_anterior(noticias, esperado):
+    score = server.calcular_score_motivacao(noticias)
+    assert score == esperado and type(score) is int
+
+    partida = server.Partida(**{**CASOS[0]["partida"], "noticias_relevantes": noticias})
+    detalhes = json.loads(server.analisar_partida_completa(partida).model_dump_json())["melhor_recomendacao"]["detalhes_scores"]
+    assert detalhes["motivacao"] == esperado and type(detalhes["motivacao"]) is int
+    assert server.calcular_score_motivacao("Time confiante") == 6.5
@@ -0,0 +1,57 @@
+"""Análises V2 calculadas na gravação e salvas em db.analises (e o recálculo em segundo plano)"""
+
+import time
+
+import server
+from tests.conftest import dados_partida, executar, gerar_partidas_sinteticas
+
+
+def _analise_salva(cliente, banco, partida_id):
+    return executar(cliente, lambda: banco.analises.find_one({"partida_id": partida_id}, {"_id": 0}))
+
+
+def test_criacao_e_edicao_gravam_a_analise(cliente, banco):
+    partida = cliente.post("/api/partidas", json=dados_partida()).json()
+    salva = _analise_salva(cliente, banco, partida["id"])
+
+    esperada = server.analisar_partida_v2(server.Partida(**partida)).model_dump(mode="json")
+    assert salva["versao_modelo"] == server.VERSAO_MODELO
+    assert salva["analise"] == esperada
+    assert cliente.get(f"/api/partidas/{partida['id']}/analise-v2").json() == esperada
+
+    editada = cliente.put(f"/api/partidas/{partida['id']}", json=dados_partida(forma_casa="D-D-D-D-D")).json()
+    salva_depois = _analise_salva(cliente, banco, partida["id"])
+    assert salva_depois["chave"] != salva["chave"]
+    assert salva_depois["analise"] == server.analisar_partida_v2(server.Partida(**editada)).model_dump(mode="json")
+
+
+def test_analise_de_versao_anterior_e_recalculada_na_leitura(cliente, banco):
+    partida_id = cliente.post("/api/partidas", json=dados_partida()).json()["id"]
+    executar(cliente, lambda: banco.analises.update_one(
+        {"partida_id": partida_id}, {"$set": {"versao_modelo": "1.0", "analise.analise_1x2.confianca": "Obsoleta"}}
+    ))
+    server.cache_analises.invalidar(partida_id)
+
+    analise = cliente.get(f"/api/partidas/{partida_id}/analise-v2").json()
+
+    assert analise["analise_1x2"]["confianca"] != "Obsoleta"
+    assert _analise_salva(cliente, banco, partida_id)["versao_modelo"] == server.VERSAO_MODELO
+
+
+def test_recalculo_em_segundo_plano_grava_todas(cliente, banco, monkeypatch):
+    monkeypatch.setattr(server, "TAMANHO_LOTE_RECALCULO", 2)
+    docs = [server.Partida(**dados).model_dump() for dados in gerar_partidas_sinteticas(5)]
+    executar(cliente, lambda: banco.partidas.insert_many(docs))
+
+    job = cliente.post("/api/analises/recalcular").json()
+    for _ in range(200):
+        job = cliente.get(f"/api/analises/recalcular/{job['id']}").json()
+        if job["status"] not in ("pendente", "executando"):
+            break
+        time.sleep(0.01)
+
+    assert (job["status"], job["processadas"], job["total"]) == ("concluido", 5, 5)
+    for doc in docs:
+        salva = _analise_salva(cliente, banco, doc["id"])
+        assert salva["analise"] == server.analisar_partida_v2(server.Partida(**doc)).model_dump(mode="json")
+    assert cliente.get("/api/analises/recalcular/inexistente").status_code == 404
@@ -0,0 +1,89 @@
+"""Autocomplete: índice de prefixos em memória e a rota /api/autocomplete/{campo}"""
+
+import autocomplete
+import server
+from tests.conftest import dados_partida, executar
+
+
+# ================ ÍNDICE DE PREFIXOS ================
+
+def test_mais_usado_vence_mesmo_fora_das_primeiras_em_ordem_alfabetica():
+    contagens = {f"Time A{i:04d}": 1 for i in range(1500)}
+    contagens.update({"Time Zeta": 7, "Time Beta": 3, "Outro": 50})
+    indice = autocomplete.IndicePrefixos(contagens)
+
+    assert indice.buscar("time", 3) == [("Time Zeta", 7), ("Time Beta", 3), ("Time A0000", 1)]
+    assert len(indice.buscar("time", 5000)) == 1502
+
+
+def test_prefixo_sem_acentos_nem_maiusculas_e_empate_alfabetico():
+    indice = autocomplete.IndicePrefixos({"São Paulo": 2, "Santos": 2, "SAMPAIO CORRÊA": 2, "Sport": 9})
+
+    assert indice.buscar("sa", 10) == [("SAMPAIO CORRÊA", 2), ("Santos", 2), ("São Paulo", 2)]
+    assert indice.buscar("  SÃO   pa", 10) == [("São Paulo", 2)]
+    assert indice.buscar("x", 10) == []
+
+
+def test_ajustar_insere_e_remove_valores():
+    indice = autocomplete.IndicePrefixos({"Bahia": 1})
+    indice.ajustar("Botafogo", 2)
+    indice.ajustar("Bahia", -1)
+
+    assert indice.buscar("b", 10) == [("Botafogo", 2)]
+    assert len(indice) == 1
+    indice.ajustar("Botafogo", -2)
+    assert indice.buscar("b", 10) == []
+
+
+# ================ ROTA ================
+
+def _sugestoes(cliente, campo, prefixo, **params):
+    resposta = cliente.get(f"/api/autocomplete/{campo}", params={"prefixo": prefixo, **params})
+    assert resposta.status_code == 200
+    return resposta.json()
+
+
+def test_gravacoes_atualizam_sugestoes(cliente):
+    ids = [
+        cliente.post("/api/partidas", json=dados_partida(time_casa=casa, time_visitante=fora)).json()["id"]
+        for casa, fora in [("Flamengo", "Fluminense"), ("Fluminense", "Palmeiras"), ("Fortaleza", "Fluminense")]
+    ]
+
+    assert _sugestoes(cliente, "time", "f") == [
+        {"valor": "Fluminense", "partidas": 3, "media_cartoes_arbitro": None},
+        {"valor": "Flamengo", "partidas": 1, "media_cartoes_arbitro": None},
+        {"valor": "Fortaleza", "partidas": 1, "media_cartoes_arbitro": None},
+    ]
+    assert [s["valor"] for s in _sugestoes(cliente, "time", "f", limit=1)] == ["Fluminense"]
+
+    cliente.put(f"/api/partidas/{ids[0]}", json=dados_partida(time_casa="Bahia", time_visitante="Fluminense"))
+    cliente.delete(f"/api/partidas/{ids[1]}")
+    assert [(s["valor"], s["partidas"]) for s in _sugestoes(cliente, "time", "f")] == [("Fluminense", 2), ("Fortaleza", 1)]
+    assert [s["valor"] for s in _sugestoes(cliente, "time", "ba")] == ["Bahia"]
+
+
+def test_arbitro_traz_media_de_cartoes_mais_recente(cliente):
+    cliente.post("/api/partidas", json=dados_partida(arbitro="Wilton Pereira Sampaio", media_cartoes_arbitro=4.1))
+    cliente.post("/api/partidas", json=dados_partida(arbitro="Wilton Pereira Sampaio", media_cartoes_arbitro=5.3))
+
+    assert _sugestoes(cliente, "arbitro", "wil") == [
+        {"valor": "Wilton Pereira Sampaio", "partidas": 2, "media_cartoes_arbitro": 5.3}
+    ]
+
+
+def test_carregado_do_banco_na_inicializacao(cliente, banco):
+    docs = [server.Partida(**dados_partida(campeonato=c, local_estadio="Arena")).model_dump()
+            for c in ["Copa do Brasil", "Copa do Brasil", "Copa Sul-Americana"]]
+    executar(cliente, lambda: banco.partidas.insert_many(docs))
+    executar(cliente, autocomplete.indice_autocomplete.carregar, banco.partidas)
+
+    assert [(s["valor"], s["partidas"]) for s in _sugestoes(cliente, "campeonato", "copa")] == [
+        ("Copa do Brasil", 2), ("Copa Sul-Americana", 1)
+    ]
+    assert _sugestoes(cliente, "local_estadio", "are")[0]["partidas"] == 3
+
+
+def test_campo_sem_autocomplete(cliente):
+    resposta = cliente.get("/api/autocomplete/forma_casa", params={"prefixo": "v"})
+    assert resposta.status_code == 404
+    assert "time, campeonato, arbitro, local_estadio" in resposta.json()["detail"]
@@ -0,0 +1,34 @@
+"""Backtest: fatias avaliadas em processos filhos (spawn) combinam no mesmo resumo do processo único"""
+
+import random
+
+import server
+from tests.conftest import gerar_partidas_sinteticas
+
+import backtest
+
+
+def _historico(quantidade):
+    rng = random.Random(7)
+    historico = []
+    for dados in gerar_partidas_sinteticas(quantidade):
+        gols_casa, gols_fora = rng.randint(0, 3), rng.randint(0, 3)
+        historico.append(server.Partida(
+            **dados, gols_casa=gols_casa, gols_fora=gols_fora,
+            resultado_final=server.resultado_pelo_placar(gols_casa, gols_fora),
+        ).model_dump())
+    return historico
+
+
+def test_processos_spawn_igual_a_processo_unico(monkeypatch):
+    historico = _historico(120)
+    contextos = []
+    get_context = backtest.multiprocessing.get_context
+    monkeypatch.setattr(backtest.multiprocessing, "get_context", lambda metodo: contextos.append(metodo) or get_context(metodo))
+
+    paralelo = backtest.executar_backtest(historico, processos=2)
+
+    assert contextos == ["spawn"]
+    assert paralelo == backtest.executar_backtest(historico, processos=1)
+    assert paralelo["partidas"] == 120
+    assert sum(faixa["partidas"] for faixa in paralelo["acerto_por_confianca"].values()) == 120
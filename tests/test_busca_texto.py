@@ -0,0 +1,102 @@
+"""GET /api/partidas/busca: consulta $text ordenada pela relevância (índice busca_texto)"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from tests.conftest import dados_partida
+
+RELEVANCIA = {"$meta": "textScore"}
+
+
+class CursorGravado:
+    """Cursor que registra sort/limit e devolve documentos prontos"""
+
+    def __init__(self, colecao, documentos):
+        self.colecao = colecao
+        self.documentos = documentos
+
+    def sort(self, ordem):
+        self.colecao.chamadas["sort"] = ordem
+        return self
+
+    def limit(self, limite):
+        self.colecao.chamadas["limit"] = limite
+        return self
+
+    async def to_list(self, tamanho):
+        return self.documentos[:tamanho]
+
+
+class ColecaoBusca:
+    """db.partidas com find() gravado: o mongomock não implementa $text"""
+
+    def __init__(self, documentos):
+        self.documentos = documentos
+        self.chamadas = {}
+
+    def find(self, filtro, projecao):
+        self.chamadas.update(filtro=filtro, projecao=projecao)
+        return CursorGravado(self, self.documentos)
+
+
+@pytest.fixture
+def colecao(cliente, monkeypatch):
+    """Resultados já na ordem de relevância, como o MongoDB devolveria (um com campo interno)"""
+    documentos = [
+        {**server.Partida(**dados_partida(time_casa=time)).model_dump(), "relevancia": relevancia}
+        for time, relevancia in (("São Paulo", 11.25), ("São Bento", 6.0), ("Santos", 0.75))
+    ]
+    documentos[0]["odds_registradas_em"] = documentos[0]["criado_em"]
+    colecao = ColecaoBusca(documentos)
+    monkeypatch.setattr(server, "db", SimpleNamespace(partidas=colecao))
+    return colecao
+
+
+def test_consulta_projecao_e_ordem(cliente, colecao):
+    resposta = cliente.get("/api/partidas/busca", params={"q": '"são paulo" -feminino', "limit": 2})
+
+    assert resposta.status_code == 200
+    assert colecao.chamadas == {
+        "filtro": {"$text": {"$search": '"são paulo" -feminino'}},
+        "projecao": {"_id": 0, "relevancia": RELEVANCIA},
+        "sort": [("relevancia", RELEVANCIA)],
+        "limit": 2,
+    }
+    corpo = resposta.json()
+    assert [(p["time_casa"], p["relevancia"]) for p in corpo] == [("São Paulo", 11.25), ("São Bento", 6.0)]
+    assert "odds_registradas_em" not in corpo[0]
+    assert set(corpo[1]) == set(server.ResultadoBusca.model_fields)
+
+
+def test_mesma_resposta_com_e_sem_resposta_rapida(cliente, colecao, monkeypatch):
+    corpos = []
+    for rapida in (False, True):
+        monkeypatch.setattr(server, "RESPOSTA_RAPIDA", rapida)
+        corpos.append(cliente.get("/api/partidas/busca", params={"q": "são"}).content)
+
+    assert corpos[0] == corpos[1]
+
+
+def test_campos_projetados(cliente, colecao):
+    colecao.documentos = [{"id": "a", "criado_em": "2024-10-22T16:00:00+00:00", "time_casa": "Santos", "relevancia": 2.0}]
+    resposta = cliente.get("/api/partidas/busca", params={"q": "santos", "campos": "time_casa"})
+
+    assert colecao.chamadas["projecao"] == {"_id": 0, "id": 1, "criado_em": 1, "time_casa": 1, "relevancia": RELEVANCIA}
+    assert resposta.json() == colecao.documentos
+
+
+def test_parametros_invalidos(cliente, colecao):
+    assert cliente.get("/api/partidas/busca", params={"q": "s"}).status_code == 422
+    assert cliente.get("/api/partidas/busca", params={"q": "santos", "limit": 101}).status_code == 422
+    assert cliente.get("/api/partidas/busca", params={"q": "santos", "campos": "senha"}).status_code == 400
+    assert colecao.chamadas == {}
+
+
+def test_indice_de_texto_declarado():
+    indice = next(indice for indice in server.INDICES_REQUERIDOS["partidas"] if "opcoes" in indice)
+
+    assert indice["chaves"] == [(campo, "text") for campo in server.PESOS_BUSCA_TEXTO]
+    assert indice["opcoes"] == {"name": "busca_texto", "weights": server.PESOS_BUSCA_TEXTO, "default_language": "portuguese"}
+    assert server.PESOS_BUSCA_TEXTO["time_casa"] > server.PESOS_BUSCA_TEXTO["campeonato"] > server.PESOS_BUSCA_TEXTO["local_estadio"]
@@ -0,0 +1,133 @@
+"""CacheAnalises: remoção LRU por entradas/bytes e invalidação nas escritas da partida"""
+
+import pytest
+
+import server
+from tests.conftest import dados_partida, executar
+
+
+@pytest.fixture(scope="module")
+def analise():
+    return server.analisar_partida_v2(server.Partida(**dados_partida()))
+
+
+def _chave_em_cache(partida_id: str):
+    return server.cache_analises._chaves_por_partida.get(partida_id)
+
+
+# ================ REMOÇÃO LRU ================
+
+def test_remove_menos_usada_ao_exceder_entradas(analise):
+    cache = server.CacheAnalises(max_entradas=2, max_bytes=64 * 1024 * 1024)
+    cache.guardar("a", "p1", analise)
+    cache.guardar("b", "p2", analise)
+    assert cache.obter("a") is analise  # "a" passa a ser a mais recente
+
+    cache.guardar("c", "p3", analise)
+
+    assert cache.obter("b") is None
+    assert cache.obter("a") is analise
+    assert cache.obter("c") is analise
+    assert cache.estatisticas()["entradas"] == 2
+    assert cache.remocoes == 1
+
+
+def test_remove_mais_antiga_ao_exceder_bytes(analise):
+    tamanho = len(analise.model_dump_json())
+    cache = server.CacheAnalises(max_entradas=100, max_bytes=2 * tamanho + tamanho // 2)
+    for i in range(4):
+        cache.guardar(f"chave-{i}", f"p{i}", analise)
+
+    assert cache.obter("chave-0") is None
+    assert cache.obter("chave-1") is None
+    assert cache.obter("chave-2") is analise
+    assert cache.obter("chave-3") is analise
+    assert cache.bytes_usados == 2 * tamanho
+    assert cache.remocoes == 2
+
+
+def test_analise_maior_que_o_limite_nao_entra(analise):
+    cache = server.CacheAnalises(max_entradas=100, max_bytes=10)
+    cache.guardar("a", "p1", analise)
+    assert cache.obter("a") is None
+    assert cache.bytes_usados == 0
+
+
+def test_uma_entrada_por_partida(analise):
+    cache = server.CacheAnalises(max_entradas=100, max_bytes=64 * 1024 * 1024)
+    cache.guardar("versao-1", "p1", analise)
+    cache.guardar("versao-2", "p1", analise)
+
+    assert cache.obter("versao-1") is None
+    assert cache.obter("versao-2") is analise
+    assert cache.bytes_usados == len(analise.model_dump_json())
+    assert cache.invalidacoes == 0 and cache.remocoes == 0
+
+
+def test_obter_por_partida(analise):
+    cache = server.CacheAnalises(max_entradas=100, max_bytes=64 * 1024 * 1024)
+    assert cache.obter_por_partida("p1") is None
+    cache.guardar("versao-1", "p1", analise)
+
+    assert cache.obter_por_partida("p1") is analise
+    assert (cache.acertos, cache.falhas) == (1, 1)
+    cache.invalidar("p1")
+    assert cache.obter_por_partida("p1") is None
+
+
+# ================ LEITURA PELO CACHE ================
+
+def test_acerto_no_cache_nao_consulta_o_mongo(cliente, banco):
+    partida_id = cliente.post("/api/partidas", json=dados_partida()).json()["id"]
+    primeira = cliente.get(f"/api/partidas/{partida_id}/analise-v2")
+
+    # Sem o documento em db.analises, só o cache pode responder
+    executar(cliente, lambda: banco.analises.delete_many({}))
+    acertos = server.cache_analises.acertos
+    segunda = cliente.get(f"/api/partidas/{partida_id}/analise-v2")
+
+    assert segunda.status_code == 200
+    assert segunda.content == primeira.content
+    assert server.cache_analises.acertos == acertos + 1
+
+
+def test_falha_no_cache_le_do_mongo_e_guarda(cliente):
+    partida_id = cliente.post("/api/partidas", json=dados_partida()).json()["id"]
+    server.cache_analises.invalidar(partida_id)
+
+    primeira = cliente.get(f"/api/partidas/{partida_id}/analise-v2")
+    assert server.cache_analises.obter_por_partida(partida_id) is not None
+    assert cliente.get(f"/api/partidas/{partida_id}/analise-v2").content == primeira.content
+
+
+# ================ INVALIDAÇÃO NAS ESCRITAS ================
+
+ESCRITAS = {
+    "put_completo": lambda cliente, pid: cliente.put(f"/api/partidas/{pid}", json=dados_partida(forma_casa="D-D-D-D-D")),
+    "put_so_odds": lambda cliente, pid: cliente.put(f"/api/partidas/{pid}", json=dados_partida(odd_casa=1.8)),
+    "post_odds": lambda cliente, pid: cliente.post(
+        f"/api/partidas/{pid}/odds", json={"odd_casa": 1.9, "odd_empate": 3.4, "odd_fora": 4.2}
+    ),
+    "put_resultado": lambda cliente, pid: cliente.put(f"/api/partidas/{pid}/resultado", json={"gols_casa": 2, "gols_fora": 1}),
+    "delete": lambda cliente, pid: cliente.delete(f"/api/partidas/{pid}"),
+}
+
+
+@pytest.mark.parametrize("escrita", ESCRITAS, ids=list(ESCRITAS))
+def test_escrita_invalida_analise_em_cache(cliente, escrita):
+    partida_id = cliente.post("/api/partidas", json=dados_partida()).json()["id"]
+    antes = cliente.get(f"/api/partidas/{partida_id}/analise-v2").json()
+    chave_antiga = _chave_em_cache(partida_id)
+    assert chave_antiga is not None
+
+    assert ESCRITAS[escrita](cliente, partida_id).status_code == 200
+
+    assert server.cache_analises.invalidacoes == 1
+    assert server.cache_analises.obter(chave_antiga) is None
+    assert _chave_em_cache(partida_id) != chave_antiga
+
+    depois = cliente.get(f"/api/partidas/{partida_id}/analise-v2")
+    if escrita == "delete":
+        assert depois.status_code == 404
+    elif escrita != "put_resultado":
+        assert depois.json()["analise_1x2"] != antes["analise_1x2"]
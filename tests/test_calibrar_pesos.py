@@ -0,0 +1,91 @@
+"""Calibração dos pesos dos fatores: log-loss pelas matrizes de fatores e arquivo de pesos gerado"""
+
+import json
+import random
+import sys
+
+import numpy as np
+import pytest
+
+import calibrar_pesos
+import server
+from tests.conftest import gerar_partidas_sinteticas
+
+PESOS_PADRAO = np.array([server.PESOS_FATORES_V2[fator] / 100 for fator in server.FATORES_V2])
+
+
+@pytest.fixture(scope="module")
+def historico():
+    rng = random.Random(3)
+    docs = []
+    for dados in gerar_partidas_sinteticas(60):
+        gols_casa, gols_fora = rng.randint(0, 3), rng.randint(0, 3)
+        docs.append(server.Partida(
+            **dados, gols_casa=gols_casa, gols_fora=gols_fora,
+            resultado_final=server.resultado_pelo_placar(gols_casa, gols_fora),
+        ).model_dump(mode="json"))
+    return docs
+
+
+def test_log_loss_com_pesos_atuais_igual_ao_do_modelo(historico):
+    ocorrido, total = calibrar_pesos.montar_matrizes_fatores(historico)
+
+    resultado = server.analisar_1x2_lote([server.Partida(**doc) for doc in historico])
+    mercado = {"Casa": "casa", "Empate": "empate", "Fora": "fora"}
+    probabilidades = np.array([
+        resultado[f"probabilidade_{mercado[doc['resultado_final']]}"][i] / 100 for i, doc in enumerate(historico)
+    ])
+
+    perda = calibrar_pesos.log_loss_pesos(ocorrido, total, PESOS_PADRAO[None, :])[0]
+    assert perda == pytest.approx(-np.log(probabilidades).mean(), abs=1e-3)  # probabilidades em % com 2 casas
+
+
+def test_candidatos_no_simplex_com_peso_minimo():
+    rng = np.random.default_rng(1)
+    for centro in (None, PESOS_PADRAO):
+        candidatos = calibrar_pesos.sortear_candidatos(rng, centro, 40.0, 500, 0.02)
+        assert candidatos.shape == (500, len(server.FATORES_V2))
+        assert np.allclose(candidatos.sum(axis=1), 1.0)
+        assert candidatos.min() >= 0.02
+
+
+def test_calibrar_nao_piora_e_e_reprodutivel(historico, capsys):
+    ocorrido, total = calibrar_pesos.montar_matrizes_fatores(historico)
+    padrao = calibrar_pesos.log_loss_pesos(ocorrido, total, PESOS_PADRAO[None, :])[0]
+
+    pesos, perda = calibrar_pesos.calibrar(ocorrido, total, 3, 300, 0.02, processos=1, semente=5)
+    paralelo = calibrar_pesos.calibrar(ocorrido, total, 3, 300, 0.02, processos=2, semente=5)
+
+    assert perda <= padrao
+    assert perda == pytest.approx(calibrar_pesos.log_loss_pesos(ocorrido, total, pesos[None, :])[0])
+    assert np.array_equal(paralelo[0], pesos) and paralelo[1] == perda
+
+
+def test_arquivo_gerado_carrega_no_servidor(historico, tmp_path, monkeypatch, capsys):
+    entrada = tmp_path / "historico.ndjson"
+    entrada.write_text("\n".join(json.dumps(doc) for doc in historico), encoding="utf-8")
+    saida = tmp_path / "pesos.json"
+    monkeypatch.setattr(sys, "argv", [
+        "calibrar_pesos.py", "--entrada", str(entrada), "--saida", str(saida), "--versao", "cal-teste",
+        "--rodadas", "2", "--candidatos", "200", "--processos", "1",
+    ])
+
+    assert calibrar_pesos.main() == 0
+
+    documento = json.loads(saida.read_text(encoding="utf-8"))
+    assert documento["metricas"]["partidas_treino"] + documento["metricas"]["partidas_validacao"] == 60
+    assert documento["metricas"]["log_loss_treino"] <= documento["metricas"]["log_loss_treino_pesos_atuais"]
+    pesos, versao = server.carregar_pesos(str(saida))
+    assert versao == "cal-teste"
+    assert list(pesos) == server.FATORES_V2 and sum(pesos.values()) == pytest.approx(1.0, abs=1e-9)
+
+
+def test_arquivo_de_pesos_invalido(tmp_path):
+    arquivo = tmp_path / "pesos.json"
+    arquivo.write_text(json.dumps({"versao": "x", "pesos": {fator: 0.5 for fator in server.FATORES_V2}}), encoding="utf-8")
+    with pytest.raises(ValueError, match="somar 1"):
+        server.carregar_pesos(str(arquivo))
+
+    arquivo.write_text(json.dumps({"pesos": {}}), encoding="utf-8")
+    with pytest.raises(ValueError, match="requer 'versao'"):
+        server.carregar_pesos(str(arquivo))
@@ -0,0 +1,125 @@
+"""ChamadasCoalescidas: resultado/exceção compartilhados e cancelamento isolado por cliente"""
+
+import asyncio
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+def _funcao_controlada():
+    """Função lenta (espera o evento liberar) que conta quantas vezes foi executada"""
+    liberar = asyncio.Event()
+    chamadas = []
+
+    async def funcao():
+        chamadas.append(1)
+        await liberar.wait()
+        return {"valor": len(chamadas)}
+
+    return funcao, liberar, chamadas
+
+
+async def test_chamadas_simultaneas_compartilham_resultado():
+    coalescidas = server.ChamadasCoalescidas()
+    funcao, liberar, chamadas = _funcao_controlada()
+
+    tarefas = [asyncio.ensure_future(coalescidas.executar("p1", funcao)) for _ in range(5)]
+    await asyncio.sleep(0)
+    liberar.set()
+    resultados = await asyncio.gather(*tarefas)
+
+    assert len(chamadas) == 1
+    assert all(resultado is resultados[0] for resultado in resultados)
+    assert coalescidas.estatisticas() == {"em_andamento": 0, "execucoes": 1, "coalescidas": 4}
+
+
+async def test_chaves_diferentes_nao_coalescem():
+    coalescidas = server.ChamadasCoalescidas()
+    funcao, liberar, chamadas = _funcao_controlada()
+
+    tarefas = [asyncio.ensure_future(coalescidas.executar(chave, funcao)) for chave in ("p1", "p2")]
+    await asyncio.sleep(0)
+    liberar.set()
+    await asyncio.gather(*tarefas)
+
+    assert len(chamadas) == 2
+    assert coalescidas.estatisticas()["coalescidas"] == 0
+
+
+async def test_excecao_compartilhada_e_chave_liberada():
+    coalescidas = server.ChamadasCoalescidas()
+    liberar = asyncio.Event()
+
+    async def falha():
+        await liberar.wait()
+        raise ValueError("falhou")
+
+    tarefas = [asyncio.ensure_future(coalescidas.executar("p1", falha)) for _ in range(3)]
+    await asyncio.sleep(0)
+    liberar.set()
+    resultados = await asyncio.gather(*tarefas, return_exceptions=True)
+
+    assert all(isinstance(erro, ValueError) for erro in resultados)
+    assert resultados[0] is resultados[1] is resultados[2]
+    assert coalescidas.estatisticas()["em_andamento"] == 0
+
+    # Depois da falha, nova chamada executa de novo
+    funcao, liberar_nova, chamadas = _funcao_controlada()
+    liberar_nova.set()
+    assert await coalescidas.executar("p1", funcao) == {"valor": 1}
+    assert len(chamadas) == 1
+
+
+async def test_cliente_cancelado_nao_cancela_os_demais():
+    coalescidas = server.ChamadasCoalescidas()
+    funcao, liberar, chamadas = _funcao_controlada()
+
+    primeiro = asyncio.ensure_future(coalescidas.executar("p1", funcao))
+    segundo = asyncio.ensure_future(coalescidas.executar("p1", funcao))
+    await asyncio.sleep(0)
+
+    primeiro.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await primeiro
+
+    liberar.set()
+    assert await segundo == {"valor": 1}
+    assert len(chamadas) == 1
+
+
+async def test_todos_cancelados_execucao_termina():
+    coalescidas = server.ChamadasCoalescidas()
+    funcao, liberar, chamadas = _funcao_controlada()
+
+    tarefa = asyncio.ensure_future(coalescidas.executar("p1", funcao))
+    await asyncio.sleep(0)
+    tarefa.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await tarefa
+
+    # A execução continua e é reaproveitada por quem chegar antes de terminar
+    assert coalescidas.estatisticas()["em_andamento"] == 1
+    liberar.set()
+    assert await coalescidas.executar("p1", funcao) == {"valor": 1}
+    assert len(chamadas) == 1
+    assert coalescidas.estatisticas()["em_andamento"] == 0
+
+
+async def test_esquecer_inicia_nova_execucao():
+    coalescidas = server.ChamadasCoalescidas()
+    funcao, liberar, chamadas = _funcao_controlada()
+
+    antiga = asyncio.ensure_future(coalescidas.executar("p1", funcao))
+    await asyncio.sleep(0)
+    coalescidas.esquecer("p1")
+    nova = asyncio.ensure_future(coalescidas.executar("p1", funcao))
+    await asyncio.sleep(0)
+    liberar.set()
+
+    assert await antiga == {"valor": 2}
+    assert await nova == {"valor": 2}
+    assert len(chamadas) == 2
+    assert coalescidas.estatisticas()["execucoes"] == 2
@@ -0,0 +1,80 @@
+"""ExecutorCalculos: no máximo trabalhadores + fila_maxima chamadas; a seguinte recebe 503"""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from tests.conftest import dados_partida
+
+
+def _calculo_bloqueado():
+    """Cálculo que só termina quando o evento é liberado"""
+    liberar = threading.Event()
+
+    def calculo(valor):
+        liberar.wait(5)
+        return valor
+
+    return calculo, liberar
+
+
+async def _esperar(condicao):
+    for _ in range(200):
+        if condicao():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condição não atingida")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("trabalhadores, fila_maxima", [(1, 0), (1, 2), (2, 3)])
+async def test_chamada_alem_do_limite_recebe_503(trabalhadores, fila_maxima):
+    executor = server.ExecutorCalculos("thread", trabalhadores, fila_maxima, limiar=1)
+    calculo, liberar = _calculo_bloqueado()
+    limite = trabalhadores + fila_maxima
+    try:
+        aceitas = [asyncio.ensure_future(executor.executar(calculo, i, tamanho=1)) for i in range(limite)]
+        await _esperar(lambda: executor.em_execucao == trabalhadores and executor.na_fila == fila_maxima)
+
+        with pytest.raises(HTTPException) as erro:
+            await executor.executar(calculo, "excedente", tamanho=1)
+        assert (erro.value.status_code, erro.value.headers) == (503, {"Retry-After": "1"})
+
+        # Jobs em segundo plano esperam a vez em vez de serem rejeitados
+        job = asyncio.ensure_future(executor.executar(calculo, "job", tamanho=1, rejeitar_se_cheia=False))
+        # Abaixo do limiar roda no loop, mesmo com o pool cheio
+        assert await executor.executar(lambda: "no loop", tamanho=0) == "no loop"
+
+        liberar.set()
+        assert await asyncio.gather(*aceitas, job) == list(range(limite)) + ["job"]
+        await _esperar(lambda: executor.em_execucao == 0)
+        estatisticas = executor.estatisticas()
+        assert (estatisticas["na_fila"], estatisticas["rejeitadas"]) == (0, 1)
+        assert (estatisticas["no_pool"], estatisticas["no_loop"]) == (limite + 1, 1)
+    finally:
+        liberar.set()
+        executor.encerrar()
+
+
+def test_rota_responde_503_com_executor_cheio(cliente, monkeypatch):
+    executor = server.ExecutorCalculos("thread", 1, 0, limiar=1)
+    monkeypatch.setattr(server, "executor_calculos", executor)
+    calculo, liberar = _calculo_bloqueado()
+    try:
+        ocupado = cliente.portal.start_task_soon(lambda: executor.executar(calculo, "ocupado", tamanho=1))
+        cliente.portal.call(_esperar, lambda: executor.em_execucao == 1)
+
+        resposta = cliente.post("/api/analise-v2/lote", json={"partidas": [dados_partida()]})
+
+        assert resposta.status_code == 503
+        assert resposta.headers["Retry-After"] == "1"
+        assert cliente.get("/api/executor").json()["rejeitadas"] == 1
+        liberar.set()
+        assert ocupado.result(5) == "ocupado"
+        assert cliente.post("/api/analise-v2/lote", json={"partidas": [dados_partida()]}).status_code == 200
+    finally:
+        liberar.set()
+        executor.encerrar()
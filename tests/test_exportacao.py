@@ -0,0 +1,73 @@
+"""GET /api/exportar: CSV e Parquet em blocos, com a análise 1X2 igual à da rota analise-v2"""
+
+import csv
+import io
+
+import pytest
+
+import exportacao
+from tests.conftest import gerar_partidas_sinteticas
+
+NOMES = [nome for nome, _ in exportacao.COLUNAS_EXPORTACAO]
+
+
+@pytest.fixture
+def partidas(cliente, monkeypatch):
+    """5 partidas exportadas em blocos de 2 (3 blocos / row groups)"""
+    monkeypatch.setattr(exportacao, "TAMANHO_BLOCO_EXPORTACAO", 2)
+    for dados in gerar_partidas_sinteticas(5):
+        cliente.post("/api/partidas", json=dados)
+    return cliente.get("/api/partidas").json()
+
+
+def _conferir_linha(cliente, linha, partida):
+    analise = cliente.get(f"/api/partidas/{partida['id']}/analise-v2").json()["analise_1x2"]
+    assert linha["id"] == partida["id"] and linha["time_casa"] == partida["time_casa"]
+    assert float(linha["odd_casa"]) == partida["odd_casa"]
+    for campo in ("probabilidade_casa", "probabilidade_empate", "probabilidade_fora", "ev_casa", "ev_fora"):
+        assert float(linha[campo]) == analise[campo]
+    assert (linha["resultado_previsto"], linha["confianca"]) == (analise["resultado_previsto"], analise["confianca"])
+    for lado in ("casa", "fora"):
+        ponderados = analise[f"detalhes_{lado}_ponderados"]["forma_recente"]
+        assert float(linha[f"{lado}_forma_recente_nota"]) == ponderados["nota"]
+        assert float(linha[f"{lado}_forma_recente_ponderado"]) == ponderados["ponderado"]
+
+
+def test_csv(cliente, partidas):
+    resposta = cliente.get("/api/exportar", params={"formato": "csv"})
+
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"] == "text/csv; charset=utf-8"
+    assert resposta.headers["content-disposition"] == 'attachment; filename="partidas.csv"'
+    leitor = csv.DictReader(io.StringIO(resposta.text))
+    assert leitor.fieldnames == NOMES
+    linhas = list(leitor)
+    assert len(linhas) == len(partidas)
+    for linha, partida in zip(linhas, partidas):
+        _conferir_linha(cliente, linha, partida)
+
+
+def test_parquet(cliente, partidas):
+    pq = pytest.importorskip("pyarrow.parquet")
+    resposta = cliente.get("/api/exportar", params={"formato": "parquet"})
+
+    assert resposta.status_code == 200
+    arquivo = pq.ParquetFile(io.BytesIO(resposta.content))
+    assert arquivo.num_row_groups == 3
+    assert arquivo.schema_arrow == exportacao._esquema_parquet()
+    for linha, partida in zip(arquivo.read().to_pylist(), partidas, strict=True):
+        _conferir_linha(cliente, linha, partida)
+
+
+def test_filtro_e_formato_invalido(cliente, partidas):
+    time_casa = partidas[0]["time_casa"]
+    resposta = cliente.get("/api/exportar", params={"time": time_casa})
+    esperados = [p["id"] for p in partidas if time_casa in (p["time_casa"], p["time_visitante"])]
+    assert [linha["id"] for linha in csv.DictReader(io.StringIO(resposta.text))] == esperados
+
+    assert cliente.get("/api/exportar", params={"formato": "xlsx"}).status_code == 400
+
+
+def test_sem_partidas_so_cabecalho(cliente):
+    resposta = cliente.get("/api/exportar")
+    assert resposta.text.splitlines() == [",".join(NOMES)]
@@ -0,0 +1,49 @@
+"""reconciliar_indices: cria os índices ausentes e reporta redundantes e divergentes"""
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+# O mongomock não guarda os pesos do índice de texto: fica de fora da reconciliação de partidas
+REQUERIDOS_PARTIDAS = [indice for indice in server.INDICES_REQUERIDOS["partidas"] if "opcoes" not in indice]
+
+
+async def test_cria_ausentes_e_nova_execucao_nao_altera(banco):
+    relatorio = await server.reconciliar_indices("partidas", REQUERIDOS_PARTIDAS)
+
+    assert relatorio["criados"] == [
+        "id_1", "criado_em_-1_id_-1", "campeonato_1_rodada_1_criado_em_-1_id_-1",
+        "time_casa_1_criado_em_-1_id_-1", "time_visitante_1_criado_em_-1_id_-1", "data_hora_1_id_1",
+    ]
+    assert (await banco.partidas.index_information())["id_1"]["unique"] is True
+
+    for colecao, requeridos in {**server.INDICES_REQUERIDOS, "partidas": REQUERIDOS_PARTIDAS}.items():
+        await server.reconciliar_indices(colecao, requeridos)
+        assert await server.reconciliar_indices(colecao, requeridos) == {"criados": [], "divergentes": [], "redundantes": []}
+
+
+async def test_reporta_redundantes_e_divergentes_sem_remover(banco):
+    await banco.partidas.create_index([("id", 1)])                    # deveria ser unique
+    await banco.partidas.create_index([("criado_em", -1)])            # prefixo do índice da listagem
+    await banco.partidas.create_index([("arbitro", 1)])               # não declarado
+
+    relatorio = await server.reconciliar_indices("partidas", REQUERIDOS_PARTIDAS)
+
+    assert relatorio["divergentes"] == ["id_1"]
+    assert "id_1" not in relatorio["criados"] and len(relatorio["criados"]) == 5
+    assert sorted(relatorio["redundantes"]) == ["arbitro_1", "criado_em_-1"]
+    assert {"arbitro_1", "criado_em_-1"} <= set(await banco.partidas.index_information())
+
+
+def test_indice_de_texto_do_mongodb_casa_com_o_declarado():
+    declarado = next(indice for indice in server.INDICES_REQUERIDOS["partidas"] if "opcoes" in indice)
+    # Formato de index_information() no MongoDB: _fts/_ftsx + pesos por campo
+    existente = {
+        "key": [("_fts", "text"), ("_ftsx", 1)],
+        "weights": dict(reversed(list(server.PESOS_BUSCA_TEXTO.items()))),
+    }
+
+    assert server._chaves_indice_existente(existente) == server._normalizar_chaves(declarado["chaves"])
+    assert server._normalizar_chaves([("criado_em", -1.0)]) == (("criado_em", -1),)
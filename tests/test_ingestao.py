@@ -0,0 +1,86 @@
+"""Ingestão em massa: falhas parciais reportadas por linha sem interromper o lote"""
+
+import json
+import uuid
+
+import pytest
+
+import server
+from tests.conftest import dados_partida
+
+
+@pytest.fixture
+def lote_pequeno(monkeypatch):
+    """Blocos de 2 registros: as falhas atravessam mais de um insert_many"""
+    monkeypatch.setattr(server, "TAMANHO_LOTE_INGESTAO", 2)
+
+
+def _ids_gerados(monkeypatch, *ids):
+    """Os próximos uuid4() devolvem os ids informados (depois, ids aleatórios)"""
+    fila = [uuid.UUID(valor) for valor in ids]
+    original = uuid.uuid4
+    monkeypatch.setattr(server.uuid, "uuid4", lambda: fila.pop(0) if fila else original())
+
+
+def test_ndjson_reporta_falhas_por_linha(cliente, monkeypatch, lote_pequeno):
+    existente = cliente.post("/api/partidas", json=dados_partida(time_casa="Santos")).json()["id"]
+    sem_time_casa = {k: v for k, v in dados_partida().items() if k != "time_casa"}
+    linhas = [
+        json.dumps(dados_partida(time_casa="Bahia")),    # 1: id duplicado (erro de gravação)
+        json.dumps(dados_partida(time_casa="Vasco")),    # 2
+        '{"time_casa": "Grêmio",',                       # 3: JSON inválido
+        "",                                              # 4: ignorada
+        json.dumps(sem_time_casa),                       # 5: campo obrigatório ausente
+        "[1, 2]",                                        # 6: não é objeto
+        json.dumps(dados_partida(time_casa="Ceará")),    # 7
+    ]
+
+    _ids_gerados(monkeypatch, existente)
+    resposta = cliente.post(
+        "/api/partidas/bulk", content="\n".join(linhas).encode("utf-8"),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert resposta.status_code == 200
+    resultado = resposta.json()
+    assert resultado["recebidas"] == 6
+    assert resultado["inseridas"] == 2
+    assert len(resultado["ids"]) == 2
+    erros = {erro["linha"]: erro["erros"] for erro in resultado["erros"]}
+    assert list(erros) == [1, 3, 5, 6]
+    assert "duplicate key" in erros[1][0].lower()
+    assert "JSON inválido" in erros[3][0]
+    assert any(mensagem.startswith("time_casa:") for mensagem in erros[5])
+    assert erros[6] == ["Cada registro deve ser um objeto"]
+
+    # Linhas válidas gravadas; a partida existente não foi sobrescrita
+    times = [cliente.get(f"/api/partidas/{partida_id}").json()["time_casa"] for partida_id in resultado["ids"]]
+    assert times == ["Vasco", "Ceará"]
+    assert cliente.get(f"/api/partidas/{existente}").json()["time_casa"] == "Santos"
+    assert len(cliente.get("/api/partidas").json()) == 3
+
+
+def test_csv_reporta_linhas_com_colunas_erradas(cliente, lote_pequeno):
+    campos = list(dados_partida())
+    valores = [str(valor) for valor in dados_partida().values()]
+    linhas = [
+        ",".join(campos),
+        ",".join(valores),
+        ",".join(valores[:-1]),                          # 2: coluna faltando
+        ",".join(valores).replace("2.1", "abc", 1),      # 3: odd_casa inválida
+        ",".join(valores),
+    ]
+
+    resposta = cliente.post("/api/partidas/bulk?formato=csv", content="\n".join(linhas).encode("utf-8"))
+
+    resultado = resposta.json()
+    assert resultado["recebidas"] == 4
+    assert resultado["inseridas"] == 2
+    assert [erro["linha"] for erro in resultado["erros"]] == [2, 3]
+    assert resultado["erros"][0]["erros"] == [f"Esperadas {len(campos)} colunas, encontradas {len(campos) - 1}"]
+    assert resultado["erros"][1]["erros"][0].startswith("odd_casa:")
+
+
+def test_json_que_nao_e_lista(cliente):
+    resposta = cliente.post("/api/partidas/bulk", json=dados_partida())
+    assert resposta.status_code == 400
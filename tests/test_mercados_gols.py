@@ -0,0 +1,70 @@
+"""Mercados secundários pela matriz de placares (Poisson): gols e dupla chance"""
+
+import math
+
+import numpy as np
+import pytest
+
+import server
+from tests.conftest import dados_partida
+
+MERCADOS = [mercado for mercado, *_ in server.MERCADOS_GOLS]
+
+
+def _poisson_acumulada(k, lam):
+    return sum(math.exp(-lam) * lam ** i / math.factorial(i) for i in range(k + 1))
+
+
+@pytest.mark.parametrize("lambda_casa, lambda_fora", [(1.4, 1.1), (0.3, 2.7), (2.5, 2.5)])
+def test_matriz_confere_com_formas_fechadas(lambda_casa, lambda_fora):
+    matriz = server.matriz_placares_lote(np.array([lambda_casa]), np.array([lambda_fora]))[0]
+    probabilidade = dict(zip(MERCADOS, np.einsum("ij,mij->m", matriz, server.MASCARAS_MERCADOS_GOLS)))
+
+    assert matriz.sum() == pytest.approx(1.0)
+    # Placares até MAX_GOLS com a massa restante redistribuída: erro < 1e-4 para λ até 2.7
+    assert probabilidade["Ambos Marcam"] == pytest.approx((1 - math.exp(-lambda_casa)) * (1 - math.exp(-lambda_fora)), abs=1e-4)
+    # Soma de Poissons independentes: total de gols ~ Poisson(λc + λf)
+    total = lambda_casa + lambda_fora
+    assert probabilidade["Abaixo 2.5 gols"] == pytest.approx(_poisson_acumulada(2, total), abs=1e-4)
+    assert probabilidade["Acima 1.5 gols"] == pytest.approx(1 - _poisson_acumulada(1, total), abs=1e-4)
+    assert probabilidade["Acima 2.5 gols"] + probabilidade["Abaixo 2.5 gols"] == pytest.approx(1.0)
+
+    # Dupla chance: cada resultado (casa, empate, fora) entra em dois dos três mercados
+    casa, empate = np.tril(matriz, -1).sum(), np.trace(matriz)
+    assert probabilidade["Casa ou Empate"] == pytest.approx(casa + empate)
+    assert probabilidade["Casa ou Empate"] + probabilidade["Fora ou Empate"] + probabilidade["Casa ou Fora"] == pytest.approx(2.0)
+
+
+def test_gols_esperados_combinam_ataque_e_defesa_adversaria():
+    lambda_casa, lambda_fora = server.calcular_gols_esperados_lote(
+        np.array([1.8, 0.0]), np.array([0.9, 0.0]), np.array([1.5, 0.0]), np.array([1.1, 0.0])
+    )
+    assert lambda_casa.tolist() == pytest.approx([(1.8 + 1.1) / 2, server.GOLS_ESPERADOS_MINIMO])
+    assert lambda_fora.tolist() == pytest.approx([(1.5 + 0.9) / 2, server.GOLS_ESPERADOS_MINIMO])
+
+
+def test_odd_informada_ou_estimada_no_ev():
+    partida = server.Partida(**dados_partida(odd_ambos_marcam=2.2, odd_casa_empate=1.4))
+    analises = {analise.mercado: analise for analise in server.analisar_mercados_gols([partida])[0]}
+
+    assert list(analises) == MERCADOS
+    ambos = analises["Ambos Marcam"]
+    assert (ambos.odd, ambos.detalhes_scores["odd_estimada"]) == (2.2, False)
+    assert ambos.ev == round(ambos.probabilidade / 100 * 2.2 - 1, 4)
+    assert ambos.detalhes_scores["odd_justa"] == round(100 / ambos.probabilidade, 2)
+    assert analises["Casa ou Empate"].odd == 1.4
+
+    estimada = analises["Acima 2.5 gols"]
+    assert (estimada.odd, estimada.detalhes_scores["odd_estimada"]) == (2.0, True)
+    assert "odd estimada 2.00" in estimada.justificativa
+    assert "Gols esperados (Poisson): Flamengo 1.45 x 1.20 Palmeiras" in estimada.justificativa
+
+
+def test_rota_analise_v2_traz_os_mercados_secundarios(cliente):
+    partida_id = cliente.post("/api/partidas", json=dados_partida(odd_fora_empate=1.9)).json()["id"]
+
+    outras = cliente.get(f"/api/partidas/{partida_id}/analise-v2").json()["outras_analises"]
+
+    assert [analise["mercado"] for analise in outras] == MERCADOS
+    fora_ou_empate = next(analise for analise in outras if analise["mercado"] == "Fora ou Empate")
+    assert fora_ou_empate["odd"] == 1.9 and fora_ou_empate["detalhes_scores"]["odd_estimada"] is False
@@ -0,0 +1,132 @@
+"""GET /metrics: histogramas no formato texto do Prometheus por rota e por etapa da análise"""
+
+import re
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import metricas
+import server
+from tests.conftest import dados_partida
+
+AMOSTRA = re.compile(r"^(\w+)(?:\{(.*)\})? (\S+)$")
+
+
+@pytest.fixture
+def metricas_ligadas(monkeypatch):
+    """Métricas ligadas, com séries novas a cada teste"""
+    novas = {
+        nome: (
+            metricas.Contador(metrica.nome, metrica.descricao, metrica.rotulos)
+            if isinstance(metrica, metricas.Contador)
+            else metricas.Histograma(metrica.nome, metrica.descricao, metrica.rotulos, metrica.limites)
+        )
+        for nome, metrica in vars(metricas).items()
+        if nome.startswith("metrica_") and isinstance(metrica, (metricas.Contador, metricas.Histograma))
+    }
+    for nome, metrica in novas.items():
+        monkeypatch.setattr(metricas, nome, metrica)
+    monkeypatch.setattr(metricas, "METRICAS", tuple(novas[nome] for nome in (
+        "metrica_duracao_http", "metrica_operacoes_mongo_requisicao", "metrica_operacoes_mongo",
+        "metrica_duracao_etapa", "metrica_atraso_event_loop",
+    )))
+    monkeypatch.setattr(metricas, "METRICAS_HABILITADAS", True)
+
+
+@pytest.fixture
+def cliente_metricas(banco, metricas_ligadas):
+    """App com o MiddlewareMetricas (adicionado na importação só com METRICAS_HABILITADAS=1)"""
+    with TestClient(metricas.MiddlewareMetricas(server.app)) as cliente:
+        yield cliente
+
+
+def _amostras(texto):
+    """{(nome, rótulos): valor} das linhas que não são comentários"""
+    amostras = {}
+    for linha in texto.splitlines():
+        if linha and not linha.startswith("#"):
+            nome, rotulos, valor = AMOSTRA.match(linha).groups()
+            amostras[(nome, rotulos or "")] = float(valor)
+    return amostras
+
+
+def test_histograma_cumulativo():
+    histograma = metricas.Histograma("h", "Teste", ("rota",), (0.1, 1.0))
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(("/a",), valor)
+
+    assert histograma.exportar() == [
+        "# HELP h Teste",
+        "# TYPE h histogram",
+        'h_bucket{rota="/a",le="0.1"} 2',
+        'h_bucket{rota="/a",le="1.0"} 3',
+        'h_bucket{rota="/a",le="+Inf"} 4',
+        'h_sum{rota="/a"} 3.65',
+        'h_count{rota="/a"} 4',
+    ]
+
+
+def test_latencia_por_molde_de_rota(cliente_metricas):
+    ids = [cliente_metricas.post("/api/partidas", json=dados_partida()).json()["id"] for _ in range(2)]
+    for partida_id in ids + ids[:1]:
+        assert cliente_metricas.get(f"/api/partidas/{partida_id}/analise-v2").status_code == 200
+    assert cliente_metricas.get("/api/partidas/inexistente/analise-v2").status_code == 404
+    cliente_metricas.get("/nao-existe")
+
+    resposta = cliente_metricas.get("/metrics")
+    assert resposta.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    amostras = _amostras(resposta.text)
+
+    contagem = "analisebet_http_duracao_segundos_count"
+    assert amostras[(contagem, 'metodo="POST",rota="/api/partidas",status="200"')] == 2
+    assert amostras[(contagem, 'metodo="GET",rota="/api/partidas/{partida_id}/analise-v2",status="200"')] == 3
+    assert amostras[(contagem, 'metodo="GET",rota="/api/partidas/{partida_id}/analise-v2",status="404"')] == 1
+    assert amostras[(contagem, 'metodo="GET",rota="sem_rota",status="404"')] == 1
+    assert amostras[(
+        "analisebet_http_operacoes_mongo_count", 'metodo="GET",rota="/api/partidas/{partida_id}/analise-v2"'
+    )] == 4
+    # Nenhuma série com o id concreto da partida
+    assert not any(ids[0] in rotulos for _, rotulos in amostras)
+
+
+def test_duracao_por_etapa(cliente_metricas, monkeypatch):
+    partida_id = cliente_metricas.post("/api/partidas", json=dados_partida()).json()["id"]
+    # Cache vazio: a consulta lê a análise salva no MongoDB
+    monkeypatch.setattr(server, "cache_analises", server.CacheAnalises(max_entradas=10, max_bytes=1024 * 1024))
+    cliente_metricas.get(f"/api/partidas/{partida_id}/analise-v2")
+
+    amostras = _amostras(cliente_metricas.get("/metrics").text)
+    etapas = {
+        re.fullmatch(r'etapa="(\w+)"', rotulos).group(1): valor
+        for (nome, rotulos), valor in amostras.items() if nome == "analisebet_etapa_duracao_segundos_count"
+    }
+    # Cálculo na gravação, leitura da análise salva na consulta
+    assert etapas == {
+        "pontuacao": 1, "justificativa": 1, "observacoes": 1,
+        "busca_mongo": 1, "construcao_analise": 1, "serializacao": 1,
+    }
+
+
+def test_operacoes_mongo_contadas_por_requisicao(metricas_ligadas):
+    contador = metricas.ContadorOperacoesMongo()
+    operacoes = [0]
+    token = metricas._operacoes_mongo_requisicao.set(operacoes)
+    try:
+        for comando in ("find", "find", "insert"):
+            contador.started(SimpleNamespace(command_name=comando))
+    finally:
+        metricas._operacoes_mongo_requisicao.reset(token)
+    contador.started(SimpleNamespace(command_name="find"))  # fora de uma requisição
+
+    assert operacoes == [3]
+    assert metricas.metrica_operacoes_mongo.exportar()[2:] == [
+        'analisebet_mongo_operacoes_total{comando="find"} 3',
+        'analisebet_mongo_operacoes_total{comando="insert"} 1',
+    ]
+
+
+def test_desligadas(cliente, monkeypatch):
+    monkeypatch.setattr(metricas, "METRICAS_HABILITADAS", False)
+    assert cliente.get("/metrics").status_code == 404
+    assert metricas.medir_etapa("pontuacao") is metricas._ETAPA_NAO_MEDIDA
@@ -0,0 +1,112 @@
+"""Migração de datas em texto: derivados atualizados e retomada pelo checkpoint em db.migracoes"""
+
+from datetime import datetime
+
+import pytest
+
+import autocomplete
+import migracao_datas
+import server
+from tests.conftest import conferir_com_reconstrucao, dados_partida, executar
+
+# Cada time em uma única partida: o $push com $sort do mongomock não compara
+# texto com data (o MongoDB ordena pelos tipos BSON)
+CONFRONTOS = [("Flamengo", "Palmeiras"), ("Santos", "Bahia"), ("Grêmio", "Vasco"),
+              ("Ceará", "Sport"), ("Cruzeiro", "Goiás")]
+
+
+def _legado(i, casa, fora, data_hora):
+    """Partida gravada antes das datas nativas: criado_em e data_hora em texto"""
+    doc = server.Partida(**dados_partida(time_casa=casa, time_visitante=fora)).model_dump()
+    return {
+        **doc, "id": f"partida-{i:02d}",
+        "criado_em": f"2024-09-0{i + 1}T10:00:00+00:00",
+        "data_hora": data_hora,
+        "gols_casa": i % 3, "gols_fora": 1, "resultado_final": server.resultado_pelo_placar(i % 3, 1),
+    }
+
+
+@pytest.fixture
+def legados(cliente, banco):
+    docs = [_legado(i, casa, fora, f"2024-10-0{i + 1}T16:00:00") for i, (casa, fora) in enumerate(CONFRONTOS)]
+    docs[-1]["data_hora"] = "sábado à tarde"  # não é ISO 8601: fica como está
+
+    executar(cliente, lambda: banco.partidas.insert_many(docs))
+    # Resumos e autocomplete montados com as datas ainda em texto
+    cliente.post("/api/times/reconstruir")
+    executar(cliente, autocomplete.indice_autocomplete.carregar, banco.partidas)
+    return docs
+
+
+def _migrar(cliente, tamanho_lote=2):
+    job = migracao_datas.novo_job_migracao_datas()
+    executar(cliente, migracao_datas.executar_migracao_datas, job, tamanho_lote)
+    return job
+
+
+def _partidas(cliente, banco):
+    return executar(cliente, lambda: banco.partidas.find({}, {"_id": 0}).sort("id", 1).to_list(None))
+
+
+def _checkpoint(cliente, banco):
+    return executar(cliente, lambda: banco.migracoes.find_one({"_id": migracao_datas.MIGRACAO_DATAS}))
+
+
+def test_migracao_atualiza_resumos_dos_times(cliente, banco, legados):
+    job = _migrar(cliente)
+
+    assert (job["status"], job["convertidas"], job["invalidas"]) == ("concluido", 5, 1)
+    partidas = _partidas(cliente, banco)
+    assert all(isinstance(partida["criado_em"], datetime) for partida in partidas)
+    assert [isinstance(partida["data_hora"], datetime) for partida in partidas] == [True] * 4 + [False]
+
+    resumos = conferir_com_reconstrucao(cliente, banco)
+    assert resumos["flamengo"]["recentes"][0]["data_hora"] == partidas[0]["data_hora"]
+    assert isinstance(resumos["bahia"]["recentes"][0]["data_hora"], datetime)
+    assert resumos["goiás"]["recentes"][0]["data_hora"] == "sábado à tarde"
+    assert resumos["goiás"]["partidas"] == 1
+
+
+def test_migracao_interrompida_continua_do_checkpoint(cliente, banco, legados, monkeypatch):
+    salvar_analises = server.salvar_analises
+    chamadas = []
+
+    async def falha_no_segundo_lote(pares):
+        chamadas.append(len(pares))
+        if len(chamadas) == 2:
+            raise RuntimeError("conexão perdida")
+        await salvar_analises(pares)
+
+    monkeypatch.setattr(server, "salvar_analises", falha_no_segundo_lote)
+    interrompida = _migrar(cliente)
+
+    assert (interrompida["status"], interrompida["erro"]) == ("erro", "conexão perdida")
+    checkpoint = _checkpoint(cliente, banco)
+    assert (checkpoint["status"], checkpoint["ultimo_id"], checkpoint["convertidas"]) == ("executando", "partida-01", 2)
+    assert [isinstance(partida["criado_em"], str) for partida in _partidas(cliente, banco)] == [False] * 2 + [True] * 3
+
+    retomada = _migrar(cliente)
+
+    assert (retomada["status"], retomada["retomada_de"]) == ("concluido", "partida-01")
+    assert (retomada["convertidas"], retomada["invalidas"]) == (5, 1)
+    assert chamadas[2:] == [2, 1]  # só os lotes após o checkpoint
+    assert not [partida for partida in _partidas(cliente, banco) if isinstance(partida["criado_em"], str)]
+    assert _checkpoint(cliente, banco)["status"] == "concluida"
+    conferir_com_reconstrucao(cliente, banco)
+
+
+def test_nova_execucao_apos_concluida_recomeca(cliente, banco, legados):
+    assert _migrar(cliente)["status"] == "concluido"
+    assert _migrar(cliente)["convertidas"] == 0  # nada mais em texto
+
+    # Dado legado gravado depois da migração concluída
+    executar(cliente, lambda: banco.partidas.insert_one(_legado(5, "Bahia", "Fortaleza", "2024-10-08T16:00:00")))
+    cliente.post("/api/times/reconstruir")
+    job = _migrar(cliente)
+
+    assert (job["status"], job["retomada_de"], job["convertidas"], job["invalidas"]) == ("concluido", None, 1, 1)
+    assert _checkpoint(cliente, banco)["convertidas"] == 1
+    bahia = conferir_com_reconstrucao(cliente, banco)["bahia"]
+    assert bahia["partidas"] == 2
+    assert [recente["partida_id"] for recente in bahia["recentes"]] == ["partida-05", "partida-01"]
+    assert all(isinstance(recente["data_hora"], datetime) for recente in bahia["recentes"])
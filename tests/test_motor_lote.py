@@ -0,0 +1,91 @@
+"""Motor vetorizado (analisar_1x2_lote) x cálculo individual (analisar_1x2_v2)"""
+
+import random
+
+import pytest
+
+import server
+from tests.conftest import dados_partida, gerar_partidas_sinteticas
+
+# Textos livres ausentes, vazios ou fora do formato esperado
+FORMAS_MALFORMADAS = ["", "VVVVVVVVVV", "V-x-E-?-D", "v e d", "---", "VED"]
+H2H_MALFORMADOS = ["", "nenhum", "3V", "VVEDD", "10V 0E 0D", "2 vitórias e 1 empate", "V-E-D-x"]
+TEXTOS_MALFORMADOS = [None, "", "   ", "???", "GRAVE!!!", "1 titular, 2 reservas e 3 desfalques"]
+
+
+def _partidas_com_texto_malformado(quantidade: int, semente: int):
+    rng = random.Random(semente)
+    partidas = []
+    for partida_doc in gerar_partidas_sinteticas(quantidade, semente):
+        if rng.random() < 0.5:
+            partida_doc["forma_casa"] = rng.choice(FORMAS_MALFORMADAS)
+            partida_doc["forma_fora"] = rng.choice(FORMAS_MALFORMADAS)
+            partida_doc["historico_h2h"] = rng.choice(H2H_MALFORMADOS)
+            partida_doc["lesoes_suspensoes_casa"] = rng.choice(TEXTOS_MALFORMADOS)
+            partida_doc["lesoes_suspensoes_fora"] = rng.choice(TEXTOS_MALFORMADOS)
+            partida_doc["condicoes_externas"] = rng.choice(["", "chuva", "???"])
+            partida_doc["noticia_1"] = rng.choice(TEXTOS_MALFORMADOS)
+            partida_doc["noticia_1_impacto"] = rng.choice([None, 0, -5, 5])
+            partida_doc["noticia_2"] = None
+            partida_doc["noticia_2_impacto"] = None
+        if rng.random() < 0.3:
+            # Campos legados (sem os equivalentes por time)
+            partida_doc["artilheiro_disponivel_casa"] = rng.choice([True, False])
+            partida_doc["lesoes_suspensoes_casa"] = None
+            partida_doc["lesoes_suspensoes"] = rng.choice(TEXTOS_MALFORMADOS)
+            partida_doc["artilheiro_disponivel"] = rng.choice([None, True, False])
+            partida_doc["noticias_relevantes"] = rng.choice([None, "risco de rebaixamento", ""])
+        partidas.append(server.Partida(**partida_doc))
+    return partidas
+
+
+@pytest.mark.parametrize("semente", [1, 2, 3])
+def test_lote_identico_ao_calculo_individual(semente):
+    partidas = _partidas_com_texto_malformado(300, semente)
+    resultado = server.analisar_1x2_lote(partidas)
+
+    for i, partida in enumerate(partidas):
+        individual = server.analisar_1x2_v2(partida)
+        for campo in (
+            "probabilidade_casa", "probabilidade_empate", "probabilidade_fora",
+            "diferenca_probabilidade", "ev_casa", "ev_empate", "ev_fora",
+        ):
+            assert float(resultado[campo][i]) == getattr(individual, campo), (campo, i)
+        assert resultado["resultado_previsto"][i] == individual.resultado_previsto
+        assert resultado["confianca"][i] == individual.confianca
+        for lado, detalhes in (("casa", individual.detalhes_casa), ("fora", individual.detalhes_fora)):
+            for fator, nota in detalhes.items():
+                assert float(resultado[f"notas_{lado}"][fator][i]) == pytest.approx(nota, abs=1e-9), (lado, fator, i)
+        assert individual.scores_brutos == {
+            "casa": float(resultado["score_casa"][i]),
+            "empate": float(resultado["score_empate"][i]),
+            "fora": float(resultado["score_fora"][i]),
+        }
+
+
+def test_endpoint_lote_igual_ao_analise_v2(cliente):
+    ids = [
+        cliente.post("/api/partidas", json=dados_partida(forma_casa=forma, historico_h2h=h2h)).json()["id"]
+        for forma, h2h in zip(FORMAS_MALFORMADAS, H2H_MALFORMADOS)
+    ]
+    avulsa = dados_partida(lesoes_suspensoes_casa=None, lesoes_suspensoes="3 desfalques")
+
+    resposta = cliente.post("/api/analise-v2/lote", json={"ids": ids, "partidas": [avulsa]})
+    assert resposta.status_code == 200
+    resultados = resposta.json()
+    assert [resultado["partida_id"] for resultado in resultados] == ids + [None]
+
+    for partida_id, resultado in zip(ids, resultados):
+        analise = cliente.get(f"/api/partidas/{partida_id}/analise-v2").json()["analise_1x2"]
+        for campo, valor in resultado.items():
+            if campo != "partida_id":
+                assert analise[campo] == valor, campo
+
+    individual = server.analisar_1x2_v2(server.Partida(**avulsa))
+    assert resultados[-1]["probabilidade_casa"] == individual.probabilidade_casa
+    assert resultados[-1]["ev_fora"] == individual.ev_fora
+
+
+def test_lote_com_id_inexistente(cliente):
+    resposta = cliente.post("/api/analise-v2/lote", json={"ids": ["nao-existe"]})
+    assert resposta.status_code == 404
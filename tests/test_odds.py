@@ -0,0 +1,92 @@
+"""Odds atuais e EVs monotônicos em registrado_em (snapshots fora de ordem)"""
+
+from datetime import datetime, timedelta, timezone
+
+import server
+from tests.conftest import dados_partida, executar
+
+EVS = ("ev_casa", "ev_empate", "ev_fora")
+
+
+def _snapshot(cliente, partida_id, registrado_em, odd_casa):
+    resposta = cliente.post(f"/api/partidas/{partida_id}/odds", json={
+        "odd_casa": odd_casa, "odd_empate": 3.3, "odd_fora": 3.6,
+        "registrado_em": registrado_em.isoformat(),
+    })
+    assert resposta.status_code == 200
+    return resposta.json()
+
+
+def _analise_salva(cliente, banco, partida_id):
+    return executar(cliente, lambda: banco.analises.find_one({"partida_id": partida_id}, {"_id": 0}))
+
+
+def test_snapshot_retroativo_nao_sobrescreve_odds_nem_evs(cliente, banco):
+    partida_id = cliente.post("/api/partidas", json=dados_partida()).json()["id"]
+    agora = datetime.now(timezone.utc)
+
+    novo = _snapshot(cliente, partida_id, agora + timedelta(hours=2), 2.5)
+    assert novo["odds_atuais"] is True
+
+    antigo = _snapshot(cliente, partida_id, agora + timedelta(hours=1), 1.5)
+    assert antigo["odds_atuais"] is False
+    assert {ev: antigo[ev] for ev in EVS} == {ev: novo[ev] for ev in EVS}
+
+    assert cliente.get(f"/api/partidas/{partida_id}").json()["odd_casa"] == 2.5
+    analise = cliente.get(f"/api/partidas/{partida_id}/analise-v2").json()
+    assert analise["partida"]["odd_casa"] == 2.5
+    assert {ev: analise["analise_1x2"][ev] for ev in EVS} == {ev: novo[ev] for ev in EVS}
+    assert analise["analise_1x2"]["ev_casa"] == server.calcular_ev(analise["analise_1x2"]["probabilidade_casa"], 2.5)
+
+    # O snapshot retroativo fica no histórico
+    assert cliente.get(f"/api/partidas/{partida_id}/odds").json()["total_snapshots"] == 3
+
+
+def test_snapshot_anterior_a_criacao_fica_so_no_historico(cliente):
+    partida_id = cliente.post("/api/partidas", json=dados_partida()).json()["id"]
+
+    registro = _snapshot(cliente, partida_id, datetime(2024, 1, 1, tzinfo=timezone.utc), 1.5)
+
+    assert registro["odds_atuais"] is False
+    assert cliente.get(f"/api/partidas/{partida_id}").json()["odd_casa"] == 2.1
+    assert cliente.get(f"/api/partidas/{partida_id}/odds").json()["total_snapshots"] == 2
+
+
+def test_snapshots_em_ordem_atualizam_odds(cliente):
+    partida_id = cliente.post("/api/partidas", json=dados_partida()).json()["id"]
+    agora = datetime.now(timezone.utc)
+
+    _snapshot(cliente, partida_id, agora + timedelta(hours=1), 1.5)
+    ultimo = _snapshot(cliente, partida_id, agora + timedelta(hours=2), 2.5)
+
+    assert ultimo["odds_atuais"] is True
+    analise = cliente.get(f"/api/partidas/{partida_id}/analise-v2").json()
+    assert analise["partida"]["odd_casa"] == 2.5
+    assert analise["analise_1x2"]["ev_casa"] == ultimo["ev_casa"]
+
+
+def test_ev_de_odds_antigas_nao_sobrescreve_ev_atual(cliente, banco):
+    partida_id = cliente.post("/api/partidas", json=dados_partida()).json()["id"]
+    agora = datetime.now(timezone.utc)
+    novo = _snapshot(cliente, partida_id, agora + timedelta(hours=2), 2.5)
+    antes = _analise_salva(cliente, banco, partida_id)
+
+    # Gravação atrasada (ex.: requisição concorrente) com odds mais antigas
+    partida_doc = cliente.get(f"/api/partidas/{partida_id}").json()
+    atrasada = {**partida_doc, "odd_casa": 1.5, "odds_registradas_em": agora + timedelta(hours=1)}
+    executar(cliente, server.atualizar_ev_analise, atrasada)
+
+    depois = _analise_salva(cliente, banco, partida_id)
+    assert depois["analise"]["analise_1x2"]["ev_casa"] == novo["ev_casa"]
+    assert depois["analise"]["partida"]["odd_casa"] == 2.5
+    assert depois["odds_registradas_em"] == antes["odds_registradas_em"]
+
+
+def test_put_com_odds_novas_vale_sobre_snapshot_antigo(cliente):
+    partida_id = cliente.post("/api/partidas", json=dados_partida()).json()["id"]
+
+    assert cliente.put(f"/api/partidas/{partida_id}", json=dados_partida(odd_casa=2.5)).status_code == 200
+    registro = _snapshot(cliente, partida_id, datetime.now(timezone.utc) - timedelta(hours=1), 1.5)
+
+    assert registro["odds_atuais"] is False
+    assert cliente.get(f"/api/partidas/{partida_id}").json()["odd_casa"] == 2.5
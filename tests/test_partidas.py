@@ -0,0 +1,88 @@
+"""CRUD e listagem de partidas: o que uma edição completa (PUT) preserva e a paginação por cursor"""
+
+from datetime import datetime, timedelta, timezone
+
+import server
+from tests.conftest import dados_partida, executar
+
+
+def _criar_com_resultado(cliente):
+    partida_id = cliente.post("/api/partidas", json=dados_partida()).json()["id"]
+    cliente.put(f"/api/partidas/{partida_id}/resultado", json={"gols_casa": 2, "gols_fora": 1})
+    return partida_id
+
+
+def test_put_sem_resultado_mantem_placar_registrado(cliente):
+    partida_id = _criar_com_resultado(cliente)
+    criada = cliente.get(f"/api/partidas/{partida_id}").json()
+
+    resposta = cliente.put(f"/api/partidas/{partida_id}", json=dados_partida(arbitro="Anderson Daronco"))
+
+    assert resposta.status_code == 200
+    for partida in (resposta.json(), cliente.get(f"/api/partidas/{partida_id}").json()):
+        assert partida["arbitro"] == "Anderson Daronco"
+        assert (partida["gols_casa"], partida["gols_fora"], partida["resultado_final"]) == (2, 1, "Casa")
+        assert (partida["id"], partida["criado_em"]) == (criada["id"], criada["criado_em"])
+    assert cliente.get("/api/times/Flamengo/resumo").json()["vitorias"] == 1
+
+
+def test_put_com_resultado_explicito_substitui_ou_limpa(cliente):
+    partida_id = _criar_com_resultado(cliente)
+
+    corrigida = cliente.put(f"/api/partidas/{partida_id}", json=dados_partida(gols_casa=0, gols_fora=0)).json()
+    assert (corrigida["gols_casa"], corrigida["gols_fora"], corrigida["resultado_final"]) == (0, 0, "Empate")
+
+    limpa = cliente.put(
+        f"/api/partidas/{partida_id}", json=dados_partida(gols_casa=None, gols_fora=None, resultado_final=None)
+    ).json()
+    assert (limpa["gols_casa"], limpa["gols_fora"], limpa["resultado_final"]) == (None, None, None)
+    assert cliente.get("/api/times/Flamengo/resumo").json()["jogos_com_resultado"] == 0
+
+
+# ================ PAGINAÇÃO POR CURSOR ================
+
+def _paginas(cliente, limite, **filtros):
+    """Percorre a listagem seguindo X-Proximo-Cursor; devolve os ids de cada página"""
+    paginas, params = [], {"limit": limite, **filtros}
+    while True:
+        resposta = cliente.get("/api/partidas", params=params)
+        assert resposta.status_code == 200
+        paginas.append([partida["id"] for partida in resposta.json()])
+        cursor = resposta.headers.get("X-Proximo-Cursor")
+        if not cursor:
+            return paginas
+        params = {**params, "after": cursor}
+
+
+def test_paginacao_percorre_todas_as_partidas(cliente, banco):
+    base = datetime(2024, 3, 1, 12, tzinfo=timezone.utc)
+    criacoes = [
+        base, base, base,                               # empates em criado_em (desempate por id)
+        base + timedelta(days=1), base - timedelta(days=1),
+        "2023-06-01T10:00:00+00:00", "2023-06-01T10:00:00+00:00",  # legado em texto, com empate
+        "2023-05-01T10:00:00+00:00", "2023-07-01T10:00:00+00:00",
+    ]
+    docs = []
+    for i, criado_em in enumerate(criacoes):
+        doc = server.Partida(**dados_partida(rodada=i % 3 + 1)).model_dump()
+        docs.append({**doc, "id": f"partida-{i:02d}", "criado_em": criado_em})
+    executar(cliente, lambda: banco.partidas.insert_many(docs))
+
+    # Datas antes de textos; dentro de cada tipo, criado_em e id decrescentes
+    datas = sorted((d for d in docs if isinstance(d["criado_em"], datetime)), key=lambda d: (d["criado_em"], d["id"]), reverse=True)
+    textos = sorted((d for d in docs if isinstance(d["criado_em"], str)), key=lambda d: (d["criado_em"], d["id"]), reverse=True)
+    esperado = [d["id"] for d in datas + textos]
+
+    for limite in (1, 2, 4, 8, 9, 100):
+        paginas = _paginas(cliente, limite)
+        assert [partida_id for pagina in paginas for partida_id in pagina] == esperado
+        assert all(len(pagina) == limite for pagina in paginas[:-1])
+
+    # Cursor com filtro e projeção
+    filtrado = [d["id"] for d in datas + textos if d["rodada"] == 2]
+    assert sum(_paginas(cliente, 1, rodada=2, campos="time_casa"), []) == filtrado
+
+
+def test_cursor_invalido(cliente):
+    for cursor in ("nao-e-base64!", "WzEsMl0=", "WyJ4IiwgImlkIiwgIm91dHJvIl0="):
+        assert cliente.get("/api/partidas", params={"after": cursor}).status_code == 400
@@ -0,0 +1,87 @@
+"""Perfil sob demanda: MiddlewarePerfil (amostragem e cProfile) e GET /api/perfis"""
+
+import pstats
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+import perfil
+import server
+from tests.conftest import dados_partida
+
+TOKEN = "segredo"
+
+
+@pytest.fixture
+def diretorio(monkeypatch, tmp_path):
+    monkeypatch.setattr(perfil, "PERFIL_TOKEN", TOKEN)
+    monkeypatch.setattr(perfil, "PERFIL_HABILITADO", True)
+    monkeypatch.setattr(perfil, "PERFIL_DIRETORIO", tmp_path / "perfis")
+    return tmp_path / "perfis"
+
+
+@pytest.fixture
+def cliente_perfil(banco, diretorio):
+    """App com o MiddlewarePerfil (adicionado na importação só com PERFIL_HABILITADO=1)"""
+    with TestClient(perfil.MiddlewarePerfil(server.app)) as cliente:
+        yield cliente
+
+
+def _perfilar(cliente, modo, token=TOKEN):
+    return cliente.post("/api/partidas", json=dados_partida(), headers={"X-Perfil": modo, "X-Perfil-Token": token})
+
+
+def test_amostragem_grava_pilhas_agregadas(cliente_perfil, diretorio):
+    resposta = _perfilar(cliente_perfil, "amostragem")
+
+    assert resposta.status_code == 200 and resposta.json()["time_casa"] == "Flamengo"
+    nome = resposta.headers["x-perfil-arquivo"]
+    assert re.fullmatch(r"\d{8}T\d{6}_POST_[0-9a-f]{8}\.folded", nome)
+    for linha in (diretorio / nome).read_text(encoding="utf-8").splitlines():
+        assert re.fullmatch(r"\S+:\S+(;\S+:\S+)* \d+", linha)
+
+
+def test_deterministico_grava_pstats(cliente_perfil, diretorio):
+    resposta = cliente_perfil.get("/api/partidas?perfil=deterministico", headers={"X-Perfil-Token": TOKEN})
+
+    assert resposta.status_code == 200
+    estatisticas = pstats.Stats(str(diretorio / resposta.headers["x-perfil-arquivo"]))
+    assert any(funcao == "listar_partidas" for _, _, funcao in estatisticas.stats)
+
+
+def test_sem_pedido_nao_perfila_e_pedido_invalido_recusado(cliente_perfil, diretorio):
+    resposta = cliente_perfil.get("/api/partidas")
+    assert resposta.status_code == 200 and "x-perfil-arquivo" not in resposta.headers
+
+    assert _perfilar(cliente_perfil, "amostragem", token="errado").status_code == 403
+    assert _perfilar(cliente_perfil, "tracemalloc").status_code == 403
+    assert not diretorio.exists()
+
+
+def test_um_perfil_deterministico_por_vez(cliente_perfil):
+    with perfil._perfil_deterministico:
+        assert _perfilar(cliente_perfil, "deterministico").status_code == 409
+    assert _perfilar(cliente_perfil, "deterministico").status_code == 200
+
+
+def test_listagem_e_download(cliente_perfil, diretorio):
+    nomes = [_perfilar(cliente_perfil, modo).headers["x-perfil-arquivo"] for modo in ("deterministico", "amostragem")]
+    (diretorio / "anotacoes.txt").write_text("fora da listagem")
+    cabecalhos = {"X-Perfil-Token": TOKEN}
+
+    perfis = cliente_perfil.get("/api/perfis", headers=cabecalhos).json()
+    assert [item["nome"] for item in perfis] == sorted(nomes, reverse=True)
+    assert all(item["bytes"] == (diretorio / item["nome"]).stat().st_size for item in perfis)
+
+    resposta = cliente_perfil.get(f"/api/perfis/{nomes[0]}", headers=cabecalhos)
+    assert resposta.content == (diretorio / nomes[0]).read_bytes()
+    assert cliente_perfil.get("/api/perfis/anotacoes.txt", headers=cabecalhos).status_code == 404
+    assert cliente_perfil.get("/api/perfis/..%2F..%2Fserver.prof", headers=cabecalhos).status_code == 404
+    assert cliente_perfil.get("/api/perfis").status_code == 403
+
+
+def test_desligado(cliente, monkeypatch):
+    monkeypatch.setattr(perfil, "PERFIL_HABILITADO", False)
+    assert cliente.get("/api/perfis", headers={"X-Perfil-Token": ""}).status_code == 404
+    assert not perfil.token_perfil_valido("")
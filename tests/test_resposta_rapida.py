@@ -0,0 +1,76 @@
+"""RESPOSTA_RAPIDA: mesmos bytes do caminho padrão (response_model) com a opção ligada ou desligada"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from tests.conftest import dados_partida, executar
+
+
+def _respostas(cliente, monkeypatch, url, **params):
+    """Corpo e cabeçalho de cursor da mesma requisição com e sem RESPOSTA_RAPIDA"""
+    respostas = []
+    for rapida in (False, True):
+        monkeypatch.setattr(server, "RESPOSTA_RAPIDA", rapida)
+        resposta = cliente.get(url, params=params)
+        assert resposta.status_code == 200
+        respostas.append((resposta.content, resposta.headers.get("X-Proximo-Cursor")))
+    return respostas
+
+
+@pytest.fixture
+def partidas(cliente, banco):
+    """Partidas gravadas pela API, com snapshot de odds, e um documento legado"""
+    futuro = datetime.now(timezone.utc) + timedelta(days=3)
+    ids = [
+        cliente.post("/api/partidas", json=dados_partida(
+            time_casa=casa, data_hora=(futuro + timedelta(hours=i)).isoformat(), observacoes_adicionais=obs,
+        )).json()["id"]
+        for i, (casa, obs) in enumerate([("Grêmio", "Clássico às 16h"), ("São Paulo", None), ("Ceará", None)])
+    ]
+    cliente.post(f"/api/partidas/{ids[0]}/odds", json={"odd_casa": 1.95, "odd_empate": 3.4, "odd_fora": 4.0})
+
+    # Legado: sem campos opcionais e com criado_em em texto
+    legado = {
+        campo: valor for campo, valor in server.Partida(**dados_partida(time_casa="Vitória")).model_dump().items()
+        if server.Partida.model_fields[campo].is_required() or campo in ("id", "data_hora")
+    }
+    legado["criado_em"] = "2023-06-01T10:00:00.123000+00:00"
+    executar(cliente, lambda: banco.partidas.insert_one(legado))
+    return ids + [legado["id"]]
+
+
+@pytest.mark.parametrize("limite", [2, 100])
+def test_listagem(cliente, monkeypatch, partidas, limite):
+    (padrao, cursor_padrao), (rapida, cursor_rapido) = _respostas(cliente, monkeypatch, "/api/partidas", limit=limite)
+
+    assert rapida == padrao
+    assert cursor_rapido == cursor_padrao
+    assert b"odds_registradas_em" not in rapida
+
+
+def test_proximas(cliente, monkeypatch, partidas):
+    (padrao, _), (rapida, _) = _respostas(cliente, monkeypatch, "/api/partidas/proximas")
+
+    assert rapida == padrao
+    assert b"odds_registradas_em" not in rapida
+
+
+def test_analise_v2_do_mongo_e_do_cache(cliente, monkeypatch, partidas):
+    url = f"/api/partidas/{partidas[0]}/analise-v2"
+    server.cache_analises.invalidar(partidas[0])
+    do_mongo = _respostas(cliente, monkeypatch, url)
+    do_cache = _respostas(cliente, monkeypatch, url)
+
+    assert do_mongo[0] == do_mongo[1] == do_cache[0] == do_cache[1]
+
+
+def test_busca_mesmos_bytes_que_o_response_model(partidas, cliente, banco):
+    # mongomock não tem $text: compara o caminho rápido direto com a serialização do FastAPI
+    docs = executar(cliente, lambda: banco.partidas.find({}, {"_id": 0}).to_list(None))
+    docs = [{**doc, "relevancia": 1.5} for doc in docs]
+
+    adaptador = server.ADAPTADOR_RESULTADOS_BUSCA
+    padrao = server.JSONResponse(adaptador.dump_python(adaptador.validate_python(docs), mode="json")).body
+    assert server.resposta_documentos(adaptador, docs).body == padrao
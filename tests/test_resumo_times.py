@@ -0,0 +1,133 @@
+"""Resumo por time (db.times): atualização incremental x reconstrução completa"""
+
+import pytest
+
+import resumo_times
+import server
+from tests.conftest import conferir_com_reconstrucao, dados_partida, executar, resumos_times
+
+
+def _partida(cliente, casa, fora, data_hora):
+    resposta = cliente.post("/api/partidas", json=dados_partida(time_casa=casa, time_visitante=fora, data_hora=data_hora))
+    assert resposta.status_code == 200
+    return resposta.json()["id"]
+
+
+def test_ciclo_de_vida_igual_a_reconstrucao(cliente, banco):
+    fla_pal = _partida(cliente, "Flamengo", "Palmeiras", "2024-10-01T16:00:00Z")
+    pal_san = _partida(cliente, "Palmeiras", "Santos", "2024-10-08T16:00:00Z")
+    _partida(cliente, "Santos", "Flamengo", "2024-10-15T16:00:00Z")
+    resumos = conferir_com_reconstrucao(cliente, banco)
+    assert resumos["flamengo"]["partidas"] == 2 and resumos["flamengo"]["jogos_com_resultado"] == 0
+
+    # Resultado registrado
+    cliente.put(f"/api/partidas/{fla_pal}/resultado", json={"gols_casa": 2, "gols_fora": 1})
+    resumos = conferir_com_reconstrucao(cliente, banco)
+    assert (resumos["flamengo"]["vitorias"], resumos["flamengo"]["gols_marcados"]) == (1, 2)
+    assert (resumos["palmeiras"]["derrotas"], resumos["palmeiras"]["gols_sofridos"]) == (1, 2)
+
+    # Resultado corrigido: a contribuição anterior sai, a nova entra
+    cliente.put(f"/api/partidas/{fla_pal}/resultado", json={"gols_casa": 0, "gols_fora": 0})
+    resumos = conferir_com_reconstrucao(cliente, banco)
+    assert (resumos["flamengo"]["vitorias"], resumos["flamengo"]["empates"]) == (0, 1)
+    assert (resumos["palmeiras"]["derrotas"], resumos["palmeiras"]["empates"]) == (0, 1)
+    assert resumos["flamengo"]["gols_marcados"] == 0
+    recente = next(r for r in resumos["flamengo"]["recentes"] if r["partida_id"] == fla_pal)
+    assert (recente["resultado"], recente["gols_marcados"]) == ("E", 0)
+
+    # Ingestão em massa
+    corpo = [
+        dados_partida(time_casa="Grêmio", time_visitante="Flamengo", data_hora="2024-10-22T16:00:00Z"),
+        dados_partida(time_casa="Santos", time_visitante="Grêmio", data_hora="2024-10-29T16:00:00Z"),
+    ]
+    assert cliente.post("/api/partidas/bulk", json=corpo).json()["inseridas"] == 2
+    resumos = conferir_com_reconstrucao(cliente, banco)
+    assert resumos["grêmio"]["partidas"] == 2
+
+    # Remoções: contadores voltam, time sem partidas some
+    cliente.delete(f"/api/partidas/{fla_pal}")
+    cliente.delete(f"/api/partidas/{pal_san}")
+    resumos = conferir_com_reconstrucao(cliente, banco)
+    assert "palmeiras" not in resumos
+    assert resumos["flamengo"]["partidas"] == 2
+    assert resumos["flamengo"]["empates"] == 0 and resumos["flamengo"]["jogos_com_resultado"] == 0
+    assert fla_pal not in [r["partida_id"] for r in resumos["flamengo"]["recentes"]]
+
+
+def test_troca_de_time_decrementa_antigo_e_cria_novo(cliente, banco):
+    partida_id = _partida(cliente, "Flamengo", "Palmeiras", "2024-10-01T16:00:00Z")
+    _partida(cliente, "Palmeiras", "Grêmio", "2024-10-08T16:00:00Z")
+    cliente.put(f"/api/partidas/{partida_id}/resultado", json={"gols_casa": 1, "gols_fora": 3})
+
+    alterada = dados_partida(time_casa="Flamengo", time_visitante="Santos", data_hora="2024-10-01T16:00:00Z")
+    assert cliente.put(f"/api/partidas/{partida_id}", json=alterada).status_code == 200
+
+    resumos = conferir_com_reconstrucao(cliente, banco)
+    assert resumos["palmeiras"]["partidas"] == 1
+    assert resumos["palmeiras"]["partidas_fora"] == 0
+    assert partida_id not in [r["partida_id"] for r in resumos["palmeiras"]["recentes"]]
+    assert resumos["santos"]["nome"] == "Santos"
+    assert resumos["santos"]["partidas_fora"] == 1
+    assert [r["adversario"] for r in resumos["flamengo"]["recentes"]] == ["Santos"]
+
+    # Time sem outras partidas: o resumo antigo é removido
+    alterada["time_visitante"] = "Bahia"
+    cliente.put(f"/api/partidas/{partida_id}", json=alterada)
+    resumos = conferir_com_reconstrucao(cliente, banco)
+    assert "santos" not in resumos
+    assert resumos["bahia"]["partidas"] == 1
+
+
+def test_mesmo_time_com_outra_grafia_atualiza_nome(cliente, banco):
+    partida_id = _partida(cliente, "Flamengo", "Palmeiras", "2024-10-01T16:00:00Z")
+    alterada = dados_partida(time_casa="  FLAMENGO ", time_visitante="Palmeiras", data_hora="2024-10-01T16:00:00Z")
+    cliente.put(f"/api/partidas/{partida_id}", json=alterada)
+
+    resumos = conferir_com_reconstrucao(cliente, banco)
+    assert list(resumos) == ["flamengo", "palmeiras"]
+    assert resumos["flamengo"]["nome"] == "FLAMENGO"
+    assert resumos["flamengo"]["partidas"] == 1
+    assert cliente.get("/api/times/flamengo/resumo").json()["nome"] == "FLAMENGO"
+
+
+def test_reconstrucao_troca_colecao_com_rename(cliente, banco):
+    partidas = [
+        server.Partida(**dados_partida(time_casa=casa, time_visitante=fora, data_hora=f"2024-10-0{dia}T16:00:00Z")).model_dump()
+        for dia, (casa, fora) in enumerate([("Flamengo", "Palmeiras"), ("Palmeiras", "Santos")], start=1)
+    ]
+
+    async def preparar():
+        # Partidas gravadas sem passar pela atualização incremental + resumo obsoleto
+        await banco.partidas.insert_many(partidas)
+        await banco.times.insert_one({"chave": "obsoleto", "nome": "Obsoleto", "partidas": 9})
+
+    executar(cliente, preparar)
+    assert cliente.post("/api/times/reconstruir").json() == {"times": 3}
+
+    resumos = {resumo["chave"]: resumo for resumo in resumos_times(cliente, banco)}
+    assert sorted(resumos) == ["flamengo", "palmeiras", "santos"]
+    assert resumos["palmeiras"]["partidas"] == 2
+    assert [r["partida_id"] for r in resumos["palmeiras"]["recentes"]] == [partidas[1]["id"], partidas[0]["id"]]
+
+    async def colecoes_e_indices():
+        return await banco.list_collection_names(), await banco.times.index_information()
+
+    colecoes, indices = executar(cliente, colecoes_e_indices)
+    assert not [nome for nome in colecoes if nome.startswith("times_reconstrucao_")]
+    assert any(indice["key"] == [("chave", 1)] and indice.get("unique") for indice in indices.values())
+
+    # Sem partidas: a reconstrução esvazia db.times
+    executar(cliente, lambda: banco.partidas.delete_many({}))
+    assert cliente.post("/api/times/reconstruir").json() == {"times": 0}
+    assert resumos_times(cliente, banco) == []
+
+
+@pytest.mark.parametrize("limite", [1, 2])
+def test_recentes_limitadas_as_mais_novas(cliente, banco, monkeypatch, limite):
+    monkeypatch.setattr(resumo_times, "MAX_PARTIDAS_RECENTES_TIME", limite)
+    ids = [_partida(cliente, "Flamengo", fora, f"2024-10-0{dia}T16:00:00Z")
+           for dia, fora in enumerate(["Palmeiras", "Santos", "Bahia"], start=1)]
+
+    resumos = conferir_com_reconstrucao(cliente, banco)
+    assert [r["partida_id"] for r in resumos["flamengo"]["recentes"]] == ids[::-1][:limite]
+    assert resumos["flamengo"]["partidas"] == 3
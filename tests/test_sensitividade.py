@@ -0,0 +1,76 @@
+"""POST /api/partidas/{id}/sensitividade: grade de variações de notas e de odds em um lote"""
+
+import pytest
+
+import server
+from tests.conftest import dados_partida
+
+CAMPOS_1X2 = ("probabilidade_casa", "probabilidade_empate", "probabilidade_fora",
+              "resultado_previsto", "confianca", "ev_casa", "ev_empate", "ev_fora")
+
+
+@pytest.fixture
+def partida(cliente):
+    return cliente.post("/api/partidas", json=dados_partida()).json()
+
+
+def _sensitividade(cliente, partida_id, **corpo):
+    return cliente.post(f"/api/partidas/{partida_id}/sensitividade", json=corpo)
+
+
+def test_base_igual_a_analise_v2(cliente, partida):
+    corpo = _sensitividade(cliente, partida["id"]).json()
+    analise = cliente.get(f"/api/partidas/{partida['id']}/analise-v2").json()["analise_1x2"]
+
+    assert corpo["partida_id"] == partida["id"]
+    for campo in CAMPOS_1X2 + ("diferenca_probabilidade",):
+        assert corpo["base"][campo] == analise[campo]
+    # Padrão: 7 fatores, 4 deltas por lado (historico_h2h e os comuns variam uma vez só)
+    lados = sum(len(lados) for lados in server.LADOS_FATORES_V2.values())
+    assert len(corpo["fatores"]) == lados * 4
+    assert len(corpo["odds"]) == 3 * 4
+
+
+def test_delta_zero_reproduz_a_base_e_notas_limitadas(cliente, partida):
+    corpo = _sensitividade(
+        cliente, partida["id"], fatores=["forma_recente", "historico_h2h"], deltas_notas=[0.0, 10.0]
+    ).json()
+    variantes = {(v["fator"], v["lado"], v["delta"]): v for v in corpo["fatores"]}
+
+    assert set(variantes) == {
+        ("forma_recente", "casa", 0.0), ("forma_recente", "casa", 10.0),
+        ("forma_recente", "fora", 0.0), ("forma_recente", "fora", 10.0),
+        ("historico_h2h", "casa", 0.0), ("historico_h2h", "casa", 10.0),
+    }
+    for (_, _, delta), variante in variantes.items():
+        if delta == 0.0:
+            assert {campo: variante[campo] for campo in CAMPOS_1X2} == {campo: corpo["base"][campo] for campo in CAMPOS_1X2}
+
+    assert variantes[("forma_recente", "casa", 10.0)]["nota_casa"] == 10.0
+    assert variantes[("forma_recente", "casa", 10.0)]["probabilidade_casa"] > corpo["base"]["probabilidade_casa"]
+    assert variantes[("forma_recente", "fora", 10.0)]["probabilidade_fora"] > corpo["base"]["probabilidade_fora"]
+    h2h = variantes[("historico_h2h", "casa", 10.0)]
+    assert (h2h["nota_casa"], h2h["nota_fora"]) == (10.0, 0.0)
+
+
+def test_grade_de_odds(cliente, partida):
+    corpo = _sensitividade(cliente, partida["id"], fatores=["forca_elenco"], variacoes_odds=[-0.5, 0.1]).json()
+
+    for variante in corpo["odds"]:
+        mercado, variacao = variante["mercado"], variante["variacao"]
+        odd = round(partida[f"odd_{mercado}"] * (1 + variacao), 2)
+        ev = round(corpo["base"][f"probabilidade_{mercado}"] / 100 * odd - 1, 4)
+        assert (variante["odd"], variante["ev"]) == (odd, ev)
+        assert variante["classificacao_ev"] == server.classificar_ev(ev)
+    assert [(v["mercado"], v["variacao"]) for v in corpo["odds"]] == [
+        (mercado, variacao) for mercado in server.MERCADOS_1X2 for variacao in (-0.5, 0.1)
+    ]
+
+
+def test_erros(cliente, partida):
+    resposta = _sensitividade(cliente, partida["id"], fatores=["forma_recente", "sorte"])
+    assert resposta.status_code == 400 and "sorte" in resposta.json()["detail"]
+
+    assert _sensitividade(cliente, "inexistente").status_code == 404
+    assert _sensitividade(cliente, partida["id"], deltas_notas=[11.0]).status_code == 422
+    assert _sensitividade(cliente, partida["id"], variacoes_odds=[-1.0]).status_code == 422
@@ -0,0 +1,61 @@
+"""GET /api/partidas/stream: NDJSON em blocos, na ordem da listagem, com análise opcional"""
+
+import json
+
+import pytest
+
+import server
+from tests.conftest import dados_partida, executar, gerar_partidas_sinteticas
+
+
+@pytest.fixture
+def blocos_pequenos(monkeypatch):
+    """Blocos de 2 partidas: o stream atravessa vários blocos"""
+    monkeypatch.setattr(server, "TAMANHO_BLOCO_STREAM", 2)
+
+
+def _linhas(resposta):
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"] == "application/x-ndjson"
+    assert resposta.text.endswith("\n")
+    return [json.loads(linha) for linha in resposta.text.splitlines()]
+
+
+def test_uma_partida_por_linha_na_ordem_da_listagem(cliente, blocos_pequenos):
+    for dados in gerar_partidas_sinteticas(5):
+        cliente.post("/api/partidas", json=dados)
+
+    linhas = _linhas(cliente.get("/api/partidas/stream"))
+
+    listagem = cliente.get("/api/partidas").json()
+    assert [linha["id"] for linha in linhas] == [partida["id"] for partida in listagem]
+    assert [linha["time_casa"] for linha in linhas] == [partida["time_casa"] for partida in listagem]
+    assert all("analise_v2" not in linha and "_id" not in linha for linha in linhas)
+
+
+def test_filtro_e_projecao(cliente, blocos_pequenos):
+    for casa in ["Bahia", "Santos", "Bahia", "Vasco", "Bahia"]:
+        cliente.post("/api/partidas", json=dados_partida(time_casa=casa))
+
+    linhas = _linhas(cliente.get("/api/partidas/stream", params={"time": "Bahia", "campos": "time_casa,odd_casa"}))
+
+    assert len(linhas) == 3
+    assert all(set(linha) == {"id", "criado_em", "time_casa", "odd_casa"} for linha in linhas)
+    assert cliente.get("/api/partidas/stream", params={"campos": "senha"}).status_code == 400
+
+
+def test_incluir_analise_usa_a_salva_ou_calcula(cliente, banco, blocos_pequenos):
+    ids = [cliente.post("/api/partidas", json=dados).json()["id"] for dados in gerar_partidas_sinteticas(3)]
+    # Partida sem análise salva (ex.: gravada por fora da API)
+    sem_analise = server.Partida(**dados_partida(time_casa="Ceará")).model_dump()
+    executar(cliente, lambda: banco.partidas.insert_one(sem_analise))
+    ids.append(sem_analise["id"])
+
+    linhas = _linhas(cliente.get("/api/partidas/stream", params={"incluir_analise": "true", "campos": "time_casa"}))
+
+    assert sorted(linha["id"] for linha in linhas) == sorted(ids)
+    for linha in linhas:
+        assert "forma_casa" in linha  # a análise precisa da partida completa: a projeção é ignorada
+        esperada = cliente.get(f"/api/partidas/{linha['id']}/analise-v2").json()
+        assert linha["analise_v2"]["analise_1x2"] == esperada["analise_1x2"]
+        assert linha["analise_v2"]["outras_analises"] == esperada["outras_analises"]